@@ -14,34 +14,65 @@ __description__ = metadata.long_description
 from . import copads
 
 # Module imports (in ascending order of module names)
+from . import array_world
+from . import cell_update
+from . import checkpoint
 from . import codonA
 from . import database_calls
+from . import diffusion
 from . import dose
+from . import fitness
 from . import genetic
+from . import lineage
+from . import migration
+from . import population_index
 from . import register_machine
+from . import replicates
 from . import ragaraja
+from . import selection
 from . import simulation_calls
+from . import sweep
+from . import topology
 
 # COPADS Class imports (in ascending order of module names, then class names)
 from .copads.lindenmayer import Lindenmayer
 
 # DOSE Class imports (in ascending order of module names, then class names)
+from .array_world import ArrayWorld
+from .checkpoint import DeltaCheckpoint
 from .dose import dose_functions
 from .dose_world import World
+from .fitness import FitnessCache
+from .fitness import ReferenceIndex
 from .genetic import Chromosome
+from .genetic import LeanChromosome
+from .genetic import LeanOrganism
 from .genetic import Organism
 from .genetic import Population 
+from .lineage import Lineage
+from .population_index import AgentIndex
+from .selection import AliasTable
+from .topology import Topology
 
 # Function imports (in ascending order of module names, then function names)
+from .checkpoint import load_checkpoint
+from .checkpoint import restore_delta_checkpoint
+from .checkpoint import save_checkpoint
 from .database_calls import connect_database
+from .database_calls import db_delete_generations
+from .database_calls import db_delete_simulation
 from .database_calls import db_list_datafields
 from .database_calls import db_list_generations
 from .database_calls import db_list_simulations
+from .database_calls import db_merge_database
 from .database_calls import db_list_population_name
 from .database_calls import db_get_ecosystem
 from .database_calls import db_get_organisms_chromosome_sequences
 from .database_calls import db_get_organisms_genome
 from .database_calls import db_get_organisms_status
+from .diffusion import decay
+from .diffusion import diffuse
+from .diffusion import source_sink
 from .dose import database_report_populations
 from .dose import database_report_world
 from .dose import filter_age
@@ -52,11 +83,28 @@ from .dose import filter_status
 from .dose import filter_vitality
 from .dose import load_one_local_input
 from .dose import load_all_local_input
+from .dose import resume
 from .dose import revive_simulation
 from .dose import simulate
+from .fitness import genome_hash
+from .fitness import kmer_profile
+from .fitness import parallel_fitness
+from .genetic import assemble_agents
+from .genetic import batch_crossover
+from .genetic import bulk_mating
 from .genetic import crossover
+from .genetic import fossil_indices
 from .genetic import population_constructor
 from .genetic import population_simulate
+from .genetic import sequence_fingerprint
+from .genetic import template_population_constructor
+from .lineage import db_reconstruct_lineage
+from .migration import migrate
+from .replicates import run_replicates
+from .selection import roulette_selection
+from .selection import stochastic_universal_sampling
+from .selection import tournament_selection
+from .selection import truncation_selection
 from .simulation_calls import close_logging_database
 from .simulation_calls import connect_logging_database
 from .simulation_calls import database_logging
@@ -64,8 +112,12 @@ from .simulation_calls import deploy_populations
 from .simulation_calls import excavate_world
 from .simulation_calls import file_preparation
 from .simulation_calls import ragaraja_activation
+from .simulation_calls import resume_simulator
 from .simulation_calls import save_script
 from .simulation_calls import sequential_simulator
 from .simulation_calls import simulate_one_cycle
 from .simulation_calls import spawn_populations 
 from .simulation_calls import revive_population
+from .sweep import parameter_grid
+from .sweep import run_sweep
+from .topology import world_topology
@@ -0,0 +1,435 @@
+'''
+Array-backed World structure for DOSE (digital organism simulation
+environment). Numeric fields of the ecological cells (such as the number of
+organisms) are kept in contiguous arrays instead of one dictionary per
+ecological cell - NumPy arrays if NumPy is installed, or arrays from the
+array module otherwise. World.ecosystem[x][y][z][key] remains usable
+through lightweight views; hence, simulation functions written for
+dose_world.World work unchanged.
+
+Ecological cells are numbered in the order of x, y, then z, which is the
+numbering of topology.Topology; hence, fields can be processed as a whole
+(see ArrayWorld.field) with the neighbours from World.topology().
+
+Date created: 19th October 2026
+'''
+import array
+import copy
+
+try:
+    from collections.abc import Mapping, MutableMapping, Sequence
+except ImportError:
+    from collections import Mapping, MutableMapping, Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .dose_world import World
+
+def _new_array(size, default, use_numpy):
+    '''
+    Creates a flat array of a size, filled with a default value. Integer
+    default values give integer arrays; other values give float arrays.
+    '''
+    integer = isinstance(default, int) and not isinstance(default, bool)
+    if use_numpy:
+        if integer: return numpy.full(size, default, dtype=numpy.int64)
+        return numpy.full(size, float(default), dtype=numpy.float64)
+    if integer: return array.array('q', [default]) * size
+    return array.array('d', [float(default)]) * size
+
+def _python_value(value):
+    '''
+    Converts a NumPy scalar into a Python number.
+    '''
+    if hasattr(value, 'item'): return value.item()
+    return value
+
+class VectorView(Sequence):
+    '''
+    Writable view of the values of a vector field in one ecological cell of
+    an ArrayWorld (without NumPy), with a fixed length. Unlike a
+    memoryview, a view can be pickled and copied - a pickled or copied
+    view is a detached array (array.array) of the values; hence, views
+    kept in ecological cells or status tables do not prevent burial or
+    checkpointing.
+    '''
+    __slots__ = ('values', 'start', 'length')
+
+    def __init__(self, values, start, length):
+        self.values = values
+        self.start = start
+        self.length = length
+
+    def _position(self, index):
+        if index < 0: index = index + self.length
+        if index < 0 or index >= self.length:
+            raise IndexError('Vector field index out of range')
+        return self.start + index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.values[self.start + i]
+                    for i in range(*index.indices(self.length))]
+        return self.values[self._position(index)]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            positions = range(*index.indices(self.length))
+            value = list(value)
+            if len(value) != len(positions):
+                raise ValueError('Vector field slice requires ' + \
+                                 str(len(positions)) + ' values')
+            for (i, item) in zip(positions, value):
+                self.values[self.start + i] = item
+        else:
+            self.values[self._position(index)] = value
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other):
+        if isinstance(other, (Sequence, array.array)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented: return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def tolist(self):
+        '''
+        Gives the values as a list.
+
+        @return: list of values
+        '''
+        return list(self)
+
+    def __reduce__(self):
+        return (array.array, (self.values.typecode, list(self)))
+
+    def __copy__(self):
+        return array.array(self.values.typecode, self)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+class CellView(MutableMapping):
+    '''
+    Dictionary-like view of one ecological cell of an ArrayWorld. Numeric
+    fields are read from and written into the arrays of the world; vector
+    fields are given as writable views (NumPy array or VectorView) of fixed
+    length; other fields are kept in a dictionary for the cell. Numeric and
+    vector fields cannot be deleted. A deep copy of a view is a plain
+    dictionary.
+    '''
+    __slots__ = ('world', 'index')
+
+    def __init__(self, world, index):
+        self.world = world
+        self.index = index
+
+    def __getitem__(self, key):
+        world = self.world
+        if key in world.fields:
+            return _python_value(world.fields[key][self.index])
+        if key in world.vector_fields:
+            return world.vector(key, self.index)
+        return world.cell_objects(self.index)[key]
+
+    def __setitem__(self, key, value):
+        world = self.world
+        if key in world.fields:
+            world.fields[key][self.index] = value
+        elif key in world.vector_fields:
+            vector = world.vector(key, self.index)
+            value = list(value)
+            if len(value) != len(vector):
+                raise ValueError('Vector field ' + str(key) + \
+                                 ' requires ' + str(len(vector)) + ' values')
+            for (i, item) in enumerate(value):
+                vector[i] = item
+        else:
+            world.cell_objects(self.index)[key] = value
+
+    def __delitem__(self, key):
+        world = self.world
+        if key in world.fields or key in world.vector_fields:
+            raise KeyError('Array field cannot be deleted: ' + str(key))
+        del world.cell_objects(self.index)[key]
+
+    def __iter__(self):
+        world = self.world
+        for key in world.cell_objects(self.index): yield key
+        for key in world.fields: yield key
+        for key in world.vector_fields: yield key
+
+    def __len__(self):
+        world = self.world
+        return len(world.cell_objects(self.index)) + len(world.fields) + \
+            len(world.vector_fields)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __deepcopy__(self, memo):
+        cell = {}
+        for key in self:
+            value = self[key]
+            if key in self.world.vector_fields:
+                if numpy is not None and isinstance(value, numpy.ndarray):
+                    value = value.copy()
+                else:
+                    value = list(value)
+            else:
+                value = copy.deepcopy(value, memo)
+            cell[key] = value
+        return cell
+
+    def replace(self, cell):
+        '''
+        Replaces the contents of the ecological cell.
+
+        @param cell: dictionary (or CellView) of ecological cell
+        '''
+        for key in list(self.world.cell_objects(self.index).keys()):
+            if key not in cell: del self[key]
+        for key in cell:
+            self[key] = cell[key]
+
+class EcosystemView(Mapping):
+    '''
+    Nested dictionary-like view of the ecological cells of an ArrayWorld,
+    as ArrayWorld.ecosystem[x][y][z]. Assigning a dictionary to an
+    ecological cell (World.ecosystem[x][y][z] = cell) replaces the contents
+    of the cell.
+    '''
+    __slots__ = ('world', 'prefix')
+
+    def __init__(self, world, prefix=()):
+        self.world = world
+        self.prefix = prefix
+
+    def _size(self):
+        return (self.world.world_x, self.world.world_y,
+                self.world.world_z)[len(self.prefix)]
+
+    def __getitem__(self, key):
+        if not isinstance(key, int) or key < 0 or key >= self._size():
+            raise KeyError(key)
+        location = self.prefix + (key,)
+        if len(location) == 3:
+            return CellView(self.world, self.world.cell_index(location))
+        return EcosystemView(self.world, location)
+
+    def __setitem__(self, key, cell):
+        if len(self.prefix) != 2:
+            raise TypeError('Only ecological cells can be replaced')
+        self[key].replace(cell)
+
+    def __iter__(self):
+        return iter(range(self._size()))
+
+    def __len__(self):
+        return self._size()
+
+class ArrayWorld(World):
+    '''
+    Representation of a 3-dimensional ecological world with numeric fields
+    of the ecological cells kept in contiguous arrays (see dose_world.World
+    for the ecological cells). By default, only the number of organisms
+    in each ecological cell ('organisms') is kept in an array; other
+    fields can be added as numeric fields (one number per ecological cell)
+    or vector fields (a fixed number of floats per ecological cell, such
+    as numeric local_input and local_output).
+    '''
+    def __init__(self, world_x, world_y, world_z, fields=None,
+                 vector_fields=None, use_numpy=True):
+        '''
+        Setting up the world and ecosystem
+
+        @param world_x: number of ecological cells on the x-axis
+        @type world_x: integer
+        @param world_y: number of ecological cells on the y-axis
+        @type world_y: integer
+        @param world_z: number of ecological cells on the z-axis
+        @type world_z: integer
+        @param fields: dictionary of numeric fields with field name as key
+        and initial value as value. Default = None ({'organisms': 0}).
+        @param vector_fields: dictionary of vector fields with field name as
+        key and number of values in each ecological cell as value, such as
+        {'local_input': 10}. Default = None (no vector field).
+        @param use_numpy: if True, use NumPy arrays if NumPy is installed;
+        otherwise, use arrays from array module. Default = True.
+        '''
+        self.world_x = int(world_x)
+        self.world_y = int(world_y)
+        self.world_z = int(world_z)
+        self.size = self.world_x * self.world_y * self.world_z
+        self.use_numpy = bool(use_numpy) and numpy is not None
+        self.template = {'local_input': [], 'local_output': [],
+                         'temporary_input': [], 'temporary_output': [],
+                         'organisms': 0}
+        self.fields = {}
+        self.vector_fields = {}
+        self.objects = {}
+        if fields is None: fields = {'organisms': 0}
+        for name in fields:
+            self.add_field(name, fields[name])
+        if vector_fields is None: vector_fields = {}
+        for name in vector_fields:
+            self.add_vector_field(name, vector_fields[name])
+        self.ecosystem = EcosystemView(self)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['ecosystem']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ecosystem = EcosystemView(self)
+
+    def cell_index(self, location):
+        '''
+        Gives the number of an ecological cell, which is the position of
+        the cell in the arrays.
+
+        @param location: location of ecological cell as (x,y,z)
+        @return: cell number
+        '''
+        (x, y, z) = location
+        return (x * self.world_y + y) * self.world_z + z
+
+    def add_field(self, name, default=0.0):
+        '''
+        Adds a numeric field (one number per ecological cell).
+
+        @param name: field name
+        @param default: initial value; integers give an integer field.
+        Default = 0.0.
+        '''
+        self.fields[name] = _new_array(self.size, default, self.use_numpy)
+        for objects in self.objects.values(): objects.pop(name, None)
+
+    def add_vector_field(self, name, length, default=0.0):
+        '''
+        Adds a vector field (a fixed number of floats per ecological cell).
+
+        @param name: field name
+        @param length: number of values in each ecological cell
+        @param default: initial value. Default = 0.0.
+        '''
+        length = int(length)
+        if self.use_numpy:
+            values = numpy.full((self.size, length), float(default))
+        else:
+            values = _new_array(self.size * length, float(default), False)
+        self.vector_fields[name] = (values, length)
+        for objects in self.objects.values(): objects.pop(name, None)
+
+    def field(self, name):
+        '''
+        Gives the array of a numeric field. With NumPy, the array is a view
+        with shape (world_x, world_y, world_z); otherwise, the array is a
+        flat array in the order of cell numbers (see cell_index).
+
+        @param name: field name
+        @return: array of the field
+        '''
+        values = self.fields[name]
+        if self.use_numpy:
+            return values.reshape((self.world_x, self.world_y, self.world_z))
+        return values
+
+    def vector(self, name, index):
+        '''
+        Gives the values of a vector field in an ecological cell as a
+        writable view.
+
+        @param name: field name
+        @param index: cell number (see cell_index)
+        @return: NumPy array or VectorView
+        '''
+        (values, length) = self.vector_fields[name]
+        if self.use_numpy: return values[index]
+        return VectorView(values, index * length, length)
+
+    def cell_objects(self, index):
+        '''
+        Gives the dictionary of non-array fields of an ecological cell,
+        creating it from the template of ecological cell if needed.
+
+        @param index: cell number (see cell_index)
+        @return: dictionary of non-array fields
+        '''
+        objects = self.objects.get(index)
+        if objects is None:
+            objects = dict([(key, copy.deepcopy(self.template[key]))
+                            for key in self.template
+                            if key not in self.fields and
+                            key not in self.vector_fields])
+            self.objects[index] = objects
+        return objects
+
+    def ecosystem_dict(self):
+        '''
+        Gives the ecosystem as nested dictionaries, as in
+        dose_world.World.ecosystem.
+
+        @return: dictionary of ecological cells as [x][y][z]
+        '''
+        return dict([(x, dict([(y, dict([(z, copy.deepcopy(
+                        self.ecosystem[x][y][z]))
+                                         for z in range(self.world_z)]))
+                               for y in range(self.world_y)]))
+                     for x in range(self.world_x)])
+
+    def load_ecosystem(self, ecosystem):
+        '''
+        Loads an ecosystem of nested dictionaries (as in
+        dose_world.World.ecosystem) into the world.
+
+        @param ecosystem: dictionary of ecological cells as [x][y][z]
+        '''
+        for x in ecosystem:
+            for y in ecosystem[x]:
+                for z in ecosystem[x][y]:
+                    self.ecosystem[x][y][z] = ecosystem[x][y][z]
+
+    def eco_burial(self, filename):
+        '''
+        Function to preserve the entire ecosystem, as nested dictionaries
+        which can be excavated by dose_world.World or ArrayWorld.
+
+        @param filename: file name of preserved ecosystem.
+        '''
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        f = open(filename, 'wb')
+        pickle.dump(self.ecosystem_dict(), f)
+        f.close()
+
+    def eco_excavate(self, filename):
+        '''
+        Function to excavate entire ecosystem.
+
+        @param filename: file name of preserved ecosystem.
+        '''
+        try:
+            import cPickle as pickle
+        except ImportError:
+            import pickle
+        f = open(filename, 'rb')
+        self.load_ecosystem(pickle.load(f))
+        f.close()
@@ -0,0 +1,242 @@
+'''
+File containing a bounded background writer for DOSE (digital organism
+simulation environment), which writes simulation outputs (world burials,
+frozen populations, results text files and database logging) in a
+background thread while the simulation continues with the next generation.
+
+The simulator takes a consistent snapshot of the data (see snapshot_world
+and snapshot_population) before handing it to the writer, which pickles
+and writes the snapshot (see pickle_file); hence, the simulation can change
+the World and populations while the snapshot is being written. Snapshots
+copy only the containers (ecological cells, status and chromosomal
+sequences) which the simulation changes, and share everything else, so
+taking a snapshot is cheaper than pickling. The queue
+of pending writes is bounded - the simulator waits when the queue is full
+(backpressure). The writer is used when "background_writing" in simulation
+parameters is the maximum number of pending writes (more than 0).
+
+Date created: 19th October 2026
+'''
+import copy
+import threading
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+class BackgroundWriter(object):
+    '''
+    Background thread which executes write jobs in the order of
+    submission. An exception in a write job is raised in the simulation
+    thread at the next submission, flush or close.
+    '''
+    def __init__(self, maxsize=4):
+        '''
+        Starts the background thread.
+
+        @param maxsize: maximum number of pending write jobs; submission
+        waits when the queue is full. Default = 4.
+        '''
+        self.queue = queue.Queue(max(1, int(maxsize)))
+        self.error = None
+        self.thread = threading.Thread(target=self._run,
+                                       name='dose-background-writer')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None: return
+                if self.error is None:
+                    (function, args) = job
+                    function(*args)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            raise error
+
+    def submit(self, function, *args):
+        '''
+        Submits a write job, waiting if the queue is full.
+
+        @param function: function to execute in the background thread
+        @param args: arguments of the function, which should be snapshots
+        that are not changed by the simulation
+        '''
+        self._raise_error()
+        self.queue.put((function, args))
+
+    def flush(self):
+        '''
+        Waits until all submitted write jobs are done.
+        '''
+        self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        '''
+        Waits until all submitted write jobs are done, then stops the
+        background thread.
+        '''
+        self.queue.put(None)
+        self.thread.join()
+        self._raise_error()
+
+def write_file(filename, data, mode='wb'):
+    '''
+    Writes data into a file.
+
+    @param filename: file name
+    @param data: bytes (or string for text modes) to write
+    @param mode: file mode. Default = 'wb'.
+    '''
+    f = open(filename, mode)
+    f.write(data)
+    f.close()
+
+def pickle_file(filename, value):
+    '''
+    Pickles a value into a file.
+
+    @param filename: file name
+    @param value: value to pickle, such as a snapshot (see snapshot_world
+    and snapshot_population)
+    '''
+    f = open(filename, 'wb')
+    pickle.dump(value, f)
+    f.close()
+
+def _copy_value(value):
+    if isinstance(value, list): return list(value)
+    if isinstance(value, dict): return dict(value)
+    return value
+
+def snapshot_world(World):
+    '''
+    Takes a snapshot of a World to be pickled in the background thread.
+    The ecological cells are copied (with their list and dictionary
+    values, such as local_input) while other values are shared. Worlds
+    which do not keep the ecosystem in dictionaries (such as
+    array_world.ArrayWorld) are deep-copied.
+
+    @param World: dose_world.World object
+    @return: copy of World
+    '''
+    ecosystem = World.ecosystem
+    if type(ecosystem) is not dict: return copy.deepcopy(World)
+    snapshot = copy.copy(World)
+    snapshot.ecosystem = \
+        dict([(x, dict([(y, dict([(z, dict([(key, _copy_value(value))
+                                            for (key, value)
+                                            in cell.items()]))
+                                  for (z, cell) in eco_y.items()]))
+                        for (y, eco_y) in eco_x.items()]))
+              for (x, eco_x) in ecosystem.items()])
+    return snapshot
+
+def snapshot_status(status):
+    '''
+    Takes a snapshot of the status table of an organism, copying its list
+    and dictionary values (such as blood and parents).
+
+    @param status: status table (dictionary or genetic.OrganismStatus)
+    @return: copy of status table
+    '''
+    if isinstance(status, dict): status = dict(status)
+    else: status = copy.copy(status)
+    for (key, value) in list(status.items()):
+        if isinstance(value, (list, dict)): status[key] = _copy_value(value)
+    return status
+
+def snapshot_chromosome(chromosome):
+    '''
+    Takes a snapshot of a chromosome, copying its sequence (if mutable)
+    and keeping its fingerprint.
+
+    @param chromosome: genetic.Chromosome or genetic.LeanChromosome object
+    @return: copy of chromosome
+    '''
+    if not hasattr(chromosome, 'fingerprint'):
+        return copy.deepcopy(chromosome)
+    snapshot = copy.copy(chromosome)
+    sequence = chromosome.sequence
+    if isinstance(sequence, list): sequence = list(sequence)
+    elif not isinstance(sequence, (str, tuple)):
+        # such as genetic.SharedSequence, which keeps sharing its tuple 
+        # and fingerprint
+        sequence = copy.copy(sequence)
+    snapshot.sequence = sequence
+    return snapshot
+
+def snapshot_population(population):
+    '''
+    Takes a snapshot of a population to be pickled in the background
+    thread. The attributes of the population (other than its organisms)
+    are deep-copied, while the status and genome of each organism are
+    copied (see snapshot_status and snapshot_chromosome).
+
+    @param population: genetic.Population object
+    @return: copy of population
+    '''
+    snapshot = copy.deepcopy(population.subpopulation([]))
+    organisms = {}
+    agents = []
+    for organism in population.agents:
+        key = id(organism)
+        if key not in organisms:
+            copied = copy.copy(organism)
+            copied.status = snapshot_status(organism.status)
+            copied.genome = [snapshot_chromosome(chromosome)
+                             for chromosome in organism.genome]
+            organisms[key] = copied
+        agents.append(organisms[key])
+    snapshot.agents = agents
+    return snapshot
+
+_writer = None
+
+def start_background_writer(maxsize=4):
+    '''
+    Starts the background writer of the simulation, stopping the previous
+    one if any.
+
+    @param maxsize: maximum number of pending write jobs. Default = 4.
+    @return: BackgroundWriter object
+    '''
+    global _writer
+    stop_background_writer()
+    _writer = BackgroundWriter(maxsize)
+    return _writer
+
+def background_writer():
+    '''
+    Gives the background writer of the simulation.
+
+    @return: BackgroundWriter object, or None if background writing is
+    not used
+    '''
+    return _writer
+
+def stop_background_writer():
+    '''
+    Completes all pending writes and stops the background writer of the
+    simulation, if any.
+    '''
+    global _writer
+    writer = _writer
+    _writer = None
+    if writer is not None: writer.close()
@@ -0,0 +1,235 @@
+'''
+File containing support functions for double-buffered update of
+ecological cells, used by the simulator for update_ecology and
+update_local functions (see dose.dose_functions.eco_cell_buffering).
+
+In a double-buffered update, each ecological cell function reads the
+ecosystem as it was at the start of the update (previous state) and
+changes only a copy of its own ecological cell (next state). The next
+states replace the ecological cells after all cells are updated; hence,
+the result does not depend on the order of the cells and cells can be
+updated in worker processes. The ecological cell function should only
+change World.ecosystem[x][y][z] of its own cell (x, y, z).
+
+Date created: 19th October 2026
+'''
+import copy
+import multiprocessing
+import os
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from .background_writer import background_writer
+
+class BufferedEcosystem(Mapping):
+    '''
+    Read-only view of World.ecosystem (or a part of it) in which the
+    ecological cell being updated is replaced by its next-state buffer.
+    Other ecological cells are given as their previous state.
+    '''
+    __slots__ = ('previous', 'location', 'buffer')
+
+    def __init__(self, previous, location, buffer):
+        '''
+        Sets up the view.
+
+        @param previous: ecosystem (or part of it) at previous state
+        @param location: remaining coordinates of the ecological cell
+        being updated, such as (x, y, z)
+        @param buffer: next-state buffer of the ecological cell
+        '''
+        self.previous = previous
+        self.location = tuple(location)
+        self.buffer = buffer
+
+    def __getitem__(self, key):
+        item = self.previous[key]
+        if key != self.location[0]: return item
+        if len(self.location) == 1: return self.buffer
+        return BufferedEcosystem(item, self.location[1:], self.buffer)
+
+    def __iter__(self):
+        return iter(self.previous)
+
+    def __len__(self):
+        return len(self.previous)
+
+def buffered_world(World, location, buffer):
+    '''
+    Gives a view of a World for updating one ecological cell, in which
+    World.ecosystem is a BufferedEcosystem. Other attributes of the World
+    are shared.
+
+    @param World: dose_world.World object at previous state
+    @param location: location of ecological cell as (x,y,z)
+    @param buffer: next-state buffer of the ecological cell
+    @return: view of World
+    '''
+    view = copy.copy(World)
+    view.ecosystem = BufferedEcosystem(World.ecosystem, location, buffer)
+    return view
+
+def update_cell(World, function, location):
+    '''
+    Updates one ecological cell into its next-state buffer.
+
+    @param World: dose_world.World object at previous state
+    @param function: ecological cell function which takes World, x, y
+    and z (such as dose_functions.update_ecology)
+    @param location: location of ecological cell as (x,y,z)
+    @return: next state of the ecological cell
+    '''
+    (x, y, z) = location
+    buffer = copy.deepcopy(World.ecosystem[x][y][z])
+    function(buffered_world(World, location, buffer), x, y, z)
+    return buffer
+
+# process pool for double-buffered update, which is kept across updates
+# and re-created only when the ecological cell function, the number of
+# processes or the start method changes
+_pool = None
+_pool_key = None
+_worker_function = None
+_worker_world = None
+_worker_version = None
+_world_version = 0
+
+def _cell_initializer(function):
+    '''
+    Sets the ecological cell function in each worker process of the pool.
+    '''
+    global _worker_function, _worker_world, _worker_version
+    _worker_function = function
+    _worker_world = None
+    _worker_version = None
+
+def _cell_worker(item):
+    '''
+    Updates a chunk of ecological cells in a worker process.
+
+    @param item: tuple of (version, file name of the pickled World at
+    previous state, list of locations of ecological cells); the World is
+    loaded once for each version in a worker process
+    @return: list of (location, next state of the ecological cell)
+    '''
+    global _worker_world, _worker_version
+    (version, filename, cells) = item
+    if _worker_version != version:
+        f = open(filename, 'rb')
+        try: _worker_world = pickle.load(f)
+        finally: f.close()
+        _worker_version = version
+    return [(location, update_cell(_worker_world, _worker_function,
+                                   location))
+            for location in cells]
+
+def start_method():
+    '''
+    Gives the start method of worker processes for double-buffered
+    update. Processes are forked where the platform allows, unless the
+    background writer thread (see background_writer) is running, as a
+    process forked while another thread holds a lock may deadlock; then,
+    the processes are started by a fork server or spawned, and the
+    simulation script must be guarded by if __name__ == '__main__'.
+
+    @return: name of start method
+    '''
+    methods = multiprocessing.get_all_start_methods()
+    if background_writer() is None and 'fork' in methods: return 'fork'
+    if 'forkserver' in methods: return 'forkserver'
+    if 'spawn' in methods: return 'spawn'
+    return multiprocessing.get_start_method()
+
+def cell_pool(function, processes=None):
+    '''
+    Returns the process pool for double-buffered update, creating it if
+    needed. The ecological cell function is given to each worker process
+    once, when the pool is created (see fitness.fitness_pool).
+
+    @param function: ecological cell function which takes World, x, y
+    and z (such as dose_functions.update_ecology)
+    @param processes: number of worker processes. Default = None, which
+    uses the number of CPUs.
+    @return: multiprocessing.Pool object
+    '''
+    global _pool, _pool_key
+    method = start_method()
+    key = (function, processes, method)
+    if _pool is not None and _pool_key == key:
+        return _pool
+    close_cell_pool()
+    context = multiprocessing.get_context(method)
+    _pool = context.Pool(processes, _cell_initializer, (function,))
+    _pool_key = key
+    return _pool
+
+def close_cell_pool():
+    '''
+    Terminates the process pool for double-buffered update, if any.
+    '''
+    global _pool, _pool_key
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+    _pool = None
+    _pool_key = None
+
+def update_cells(World, function, cells, processes=1, chunksize=None):
+    '''
+    Double-buffered update of ecological cells. The next states of all
+    cells are computed from the previous state of the ecosystem, then
+    swapped into World.ecosystem. With more than one process, chunks of
+    cells are updated in a process pool which is kept across updates (see
+    cell_pool and close_cell_pool); the previous state is pickled once
+    for each update into a temporary file, which is loaded once in each
+    worker process, and only the locations of the cells are sent with
+    each chunk. Results are identical to the update in one process if
+    the ecological cell function does not use random numbers.
+
+    @param World: dose_world.World object
+    @param function: ecological cell function which takes World, x, y
+    and z (such as dose_functions.update_ecology). The function must be
+    picklable if processes cannot be forked (see start_method).
+    @param cells: list of locations of ecological cells as (x,y,z)
+    @param processes: number of worker processes; None to use the number
+    of CPUs. Default = 1 (update in this process).
+    @param chunksize: number of cells given to a worker process at a
+    time. Default = None (cells are split into about 4 chunks per worker
+    process).
+    @return: none
+    '''
+    global _world_version
+    cells = [tuple(location) for location in cells]
+    if processes is None: processes = multiprocessing.cpu_count()
+    if processes <= 1 or len(cells) < 2:
+        updates = [(location, update_cell(World, function, location))
+                   for location in cells]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(cells) // (processes * 4))
+        pool = cell_pool(function, processes)
+        _world_version = _world_version + 1
+        (handle, filename) = tempfile.mkstemp(prefix='dose_world_',
+                                              suffix='.pickle')
+        try:
+            f = os.fdopen(handle, 'wb')
+            try: pickle.dump(World, f, pickle.HIGHEST_PROTOCOL)
+            finally: f.close()
+            items = [(_world_version, filename, cells[i:i + chunksize])
+                     for i in range(0, len(cells), chunksize)]
+            updates = []
+            for chunk in pool.imap(_cell_worker, items):
+                updates.extend(chunk)
+        finally:
+            os.remove(filename)
+    for ((x, y, z), buffer) in updates:
+        World.ecosystem[x][y][z] = buffer
@@ -0,0 +1,582 @@
+'''
+File containing checkpoints of simulations for DOSE (digital organism
+simulation environment).
+
+Delta checkpoints (see DeltaCheckpoint) write a full base snapshot of the
+World and populations, followed by deltas of each checkpointed generation
+which hold only the changes from the previous checkpoint - changed
+ecological cells, new organisms, and the changed status and mutated
+chromosomes of existing organisms. A new base snapshot is written after a
+number of deltas (re-basing), and the World and populations of any
+checkpointed generation can be restored by replaying the deltas from the
+base snapshot before it (see restore_delta_checkpoint).
+
+Simulation checkpoints (see save_checkpoint) are single self-describing
+files holding the generation count, the states of the random number
+generators, simulation parameters, the World, and all populations, which
+are needed to resume a simulation (see dose.resume). The sizes of the
+simulation result files at the checkpoint are recorded; hence, reports
+written after the checkpoint can be removed when the simulation is resumed
+(see truncate_files). Checkpoint files are replaced atomically; hence, a
+crash while writing leaves the previous checkpoint intact.
+
+Date created: 19th October 2026
+'''
+import array
+import copy
+import glob
+import os
+import random
+from datetime import datetime
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _dumps(value):
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+def _cell_bytes(cell):
+    '''
+    Pickles an ecological cell as a dictionary.
+    '''
+    if not isinstance(cell, dict): cell = copy.deepcopy(cell)
+    return _dumps(cell)
+
+def _snapshot(value):
+    '''
+    Gives a comparable snapshot of a value (such as an ecological cell or
+    a status table), to detect changes between checkpoints without
+    pickling the value. Hashable values are kept as they are; sequences,
+    mappings and objects are taken apart into tuples.
+    '''
+    if value is None or isinstance(value, (bool, int, float, complex, str,
+                                           bytes)):
+        return value
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        return ('ndarray', value.shape, value.tobytes())
+    if isinstance(value, Mapping):
+        return ('mapping', tuple([(key, _snapshot(value[key]))
+                                  for key in value]))
+    if isinstance(value, (list, tuple, memoryview, array.array)) or \
+        isinstance(value, Sequence):
+        items = tuple(value)
+        try:
+            hash(items)
+            return (type(value).__name__, items)
+        except TypeError:
+            return (type(value).__name__,
+                    tuple([_snapshot(item) for item in items]))
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__, _snapshot(sorted(value, key=repr)))
+    attributes = _attributes(value)
+    if attributes:
+        return (type(value).__name__, _snapshot(attributes))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ('pickle', _dumps(value))
+
+def _attributes(value, excluded=()):
+    '''
+    Gives the attributes of an object (in slots or in the dictionary of
+    the object) as a dictionary.
+    '''
+    attributes = {}
+    for cls in type(value).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        if isinstance(slots, str): slots = (slots,)
+        for name in slots:
+            if name in excluded or name == '__dict__': continue
+            if hasattr(value, name): attributes[name] = getattr(value, name)
+    for (name, attribute) in getattr(value, '__dict__', {}).items():
+        if name not in excluded: attributes[name] = attribute
+    return attributes
+
+def _chromosome_key(chromosome):
+    '''
+    Gives the key to detect mutated chromosomes - the fingerprint of the
+    sequence (see genetic.Chromosome.fingerprint) where available.
+    '''
+    if hasattr(chromosome, 'fingerprint'):
+        return (chromosome.fingerprint(), len(chromosome.sequence),
+                getattr(chromosome, 'background_mutation', None))
+    return _snapshot(chromosome)
+
+def _organism_shell(organism):
+    '''
+    Pickles an organism without its genome and status.
+    '''
+    shell = copy.copy(organism)
+    shell.genome = []
+    shell.status = None
+    return _dumps(shell)
+
+def _population_shell(population):
+    '''
+    Pickles a population without its organisms.
+    '''
+    return _dumps(population.subpopulation([]))
+
+def _organism_state(organism):
+    '''
+    Gives the state of an organism to detect changes between checkpoints:
+    snapshots of its attributes (shell) and status, and the keys of its
+    chromosomes (see _chromosome_key).
+    '''
+    return {'shell': _snapshot(_attributes(organism, ('genome', 'status'))),
+            'status': _snapshot(organism.status),
+            'chromosomes': [_chromosome_key(chromosome)
+                            for chromosome in organism.genome]}
+
+def _organism_data(organism):
+    '''
+    Pickles an organism as (shell, status, list of chromosomes).
+    '''
+    return (_organism_shell(organism), _dumps(organism.status),
+            [_dumps(chromosome) for chromosome in organism.genome])
+
+class DeltaCheckpoint(object):
+    '''
+    Writer of delta checkpoints of a simulation. Each checkpoint is a file
+    named <prefix>_gen<generation>.base.ckpt (base snapshot) or
+    <prefix>_gen<generation>.delta.ckpt (changes from the previous
+    checkpoint).
+
+    Changes are detected before anything is pickled, so unchanged parts
+    are not serialized again: ecological cells, status and other
+    attributes of organisms, and populations are compared with snapshots
+    (see _snapshot) of the previous checkpoint, and chromosomes are
+    compared by their fingerprints (see genetic.Chromosome.fingerprint).
+    As for the fingerprint, a chromosomal sequence changed directly in
+    place (not by rmutate, kmutate or replacing the sequence) without a
+    change of length is not detected until the next base snapshot.
+    Organisms are tracked by object identity between checkpoints; as
+    every part of an organism is compared, a recycled object identity
+    does not give a wrong delta.
+    '''
+    def __init__(self, prefix, rebase_frequency=10, writer=None):
+        '''
+        Sets up the checkpoint writer.
+
+        @param prefix: file name prefix of checkpoint files
+        @param rebase_frequency: number of deltas between base snapshots.
+        Default = 10.
+        @param writer: background_writer.BackgroundWriter object to write
+        the files. Default = None (files are written directly).
+        '''
+        self.prefix = prefix
+        self.rebase_frequency = max(1, int(rebase_frequency))
+        self.writer = writer
+        self.deltas = None
+        self.previous = None
+        self.cells = {}
+        self.populations = {}
+
+    def _filename(self, generation, kind):
+        return '%s_gen%s.%s.ckpt' % (self.prefix, str(generation), kind)
+
+    def _write(self, filename, record):
+        data = _dumps(record)
+        if self.writer is None:
+            f = open(filename, 'wb')
+            f.write(data)
+            f.close()
+        else:
+            from .background_writer import write_file
+            self.writer.submit(write_file, filename, data)
+
+    def _world_cells(self, World):
+        for x in range(World.world_x):
+            for y in range(World.world_y):
+                for z in range(World.world_z):
+                    yield ((x, y, z), World.ecosystem[x][y][z])
+
+    def _population_state(self, population):
+        return _snapshot(_attributes(population,
+                                     ('agents', '_indexes', '_entries',
+                                      '_occurrences', '_next_entry',
+                                      '_order_stale', '_fitness_cache')))
+
+    def record(self, generation, World, Populations):
+        '''
+        Writes a checkpoint of a generation - a base snapshot for the
+        first checkpoint and after rebase_frequency deltas, or a delta
+        otherwise.
+
+        @param generation: generation count
+        @param World: dose_world.World object
+        @param Populations: dictionary of population objects
+        @return: file name of the checkpoint
+        '''
+        if self.deltas is None or self.deltas >= self.rebase_frequency:
+            return self._record_base(generation, World, Populations)
+        return self._record_delta(generation, World, Populations)
+
+    def _record_base(self, generation, World, Populations):
+        self.cells = dict([(location, _snapshot(cell)) for (location, cell)
+                           in self._world_cells(World)])
+        record = {'kind': 'base', 'generation': generation,
+                  'world': _dumps(World), 'populations': {}}
+        self.populations = {}
+        for pop_name in Populations:
+            population = Populations[pop_name]
+            organisms = {}
+            states = {}
+            for organism in population.agents:
+                key = id(organism)
+                if key in states: continue
+                states[key] = _organism_state(organism)
+                organisms[key] = _organism_data(organism)
+            record['populations'][pop_name] = \
+                {'shell': _population_shell(population),
+                 'order': [id(organism) for organism in population.agents],
+                 'organisms': organisms}
+            self.populations[pop_name] = \
+                (self._population_state(population), states)
+        filename = self._filename(generation, 'base')
+        self._write(filename, record)
+        self.deltas = 0
+        self.previous = generation
+        return filename
+
+    def _record_delta(self, generation, World, Populations):
+        cells = {}
+        for (location, cell) in self._world_cells(World):
+            snapshot = _snapshot(cell)
+            if self.cells.get(location) != snapshot:
+                cells[location] = _cell_bytes(cell)
+                self.cells[location] = snapshot
+        record = {'kind': 'delta', 'generation': generation,
+                  'previous': self.previous, 'cells': cells,
+                  'populations': {}}
+        populations = {}
+        for pop_name in Populations:
+            population = Populations[pop_name]
+            (previous_shell, previous_states) = \
+                self.populations.get(pop_name, (None, {}))
+            new = {}
+            changed = {}
+            states = {}
+            for organism in population.agents:
+                key = id(organism)
+                if key in states: continue
+                state = _organism_state(organism)
+                states[key] = state
+                previous = previous_states.get(key)
+                if previous is None or \
+                    len(previous['chromosomes']) != \
+                    len(state['chromosomes']):
+                    new[key] = _organism_data(organism)
+                    continue
+                change = {}
+                if previous['shell'] != state['shell']:
+                    change['shell'] = _organism_shell(organism)
+                if previous['status'] != state['status']:
+                    change['status'] = _dumps(organism.status)
+                mutated = dict([(i, _dumps(organism.genome[i]))
+                                for i in range(len(state['chromosomes']))
+                                if previous['chromosomes'][i] !=
+                                state['chromosomes'][i]])
+                if mutated: change['chromosomes'] = mutated
+                if change: changed[key] = change
+            shell = self._population_state(population)
+            population_shell = None
+            if shell != previous_shell:
+                population_shell = _population_shell(population)
+            record['populations'][pop_name] = \
+                {'shell': population_shell,
+                 'order': [id(organism) for organism in population.agents],
+                 'new': new, 'changed': changed}
+            populations[pop_name] = (shell, states)
+        self.populations = populations
+        filename = self._filename(generation, 'delta')
+        self._write(filename, record)
+        self.deltas = self.deltas + 1
+        self.previous = generation
+        return filename
+
+def checkpoint_generations(prefix):
+    '''
+    Lists the checkpoints written with a file name prefix.
+
+    @param prefix: file name prefix of checkpoint files
+    @return: list of (generation, kind, file name) in the order of
+    generation, where kind is 'base' or 'delta'
+    '''
+    checkpoints = []
+    for filename in glob.glob(glob.escape(prefix) + '_gen*.ckpt'):
+        name = filename[len(prefix) + len('_gen'):-len('.ckpt')]
+        (generation, kind) = name.rsplit('.', 1)
+        if generation.isdigit() and kind in ('base', 'delta'):
+            checkpoints.append((int(generation), kind, filename))
+    checkpoints.sort()
+    return checkpoints
+
+def restore_delta_checkpoint(prefix, generation=None):
+    '''
+    Restores the World and populations of a checkpointed generation by
+    loading the last base snapshot at or before the generation and
+    replaying the deltas up to the generation.
+
+    @param prefix: file name prefix of checkpoint files
+    @param generation: generation to restore. Default = None (the last
+    checkpointed generation).
+    @return: (generation, World, Populations)
+    '''
+    checkpoints = checkpoint_generations(prefix)
+    if generation is None and checkpoints: generation = checkpoints[-1][0]
+    checkpoints = [checkpoint for checkpoint in checkpoints
+                   if checkpoint[0] <= generation]
+    bases = [i for i in range(len(checkpoints))
+             if checkpoints[i][1] == 'base']
+    if not checkpoints or checkpoints[-1][0] != generation or not bases:
+        raise ValueError('No checkpoint of generation ' + str(generation))
+    records = []
+    for (_, _, filename) in checkpoints[bases[-1]:]:
+        f = open(filename, 'rb')
+        records.append(pickle.load(f))
+        f.close()
+    base = records[0]
+    World = pickle.loads(base['world'])
+    populations = {}
+    for pop_name in base['populations']:
+        data = base['populations'][pop_name]
+        organisms = dict([(key, [state[0], state[1], list(state[2])])
+                          for (key, state) in data['organisms'].items()])
+        populations[pop_name] = [data['shell'], data['order'], organisms]
+    for record in records[1:]:
+        for ((x, y, z), data) in record['cells'].items():
+            World.ecosystem[x][y][z] = pickle.loads(data)
+        restored = {}
+        for pop_name in record['populations']:
+            data = record['populations'][pop_name]
+            (shell, order, organisms) = \
+                populations.get(pop_name, [None, [], {}])
+            if data['shell'] is not None: shell = data['shell']
+            current = {}
+            for key in data['order']:
+                if key in current: continue
+                if key in data['new']:
+                    state = data['new'][key]
+                    current[key] = [state[0], state[1], list(state[2])]
+                    continue
+                state = list(organisms[key])
+                state[2] = list(state[2])
+                change = data['changed'].get(key, {})
+                if 'shell' in change: state[0] = change['shell']
+                if 'status' in change: state[1] = change['status']
+                for (i, chromosome) in \
+                    change.get('chromosomes', {}).items():
+                    state[2][i] = chromosome
+                current[key] = state
+            restored[pop_name] = [shell, data['order'], current]
+        populations = restored
+    Populations = {}
+    for pop_name in populations:
+        (shell, order, organisms) = populations[pop_name]
+        population = pickle.loads(shell)
+        built = {}
+        agents = []
+        for key in order:
+            if key not in built:
+                state = organisms[key]
+                organism = pickle.loads(state[0])
+                organism.status = pickle.loads(state[1])
+                organism.genome = [pickle.loads(chromosome)
+                                   for chromosome in state[2]]
+                built[key] = organism
+            agents.append(built[key])
+        population.agents = agents
+        Populations[pop_name] = population
+    return (generation, World, Populations)
+
+checkpoint_magic = b'DOSE CHECKPOINT\n'
+checkpoint_format = 1
+
+def random_state():
+    '''
+    Gives the states of the random number generators - random module and,
+    if installed, NumPy.
+
+    @return: dictionary of random number generator states
+    '''
+    state = {'random': random.getstate()}
+    if numpy is not None: state['numpy'] = numpy.random.get_state()
+    return state
+
+def set_random_state(state):
+    '''
+    Restores the states of the random number generators (see
+    random_state).
+
+    @param state: dictionary of random number generator states
+    '''
+    random.setstate(state['random'])
+    if numpy is not None and 'numpy' in state:
+        numpy.random.set_state(state['numpy'])
+
+def file_sizes(filenames):
+    '''
+    Gives the sizes of files, such as the simulation result files at a
+    checkpoint. Files which do not exist are left out.
+
+    @param filenames: list of file names
+    @return: dictionary of file sizes with file name as key
+    '''
+    return dict([(filename, os.path.getsize(filename))
+                 for filename in filenames if os.path.exists(filename)])
+
+def truncate_files(sizes):
+    '''
+    Truncates files to their sizes recorded at a checkpoint (see
+    file_sizes), removing data written after the checkpoint. Files which
+    are shorter than their recorded sizes, or do not exist, are left
+    unchanged.
+
+    @param sizes: dictionary of file sizes with file name as key
+    '''
+    for filename in sizes:
+        if os.path.exists(filename) and \
+            os.path.getsize(filename) > sizes[filename]:
+            f = open(filename, 'r+b')
+            try:
+                f.truncate(sizes[filename])
+            finally:
+                f.close()
+
+def write_atomic(filename, data):
+    '''
+    Writes data into a file atomically - data is written into a temporary
+    file in the same directory, flushed to disk, then renamed to the file
+    name.
+
+    @param filename: file name
+    @param data: bytes to write
+    '''
+    temporary = filename + '.tmp'
+    f = open(temporary, 'wb')
+    try:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    finally:
+        f.close()
+    os.replace(temporary, filename)
+
+def checkpoint_data(generation, sim_parameters, Populations, World,
+                    state=None, files=()):
+    '''
+    Serializes a simulation checkpoint. The checkpoint starts with
+    checkpoint_magic, followed by a pickled dictionary of format (format
+    version), generation, time (UTC time of checkpoint), random_state (see
+    random_state), parameters (simulation parameters without
+    "deployment_scheme", which is a simulation function), world,
+    populations and files (see file_sizes).
+
+    @param generation: generation count
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param Populations: dictionary of population objects
+    @param World: dose_world.World object
+    @param state: states of the random number generators (see
+    random_state). Default = None (the current states).
+    @param files: file names of simulation result files, whose sizes are
+    recorded. Default = () (no file).
+    @return: checkpoint as bytes
+    '''
+    if state is None: state = random_state()
+    parameters = dict([(key, sim_parameters[key]) for key in sim_parameters
+                       if key != 'deployment_scheme'])
+    record = {'format': checkpoint_format,
+              'generation': generation,
+              'time': str(datetime.utcnow()),
+              'random_state': state,
+              'parameters': parameters,
+              'world': World,
+              'populations': Populations,
+              'files': file_sizes(files)}
+    return checkpoint_magic + pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+
+def save_checkpoint(filename, generation, sim_parameters, Populations,
+                    World, writer=None, files=()):
+    '''
+    Writes a simulation checkpoint (see checkpoint_data) atomically (see
+    write_atomic), replacing the previous checkpoint of the same file
+    name. With a background writer, a snapshot of the World and
+    populations (see background_writer.snapshot_world and
+    background_writer.snapshot_population) is serialized and written by
+    the writer; hence, the simulation can continue while the checkpoint
+    is written. The sizes of files are taken when the checkpoint is
+    serialized - after the writes submitted before the checkpoint.
+
+    @param filename: file name of checkpoint
+    @param generation: generation count
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param Populations: dictionary of population objects
+    @param World: dose_world.World object
+    @param writer: background_writer.BackgroundWriter object to write the
+    file. Default = None (file is written directly).
+    @param files: file names of simulation result files, whose sizes are
+    recorded. Default = () (no file).
+    '''
+    if writer is None:
+        write_atomic(filename, checkpoint_data(generation, sim_parameters,
+                                               Populations, World,
+                                               files=files))
+        return
+    from .background_writer import snapshot_population, snapshot_world
+    Populations = dict([(pop_name, snapshot_population(Populations[pop_name]))
+                        for pop_name in Populations])
+    writer.submit(write_checkpoint, filename, generation,
+                  dict(sim_parameters), Populations,
+                  snapshot_world(World), random_state(), list(files))
+
+def write_checkpoint(filename, generation, sim_parameters, Populations,
+                     World, state, files=()):
+    '''
+    Serializes and writes a simulation checkpoint (see checkpoint_data and
+    write_atomic), such as in a background writer.
+
+    @param filename: file name of checkpoint
+    @param generation: generation count
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param Populations: dictionary of population objects
+    @param World: dose_world.World object
+    @param state: states of the random number generators
+    @param files: file names of simulation result files, whose sizes are
+    recorded. Default = () (no file).
+    '''
+    write_atomic(filename, checkpoint_data(generation, sim_parameters,
+                                           Populations, World, state,
+                                           files))
+
+def load_checkpoint(filename):
+    '''
+    Reads a simulation checkpoint written by save_checkpoint.
+
+    @param filename: file name of checkpoint
+    @return: dictionary of checkpoint (see checkpoint_data)
+    '''
+    f = open(filename, 'rb')
+    try:
+        if f.read(len(checkpoint_magic)) != checkpoint_magic:
+            raise ValueError('Not a DOSE checkpoint file: ' + str(filename))
+        record = pickle.load(f)
+    finally:
+        f.close()
+    if record.get('format', 0) > checkpoint_format:
+        raise ValueError('Unsupported checkpoint format: ' + \
+                         str(record.get('format')))
+    return record
@@ -6,7 +6,7 @@ Date created: 10th October 2013
 import os, copy, ast
 import sqlite3 as s
 
-def connect_database(dbpath, sim_parameters=None):
+def connect_database(dbpath, sim_parameters=None, check_same_thread=True):
     '''
     Connects to logging database and prepares database for use, if
     database does not exist. This function can be used to connect to the 
@@ -25,6 +25,9 @@ def connect_database(dbpath, sim_parameters=None):
     be used when sim_parameters == None.
     @param sim_parameters: Dictionary of simulation parameters. Default is 
     None.
+    @param check_same_thread: if False, the connection can be used by 
+    another thread, such as the background writer (see 
+    background_writer). Default is True.
     @return: (con, cur) where 
         - con = connector
         - cur = cursor
@@ -33,7 +36,7 @@ def connect_database(dbpath, sim_parameters=None):
         dbpath = os.sep.join([os.getcwd(), 
                               'Simulations', 
                               sim_parameters["database_file"]])
-    con = s.connect(dbpath)
+    con = s.connect(dbpath, check_same_thread=check_same_thread)
     cur = con.cursor()
     cur.execute('''
         create table if not exists parameters
@@ -141,6 +144,76 @@ def db_report(con, cur, sim_functions, start_time,
     con.commit()
     return (con, cur)
 
+def db_delete_generations(con, cur, start_time, generation):
+    '''
+    Function to delete logged data of generations after a generation 
+    within a simulation, identified by starting time of the simulation. 
+    This is used when a simulation is resumed from a checkpoint (see 
+    dose.resume) to remove data logged after the checkpoint.
+    
+    @param con: Database connector from connect_database() function. 
+    @param cur: Database cursor from connect_database() function.
+    @param start_time: Starting time of current simulation in the format 
+    of <date>-<seconds since epoch>; for example, 2013-10-11-1381480985.77.
+    @param generation: last generation to keep
+    @return: (con, cur) where 
+        - con = connector
+        - cur = cursor
+    '''
+    for table in ('organisms', 'world', 'miscellaneous'):
+        cur.execute("""delete from %s where start_time=? and 
+                    cast(generation as integer) > ?""" % table,
+                    (str(start_time), int(generation)))
+    con.commit()
+    return (con, cur)
+
+def db_delete_simulation(con, cur, start_time):
+    '''
+    Function to delete all logged data of a simulation, identified by 
+    starting time of the simulation. This is used to remove a simulation 
+    which was partly merged from another logging database (see 
+    db_merge_database and replicates.run_simulations) before merging it 
+    again.
+    
+    @param con: Database connector from connect_database() function. 
+    @param cur: Database cursor from connect_database() function.
+    @param start_time: Starting time of the simulation in the format 
+    of <date>-<seconds since epoch>; for example, 2013-10-11-1381480985.77.
+    @return: (con, cur) where 
+        - con = connector
+        - cur = cursor
+    '''
+    for table in ('parameters', 'organisms', 'world', 'miscellaneous'):
+        cur.execute("delete from %s where start_time=?" % table,
+                    (str(start_time),))
+    con.commit()
+    return (con, cur)
+
+def db_merge_database(con, cur, dbpath):
+    '''
+    Function to copy all logged simulations from another logging database 
+    into this logging database. This is used to gather simulations logged 
+    into separate databases (such as replicates of a simulation which are 
+    run concurrently, see replicates.run_replicates) into one logging 
+    database.
+    
+    @param con: Database connector from connect_database() function. 
+    @param cur: Database cursor from connect_database() function.
+    @param dbpath: File path of the logging database to copy from.
+    @return: (con, cur) where 
+        - con = connector
+        - cur = cursor
+    '''
+    cur.execute("attach database ? as source", (dbpath,))
+    try:
+        for table in ('parameters', 'organisms', 'world', 'miscellaneous'):
+            cur.execute("insert into main.%s select * from source.%s" 
+                        % (table, table))
+        con.commit()
+    finally:
+        cur.execute("detach database source")
+    return (con, cur)
+
 def db_list_simulations(cur, table='parameters'):
     '''
     Function to list simulations, identified by starting time of the 
@@ -546,7 +619,10 @@ def db_reconstruct_organisms(cur, start_time, population_name, generation):
     '''
     Function to reconstruct a list of organisms (genetic.Organism objects) 
     of a population within a simulation (as identified by the starting time 
-    of the simulation) at a specific generation.
+    of the simulation) at a specific generation. Organisms logged in 
+    clonal population mode (see dose.database_report_populations) are 
+    given a copy of the genome of the first organism of their group of 
+    clones.
     
     @param cur: Database cursor from connect_database() function.
     @param start_time: Starting time of current simulation in the format 
@@ -566,6 +642,7 @@ def db_reconstruct_organisms(cur, start_time, population_name, generation):
     (start_time, population_name, generation))
     names = [x[0] for x in cur.fetchall()]
     agents = [0] * len(names)
+    clones = {}
     for i in range(len(names)):
         org_name = str(names[i])
         org = g.Organism()
@@ -608,6 +685,8 @@ def db_reconstruct_organisms(cur, start_time, population_name, generation):
                 org.status['location'] = value
             elif key == 'death':
                 org.status['death'] = value
+            elif key == 'clone_of':
+                clones[i] = value
             elif key.startswith('chromosome'):
                 chr_position = key.split('_')[1]
                 sequence = [str(x) for x in str(value)]
@@ -627,6 +706,13 @@ def db_reconstruct_organisms(cur, start_time, population_name, generation):
                 try: org.status[key] = ast.literal_eval(value)
                 except: org.status[key] = value
         agents[i] = org
+    # organisms logged in clonal population mode take the genome of the 
+    # first organism of their group of clones
+    if clones:
+        genomes = dict([(str(org.status['identity']), org.genome) 
+                        for org in agents])
+        for i in clones:
+            agents[i].genome = copy.deepcopy(genomes[clones[i]])
     return agents
     
 def db_reconstruct_population(cur, start_time, 
@@ -0,0 +1,227 @@
+'''
+File containing diffusion, decay, and source / sink kernels which update a
+numeric field of all ecological cells of a World at once, to be used
+within dose.dose_functions.ecoregulate function. For example,
+
+    def ecoregulate(self, World):
+        dose.diffuse(World, 'food', 0.2)
+        dose.decay(World, 'food', 0.05)
+        dose.source_sink(World, 'food', {(0, 0, 0): 10.0})
+
+A field is a key of the ecological cells with a number as value in each
+cell; diffusion and decay give floats, so numeric fields of ArrayWorld
+must be float fields (ValueError is raised for integer fields, which
+would truncate the values). For array_world.ArrayWorld, numeric fields
+(see ArrayWorld.add_field) are updated in place as arrays (with NumPy
+operations if NumPy is used); for dose_world.World, the field is gathered
+from and stored into World.ecosystem once per kernel. Neighbours are given
+by a topology.Topology, which is World.topology() by default.
+
+Date created: 19th October 2026
+'''
+import array
+import numbers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_numpy_edges = {}
+
+def _array_field(World, field):
+    '''
+    Gives the array of a numeric field of an ArrayWorld, or None if the
+    field is not kept in an array.
+    '''
+    fields = getattr(World, 'fields', None)
+    if isinstance(fields, dict) and field in fields: return fields[field]
+    return None
+
+def _is_numpy(values):
+    return numpy is not None and isinstance(values, numpy.ndarray)
+
+def _is_integer_array(values):
+    '''
+    Checks whether the values of a field are kept in an integer array.
+    '''
+    if _is_numpy(values): return values.dtype.kind != 'f'
+    if isinstance(values, array.array): return values.typecode not in 'fd'
+    return False
+
+def _require_float_field(values, field):
+    '''
+    Raises ValueError if the values of a field are kept in an integer
+    array, which cannot hold the results of a kernel.
+    '''
+    if _is_integer_array(values):
+        raise ValueError('Field ' + str(field) + ' is an integer array ' + \
+                         'field; use a float field (see ' + \
+                         'ArrayWorld.add_field)')
+
+def field_values(World, field):
+    '''
+    Gives the values of a field of all ecological cells, in the order of
+    cell numbers (see topology.Topology.cell_index).
+
+    @param World: dose_world.World or array_world.ArrayWorld object
+    @param field: field name (key of ecological cells)
+    @return: list of values (or array of a numeric field of ArrayWorld)
+    '''
+    values = _array_field(World, field)
+    if values is not None: return values
+    return [World.ecosystem[x][y][z][field]
+            for x in range(World.world_x)
+            for y in range(World.world_y)
+            for z in range(World.world_z)]
+
+def store_field(World, field, values):
+    '''
+    Stores the values of a field of all ecological cells, given in the
+    order of cell numbers (see topology.Topology.cell_index).
+
+    @param World: dose_world.World or array_world.ArrayWorld object
+    @param field: field name (key of ecological cells)
+    @param values: list or array of values
+    '''
+    array_values = _array_field(World, field)
+    if array_values is not None:
+        if array_values is values: return
+        if _is_numpy(array_values): array_values[:] = values
+        else: array_values[:] = array.array(array_values.typecode, values)
+        return
+    index = 0
+    for x in range(World.world_x):
+        for y in range(World.world_y):
+            for z in range(World.world_z):
+                World.ecosystem[x][y][z][field] = values[index]
+                index = index + 1
+
+def _edge_arrays(topology):
+    '''
+    Gives the edges of a topology (see topology.Topology.edges) and the
+    number of neighbours of each cell as NumPy arrays.
+    '''
+    key = id(topology)
+    if key not in _numpy_edges or _numpy_edges[key][0] is not topology:
+        (sources, targets) = topology.edges()
+        degrees = numpy.array([len(neighbours)
+                               for neighbours in topology.neighbour_indices],
+                              dtype=numpy.float64)
+        _numpy_edges[key] = (topology,
+                             numpy.array(sources, dtype=numpy.intp),
+                             numpy.array(targets, dtype=numpy.intp),
+                             degrees)
+    return _numpy_edges[key][1:]
+
+def diffuse(World, field, rate, topology=None):
+    '''
+    Diffusion kernel - each ecological cell gives a proportion (rate) of
+    its value of a field, shared equally among its neighbours. The total
+    of the field over the world is conserved; cells without neighbours
+    keep their values. Integer array fields are not accepted.
+
+    @param World: dose_world.World or array_world.ArrayWorld object
+    @param field: field name (key of ecological cells)
+    @param rate: proportion of the value given to neighbours, from 0 to 1
+    @param topology: topology.Topology object. Default = None
+    (World.topology()).
+    @return: values of the field after diffusion
+    '''
+    if topology is None: topology = World.topology()
+    rate = float(rate)
+    values = field_values(World, field)
+    if len(values) != len(topology):
+        raise ValueError('Topology does not match the size of the World')
+    _require_float_field(values, field)
+    if _is_numpy(values):
+        (sources, targets, degrees) = _edge_arrays(topology)
+        current = values.astype(numpy.float64)
+        given = numpy.where(degrees > 0, current * rate, 0.0)
+        share = numpy.zeros(len(current))
+        numpy.divide(given, degrees, out=share, where=degrees > 0)
+        result = current - given
+        numpy.add.at(result, targets, share[sources])
+    else:
+        result = [float(value) for value in values]
+        for (cell, neighbours) in enumerate(topology.neighbour_indices):
+            if not neighbours: continue
+            given = float(values[cell]) * rate
+            result[cell] = result[cell] - given
+            share = given / len(neighbours)
+            for neighbour in neighbours:
+                result[neighbour] = result[neighbour] + share
+    store_field(World, field, result)
+    return field_values(World, field)
+
+def decay(World, field, rate):
+    '''
+    Decay kernel - the value of a field in every ecological cell is
+    reduced by a proportion (rate). Integer array fields are not
+    accepted.
+
+    @param World: dose_world.World or array_world.ArrayWorld object
+    @param field: field name (key of ecological cells)
+    @param rate: proportion lost, from 0 to 1
+    @return: values of the field after decay
+    '''
+    keep = 1.0 - float(rate)
+    values = field_values(World, field)
+    _require_float_field(values, field)
+    if _is_numpy(values):
+        values *= keep
+    else:
+        store_field(World, field, [float(value) * keep for value in values])
+    return field_values(World, field)
+
+def source_sink(World, field, amounts, minimum=None):
+    '''
+    Source / sink kernel - adds an amount to the value of a field in
+    ecological cells (sources); negative amounts are removed (sinks).
+    Integer array fields accept only integer amounts.
+
+    @param World: dose_world.World or array_world.ArrayWorld object
+    @param field: field name (key of ecological cells)
+    @param amounts: amount - a number (including NumPy numbers) for all
+    cells, a dictionary of amounts with location (x,y,z) as key, or a list
+    of amounts in the order of cell numbers (see
+    topology.Topology.cell_index)
+    @param minimum: lowest value of the field after sinks, such as 0.
+    Default = None (no lowest value).
+    @return: values of the field after adding the amounts
+    '''
+    values = field_values(World, field)
+    size = len(values)
+    if isinstance(amounts, dict):
+        (world_y, world_z) = (World.world_y, World.world_z)
+        changes = [((x * world_y + y) * world_z + z, amounts[(x, y, z)])
+                   for (x, y, z) in amounts]
+    elif isinstance(amounts, numbers.Number):
+        changes = None
+    else:
+        amounts = list(amounts)
+        if len(amounts) != size:
+            raise ValueError('Amounts do not match the size of the World')
+        changes = list(enumerate(amounts))
+    if _is_integer_array(values):
+        if changes is None: given = [amounts]
+        else: given = [amount for (cell, amount) in changes]
+        if not all([isinstance(amount, numbers.Integral)
+                    for amount in given]):
+            raise ValueError('Field ' + str(field) + ' is an integer ' + \
+                             'array field; amounts must be integers')
+    if _is_numpy(values):
+        if changes is None:
+            values += amounts
+        else:
+            for (cell, amount) in changes: values[cell] += amount
+        if minimum is not None: numpy.maximum(values, minimum, out=values)
+        return field_values(World, field)
+    result = list(values)
+    if changes is None: changes = [(cell, amounts) for cell in range(size)]
+    for (cell, amount) in changes:
+        result[cell] = result[cell] + amount
+    if minimum is not None:
+        result = [max(value, minimum) for value in result]
+    store_field(World, field, result)
+    return field_values(World, field)
@@ -7,11 +7,14 @@ this file can be assessed at top level.
 
 Date created: 27th September 2013
 '''
-import sys, os, random, inspect
+import sys, os, random, inspect, glob
 
+from . import array_world
+from . import checkpoint
 from . import database_calls
 from . import dose_world
 from . import genetic
+from . import population_index
 from . import ragaraja
 from . import register_machine
 from . import simulation_calls
@@ -23,6 +26,7 @@ from .simulation_calls import deploy_populations
 from .simulation_calls import excavate_world
 from .simulation_calls import file_preparation
 from .simulation_calls import ragaraja_activation
+from .simulation_calls import resume_simulator
 from .simulation_calls import save_script
 from .simulation_calls import sequential_simulator
 from .simulation_calls import simulate_one_cycle
@@ -50,6 +54,22 @@ class dose_functions():
     
     Please see the examples in examples directory on its use.
     '''
+    # number of worker processes to evaluate organism_fitness function; 
+    # 1 evaluates sequentially in the simulation process, and a process 
+    # pool is only used if this is more than 1 or None (number of CPUs)
+    fitness_processes = 1
+    # keys of Organism.status which matter to organism_fitness function; 
+    # an organism is evaluated again only if its genome or these status 
+    # had changed since its last evaluation
+    fitness_status_keys = ()
+    # if True, update_ecology and update_local functions are double-buffered 
+    # (see cell_update): each function reads the ecosystem as it was before 
+    # the update and may only change its own ecological cell
+    eco_cell_buffering = False
+    # number of worker processes for double-buffered update_ecology and 
+    # update_local functions; None uses the number of CPUs
+    eco_cell_processes = 1
+    
     def mutation_scheme(self, organism):
         '''
         Method / function to trigger mutational events in each chromosome 
@@ -87,6 +107,39 @@ class dose_functions():
         @param pop_name: Name of the population which is used as key in 
         the the dictionary (Populations parameter).
         @return: None
+        
+        This function is called for every population before mating and 
+        after generational events in each generation, and all organisms 
+        are scored each time; implement organism_fitness instead to 
+        evaluate only the organisms which had changed.
+        '''
+        raise NotImplementedError
+    def organism_fitness(self, genome, status):
+        '''
+        Optional method / function to calculate the fitness score of one 
+        organism. This function works at the level of individual 
+        organisms. If this function is over-ridden, DOSE will use it in 
+        place of fitness function; evaluating the organisms of each 
+        population sequentially or, if fitness_processes is more than 1 
+        or None, in a process pool of fitness_processes worker processes 
+        (see fitness.parallel_fitness) and storing the fitness scores in 
+        Organism.status['fitness'] in the order of the organisms.
+        
+        Only the genome and status of the organism are given to this 
+        function, which is executed in a worker process; hence, changes 
+        to the genome, status, or other attributes of this object will 
+        not be seen by the simulation.
+        
+        Organisms whose genome and status in fitness_status_keys had not 
+        changed since their last evaluation are not evaluated again (see 
+        genetic.Organism.fitness_dirty). The number of evaluations made 
+        and skipped in each generation is kept in 
+        Population.fitness_evaluations.
+        
+        @param genome: list of genetic.Chromosome objects of the organism
+        @param status: status dictionary of the organism
+        @return: fitness score
+        @since: version 1.1
         '''
         raise NotImplementedError
     def mating(self, Populations, pop_name):
@@ -105,6 +158,11 @@ class dose_functions():
             - (optional) store identity of parent(s) as list; for example, 
             [parentA identity, parentB identity], in offspring's 
             status['parents'] for ancestral tracing.
+            - (optional) if "lineage_tracking" in simulation parameters 
+            is True, register each offspring in the lineage registry by 
+            Populations[pop_name].lineage.register_organism(offspring, 
+            [parentA, parentB]), which names the offspring and records 
+            its parents for fast ancestry and descendant queries.
         
         @param Populations: A dictionary containing one or more populations 
         where the value is a genetic.Population object.
@@ -398,6 +456,10 @@ def database_report_populations(con, cur, start_time,
         delimited by '|'. For example, (2, 3, 4) ==> 2|3|4
         - Each chromosome in Organism.genome is a list of bases. These bases 
         are concatenated with no delimiter. For example, [1, 2, 3] ==> 123
+        - In clonal population mode (see genetic.Population.clonal), the 
+        chromosomes are logged only for the first organism of each group 
+        of clones; the other organisms of the group are logged with the 
+        name of the first organism (key = "clone_of") instead.
     
     @param con: Database connector. See Python DB-API for details.
     @param cur: Database cursor. See Python DB-API for details.
@@ -411,6 +473,13 @@ def database_report_populations(con, cur, start_time,
     '''
     generation = str(generation_count)
     for pop_name in list(Populations.keys()):
+        # in clonal population mode, the genome of each group of clones 
+        # is logged once with the first organism of the group
+        clone_of = {}
+        if getattr(Populations[pop_name], 'clonal', False):
+            for group in Populations[pop_name].genome_groups():
+                for org in group[1:]:
+                    clone_of[id(org)] = str(group[0].status['identity'])
         for org in Populations[pop_name].agents:
             org_name = str(org.status['identity'])
             # log each item in Organism.status dictionary
@@ -428,6 +497,11 @@ def database_report_populations(con, cur, start_time,
                 cur.execute('insert into organisms values (?,?,?,?,?,?)', 
                     (str(start_time), str(pop_name), org_name, 
                      generation, key, value))
+            if id(org) in clone_of:
+                cur.execute('insert into organisms values (?,?,?,?,?,?)', 
+                    (str(start_time), str(pop_name), org_name, 
+                     generation, 'clone_of', clone_of[id(org)]))
+                continue
             # log each chromosome sequence
             for chromosome_count in range(len(org.genome)):
                 key = 'chromosome_' + str(chromosome_count)
@@ -484,9 +558,17 @@ def filter_deme(deme_name, agents):
     
     @param deme_name: Name of deme (sub-population name)
     @type deme_name: string
-    @param agents: A list of organisms, such as Population.agents.
+    @param agents: A list of organisms, such as Population.agents, which 
+    is looked up from the index of the population (see 
+    genetic.Population.index) instead of being scanned. On the first 
+    look up, the status dictionary of each organism in the population 
+    is replaced by a population_index.TrackedStatus to keep the index 
+    updated.
     @return: List of Organism objects
     '''
+    index = population_index.agent_index(agents, 'deme', 
+                                         population_index.upper_key)
+    if index is not None: return index.lookup(deme_name.upper())
     extract = [individual for individual in agents
                if individual.status['deme'].upper() == deme_name.upper()]
     return extract
@@ -499,9 +581,17 @@ def filter_gender(gender, agents):
     
     @param gender: Gender 
     @type gender: string
-    @param agents: A list of organisms, such as Population.agents.
+    @param agents: A list of organisms, such as Population.agents, which 
+    is looked up from the index of the population (see 
+    genetic.Population.index) instead of being scanned. On the first 
+    look up, the status dictionary of each organism in the population 
+    is replaced by a population_index.TrackedStatus to keep the index 
+    updated.
     @return: List of Organism objects
     '''
+    index = population_index.agent_index(agents, 'gender', 
+                                         population_index.upper_key)
+    if index is not None: return index.lookup(gender.upper())
     extract = [individual for individual in agents
                if individual.status['gender'].upper() == gender.upper()]
     return extract
@@ -532,9 +622,16 @@ def filter_location(location, agents):
     
     @param location: (x, y, z) coordinates within the World.ecosystem
     @param location: tuple
-    @param agents: A list of organisms, such as Population.agents.
+    @param agents: A list of organisms, such as Population.agents, which 
+    is looked up from the index of the population (see 
+    genetic.Population.index) instead of being scanned. On the first 
+    look up, the status dictionary of each organism in the population 
+    is replaced by a population_index.TrackedStatus to keep the index 
+    updated.
     @return: List of Organism objects
     '''
+    index = population_index.agent_index(agents, 'location')
+    if index is not None: return index.lookup(location)
     extract = [individual for individual in agents
                if individual.status['location'] == location]
     return extract
@@ -674,11 +771,54 @@ def revive_simulation(rev_parameters, sim_functions):
     print('\nSimulation ended...')
     return (sim_functions, sim_parameters, Populations, World)
 
+def resume(checkpoint_file, sim_functions, maximum_generations=None):
+    '''
+    Function to resume a simulation (such as a crashed simulation) from 
+    its last simulation checkpoint, which is written every 
+    "checkpoint_frequency" generations (see 
+    simulation_calls.checkpoint_simulation). The World, populations, 
+    simulation parameters and random number generators are restored from 
+    the checkpoint, without rebuilding from the logging database; data 
+    logged after the checkpoint is deleted from the logging database, and 
+    the simulation continues in the same simulation file directory.
+    
+    @param checkpoint_file: file name of simulation checkpoint, or the 
+    simulation file directory containing the checkpoint
+    @param sim_functions: A class inherited from dose.dose_functions
+    class to implement all the needed simulation functions.
+    @param maximum_generations: last generation count to simulate. 
+    Default = None ("maximum_generations" in simulation parameters).
+    '''
+    if os.path.isdir(checkpoint_file):
+        checkpoint_files = glob.glob(os.path.join(checkpoint_file, 
+                                                  '*.checkpoint'))
+        if not checkpoint_files:
+            raise IOError('No checkpoint in ' + str(checkpoint_file))
+        checkpoint_file = max(checkpoint_files, key=os.path.getmtime)
+    print('Loading simulation checkpoint: ' + checkpoint_file + '...')
+    record = checkpoint.load_checkpoint(checkpoint_file)
+    print('\n[' + record['parameters']["simulation_name"].upper() + \
+        ' RESUMED SIMULATION]')
+    (sim_functions, sim_parameters, Populations, World) = \
+        resume_simulator(sim_functions, record, maximum_generations)
+    print('\nSimulation ended...')
+    return (sim_functions, sim_parameters, Populations, World)
+
 def simulate(sim_parameters, sim_functions):
     '''
     Function called by simulation to run the actual simulation based on a 
     set of parameters and functions.
     
+    If "world_backend" in simulation parameters is 'array', the World 
+    is an array_world.ArrayWorld (numeric fields of ecological cells are 
+    kept in arrays); otherwise, the World is a dose_world.World. For the 
+    array backend, "world_fields" and "world_vector_fields" in simulation 
+    parameters give the numeric fields and vector fields of the 
+    ecological cells (see array_world.ArrayWorld); for example, 
+    {'local_input': 10, 'local_output': 10} as "world_vector_fields" 
+    keeps 10 numbers of local_input and local_output of each ecological 
+    cell in arrays.
+    
     @param sim_parameters: Dictionary of simulation parameters
     @param sim_functions: A class inherited from dose.dose_functions
     class to implement all the needed simulation functions.
@@ -692,9 +832,17 @@ def simulate(sim_parameters, sim_functions):
     print('Adding deployment scheme to simulation parameters...')
     sim_parameters["deployment_scheme"] = sim_functions.deployment_scheme
     print('Constructing World entity...')
-    World = dose_world.World(sim_parameters["world_x"],
-                             sim_parameters["world_y"],
-                             sim_parameters["world_z"])
+    if sim_parameters.get("world_backend", "dict") == "array":
+        fields = sim_parameters.get("world_fields")
+        vector_fields = sim_parameters.get("world_vector_fields")
+        World = array_world.ArrayWorld(sim_parameters["world_x"],
+                                       sim_parameters["world_y"],
+                                       sim_parameters["world_z"],
+                                       fields, vector_fields)
+    else:
+        World = dose_world.World(sim_parameters["world_x"],
+                                 sim_parameters["world_y"],
+                                 sim_parameters["world_z"])
     print('Spawning populations...')
     Populations = spawn_populations(sim_parameters)
     print('\nStarting simulation on sequential ecological cell simulator...')
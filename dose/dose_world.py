@@ -8,6 +8,11 @@ Python Papers 7: 5.
 '''
 import copy
 
+try:
+    from .topology import world_topology
+except ImportError:
+    from topology import world_topology
+
 class World(object):
     '''
     Representation of a 3-dimensional ecological world.
@@ -67,6 +72,23 @@ class World(object):
                 eco_x[y] = copy.deepcopy(eco_y)
             self.ecosystem[x] = copy.deepcopy(eco_x)
     
+    def topology(self, neighbourhood='moore', boundary='bounded', 
+                 dimensions=2):
+        '''
+        Function to get the neighbourhood topology of the ecosystem, which 
+        is built once for each type of topology (see topology.Topology). 
+        The topology can be used to look up the neighbours of ecological 
+        cells; for example, World.topology().neighbours((x, y, z)).
+        
+        @param neighbourhood: 'moore' or 'von neumann'. Default = 'moore'.
+        @param boundary: 'bounded' or 'toroidal'. Default = 'bounded'.
+        @param dimensions: 2 (neighbours on the x-y plane) or 3. 
+        Default = 2.
+        @return: topology.Topology object
+        '''
+        return world_topology(self.world_x, self.world_y, self.world_z,
+                              neighbourhood, boundary, dimensions)
+    
     def eco_burial(self, filename):
         '''
         Function to preserve the entire ecosystem.
@@ -0,0 +1,482 @@
+'''
+File containing support functions and classes for fitness evaluation of
+organisms, to be used within dose.dose_functions.fitness.
+
+Date created: 19th October 2026
+'''
+import multiprocessing
+
+def genome_hash(organism):
+    '''
+    Calculates a stable hash of the genome of an organism from the
+    fingerprints and lengths of its chromosomes (see
+    genetic.Chromosome.fingerprint). The hash is the same for identical
+    genomes across processes and simulation runs, and changes when any
+    chromosome is changed - by mutation or by changing the sequence in
+    place. As fingerprints are kept up to date by the chromosomal
+    sequences, the hash of an organism is calculated in constant time.
+
+    @param organism: genetic.Organism object
+    @return: hash as a hexadecimal string
+    '''
+    return '-'.join(['%x:%x' % (chromosome.fingerprint(),
+                                len(chromosome.sequence))
+                     for chromosome in organism.genome])
+
+class FitnessCache(object):
+    '''
+    Cache of fitness scores keyed on genome hash (see genome_hash) for
+    expensive fitness functions which depend only on the genome of the
+    organism, such as pairwise alignment to a set of known sequences. As
+    most organisms in a generation are unchanged clones of organisms in the
+    previous generation, most evaluations can be skipped.
+
+    A changed genome (by mutation, or by changing a chromosomal sequence
+    in place) has a different hash and will be evaluated anew; hence,
+    cached scores of changed genomes are never used. Cached scores of genomes which have not been seen for max_age
+    generations (such as genomes which had been mutated) are removed at
+    the start of each generation.
+
+    Usage within dose.dose_functions::
+
+        def alignment_fitness(organism):
+            chromosome = ''.join(organism.genome[0].sequence)
+            ...
+            return score
+
+        fitness_cache = dose.FitnessCache(alignment_fitness)
+
+        class simulation_functions(dose.dose_functions):
+            def fitness(self, Populations, pop_name):
+                fitness_cache.evaluate_population(Populations[pop_name].agents)
+    '''
+    def __init__(self, function, max_age=1):
+        '''
+        Sets up an empty fitness cache.
+
+        @param function: fitness function which takes an organism
+        (genetic.Organism object) and returns its fitness score.
+        @param max_age: number of generations to keep a cached score
+        after it was last used. Default = 1.
+        '''
+        self.function = function
+        self.max_age = int(max_age)
+        self.scores = {}
+        self.last_used = {}
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.history = []
+
+    def __len__(self):
+        return len(self.scores)
+
+    def new_generation(self, generation):
+        '''
+        Records the cache hit rate of the current generation and removes
+        cached scores which have not been used for max_age generations.
+        This is called by evaluate_population when the generation changes.
+
+        @param generation: generation count of the new generation.
+        '''
+        if self.generation is not None and (self.hits + self.misses) > 0:
+            self.history.append((self.generation, self.hits, self.misses))
+        self.generation = generation
+        self.hits = 0
+        self.misses = 0
+        if generation is None: return
+        expired = [key for key in self.last_used
+                   if generation - self.last_used[key] > self.max_age]
+        for key in expired:
+            del self.scores[key]
+            del self.last_used[key]
+
+    def evaluate(self, organism):
+        '''
+        Returns the fitness score of an organism, from the cache if the
+        genome had been evaluated.
+
+        @param organism: genetic.Organism object
+        @return: fitness score
+        '''
+        key = genome_hash(organism)
+        if key in self.scores:
+            self.hits = self.hits + 1
+            score = self.scores[key]
+        else:
+            self.misses = self.misses + 1
+            score = self.function(organism)
+            self.scores[key] = score
+        if self.generation is not None:
+            self.last_used[key] = self.generation
+        else:
+            self.last_used[key] = 0
+        return score
+
+    def evaluate_population(self, agents, generation=None):
+        '''
+        Evaluates the fitness score of each organism and stores it in
+        Organism.status['fitness'].
+
+        @param agents: list of organisms, such as Population.agents.
+        @param generation: current generation count. Default = None, which
+        uses Organism.status['generation'] of the first organism.
+        '''
+        if generation is None and len(agents) > 0:
+            generation = agents[0].status['generation']
+        if generation != self.generation:
+            self.new_generation(generation)
+        for organism in agents:
+            organism.status['fitness'] = self.evaluate(organism)
+
+    def hit_rate(self, generation=None):
+        '''
+        Returns the proportion of evaluations served from the cache.
+
+        @param generation: generation count. Default = None, which gives
+        the hit rate of the current generation.
+        @return: hit rate between 0 and 1, or None if no evaluation was
+        done in the generation
+        '''
+        if generation is None or generation == self.generation:
+            (hits, misses) = (self.hits, self.misses)
+        else:
+            records = [(h, m) for (g, h, m) in self.history
+                       if g == generation]
+            if not records: return None
+            (hits, misses) = records[-1]
+        if hits + misses == 0: return None
+        return float(hits) / (hits + misses)
+
+    def report(self):
+        '''
+        Reports cache usage of every generation, including the current
+        generation.
+
+        @return: list of (generation count, number of evaluations, number
+        of cache hits, cache hit rate)
+        '''
+        records = list(self.history)
+        if (self.hits + self.misses) > 0:
+            records.append((self.generation, self.hits, self.misses))
+        return [(g, h + m, h, float(h) / (h + m)) for (g, h, m) in records]
+
+# process pool for parallel fitness evaluation, which is kept across
+# generations and re-created only when the fitness function or the number
+# of processes changes
+_pool = None
+_pool_key = None
+_worker_function = None
+
+def _fitness_initializer(function):
+    '''
+    Sets the fitness function in each worker process of the pool.
+    '''
+    global _worker_function
+    _worker_function = function
+
+def _fitness_worker(item):
+    '''
+    Calculates the fitness score of one organism in a worker process.
+
+    @param item: tuple of (genome, status) of the organism
+    @return: fitness score
+    '''
+    return _worker_function(item[0], item[1])
+
+def fitness_pool(function, processes=None):
+    '''
+    Returns the process pool for parallel fitness evaluation, creating it
+    if needed. The fitness function is given to each worker process once,
+    when the pool is created, instead of with each organism. Processes are
+    forked where the platform allows; otherwise, the simulation script must
+    be guarded by if __name__ == '__main__'.
+
+    @param function: fitness function which takes the genome (list of
+    genetic.Chromosome objects) and status dictionary of an organism, and
+    returns its fitness score.
+    @param processes: number of worker processes. Default = None, which
+    uses the number of CPUs.
+    @return: multiprocessing.Pool object
+    '''
+    global _pool, _pool_key
+    key = (function, processes)
+    if _pool is not None and _pool_key == key:
+        return _pool
+    close_fitness_pool()
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    _pool = context.Pool(processes, _fitness_initializer, (function,))
+    _pool_key = key
+    return _pool
+
+def close_fitness_pool():
+    '''
+    Terminates the process pool for parallel fitness evaluation, if any.
+    '''
+    global _pool, _pool_key
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+    _pool = None
+    _pool_key = None
+
+def parallel_fitness(function, agents, processes=None, chunksize=None):
+    '''
+    Evaluates the fitness score of each organism in a process pool and
+    stores it in Organism.status['fitness']. Only the genome and status of
+    each organism are sent to the worker processes, and the scores are
+    written back in the order of the organisms; hence, the results are the
+    same as sequential evaluation.
+
+    @param function: fitness function which takes the genome (list of
+    genetic.Chromosome objects) and status dictionary of an organism, and
+    returns its fitness score. The function must be picklable if processes
+    cannot be forked on the platform.
+    @param agents: list of organisms, such as Population.agents.
+    @param processes: number of worker processes. Default = None, which
+    uses the number of CPUs. If 1, the organisms will be evaluated
+    sequentially without a process pool.
+    @param chunksize: number of organisms sent to a worker process at a
+    time. Default = None, which divides the organisms into about 4 chunks
+    per worker process.
+    '''
+    if len(agents) == 0: return
+    if processes == 1:
+        for organism in agents:
+            organism.status['fitness'] = function(organism.genome,
+                                                  organism.status)
+        return
+    pool = fitness_pool(function, processes)
+    if chunksize is None:
+        workers = processes or multiprocessing.cpu_count()
+        chunksize = max(1, len(agents) // (workers * 4))
+    items = [(organism.genome, organism.status) for organism in agents]
+    scores = pool.map(_fitness_worker, items, chunksize)
+    for index in range(len(agents)):
+        agents[index].status['fitness'] = scores[index]
+
+def kmer_profile(sequence, k=4):
+    '''
+    Counts the k-mers (subsequences of length k) in a sequence.
+
+    @param sequence: sequence as a string or a list of bases
+    @param k: length of k-mer. Default = 4.
+    @return: dictionary of k-mer counts with k-mer (string) as key
+    '''
+    sequence = ''.join([str(base) for base in sequence])
+    profile = {}
+    for position in range(len(sequence) - k + 1):
+        kmer = sequence[position:position + k]
+        profile[kmer] = profile.get(kmer, 0) + 1
+    return profile
+
+class ReferenceIndex(object):
+    '''
+    Index of a set of reference sequences to speed up similarity-to-
+    reference fitness functions, such as the average alignment score of
+    a chromosome to a set of known sequences. The k-mer profiles of the
+    references are built once; each chromosome is then compared to every
+    reference by the proportion of shared k-mers, which is linear to the
+    length of the chromosome, and only the most similar references
+    (candidates) are aligned.
+
+    The trade-off between exactness and speed is set by the number of
+    candidates:
+        - candidates = None aligns every reference (exact).
+        - aggregate = 'max': the best alignment score among the top
+          candidates by k-mer similarity is used. This is a heuristic
+          top-k prefilter, not a bound: k-mer similarity does not bound
+          the alignment score, so the best matching reference may be
+          left out, and the score is then lower than the exact score.
+        - aggregate = 'mean': the candidates are spread across the ranking
+          of k-mer similarity, and alignment scores of the other
+          references are estimated from their k-mer similarity by linear
+          regression on the aligned candidates.
+    Agreement with exact scoring can be measured with agreement().
+
+    Usage::
+
+        aligner = Align.PairwiseAligner()
+        index = dose.ReferenceIndex(known_sequences, aligner.score, k=4,
+                                    candidates=10)
+
+        def alignment_fitness(organism):
+            return index.score(organism.genome[0].sequence)
+    '''
+    def __init__(self, references, scorer=None, k=4, candidates=None,
+                 aggregate='mean'):
+        '''
+        Builds the k-mer profiles of the reference sequences.
+
+        @param references: list of reference sequences (strings)
+        @param scorer: function which takes a sequence and a reference
+        sequence (both strings) and returns the alignment score. Default =
+        None, which uses the score function of Bio.Align.PairwiseAligner
+        in global mode (requires Biopython).
+        @param k: length of k-mer. Default = 4.
+        @param candidates: number of references to align (the most similar
+        references if aggregate is 'max').
+        Default = None, which aligns all references.
+        @param aggregate: method to combine the scores of a sequence to
+        each reference into one score; either 'mean' or 'max'. Default =
+        'mean'.
+        '''
+        if aggregate not in ('mean', 'max'):
+            raise ValueError('aggregate must be "mean" or "max"')
+        if scorer is None:
+            try:
+                from Bio import Align
+            except ImportError:
+                raise ImportError('Biopython is required if no scorer is given')
+            aligner = Align.PairwiseAligner()
+            aligner.mode = str('global')
+            scorer = aligner.score
+        self.references = [str(reference) for reference in references]
+        self.scorer = scorer
+        self.k = int(k)
+        self.candidates = candidates
+        self.aggregate = aggregate
+        self.profiles = [kmer_profile(reference, self.k)
+                         for reference in self.references]
+        self.sizes = [sum(profile.values()) for profile in self.profiles]
+        self.alignments = 0
+        self.skipped = 0
+
+    def similarity(self, sequence):
+        '''
+        Calculates the k-mer similarity of a sequence to each reference,
+        as the number of shared k-mers over the number of k-mers in the
+        larger of the sequence or reference.
+
+        @param sequence: sequence as a string or a list of bases
+        @return: list of similarities (between 0 and 1) in the order of
+        the references
+        '''
+        profile = kmer_profile(sequence, self.k)
+        size = sum(profile.values())
+        similarities = []
+        for index in range(len(self.profiles)):
+            reference = self.profiles[index]
+            if len(profile) < len(reference):
+                shared = sum([min(count, reference.get(kmer, 0))
+                              for (kmer, count) in profile.items()])
+            else:
+                shared = sum([min(count, profile.get(kmer, 0))
+                              for (kmer, count) in reference.items()])
+            total = max(size, self.sizes[index])
+            if total == 0: similarities.append(0.0)
+            else: similarities.append(float(shared) / total)
+        return similarities
+
+    def exact_score(self, sequence):
+        '''
+        Aligns a sequence to every reference.
+
+        @param sequence: sequence as a string or a list of bases
+        @return: aggregated alignment score
+        '''
+        sequence = ''.join([str(base) for base in sequence])
+        scores = [self.scorer(sequence, reference)
+                  for reference in self.references]
+        self.alignments = self.alignments + len(scores)
+        return self._aggregate(scores)
+
+    def _aggregate(self, scores):
+        if self.aggregate == 'max': return max(scores)
+        return float(sum(scores)) / len(scores)
+
+    def score(self, sequence):
+        '''
+        Scores a sequence against the references by aligning only the
+        candidate references chosen by k-mer similarity (see class
+        description).
+
+        @param sequence: sequence as a string or a list of bases
+        @return: aggregated alignment score (exact or approximate)
+        '''
+        if self.candidates is None or \
+            self.candidates >= len(self.references):
+            return self.exact_score(sequence)
+        sequence = ''.join([str(base) for base in sequence])
+        similarities = self.similarity(sequence)
+        ranking = sorted(range(len(self.references)),
+                         key=lambda index: similarities[index],
+                         reverse=True)
+        count = max(1, int(self.candidates))
+        if self.aggregate == 'max':
+            chosen = ranking[:count]
+        else:
+            # references to align are spread evenly across the ranking so
+            # that the regression covers the range of similarities
+            step = float(len(ranking) - 1) / max(1, count - 1)
+            chosen = sorted(set([ranking[int(round(i * step))]
+                                 for i in range(count)]))
+        scores = [self.scorer(sequence, self.references[index])
+                  for index in chosen]
+        self.alignments = self.alignments + len(chosen)
+        self.skipped = self.skipped + len(self.references) - len(chosen)
+        if self.aggregate == 'max':
+            return max(scores)
+        # estimate scores of references which are not aligned by linear
+        # regression of alignment score on k-mer similarity
+        x = [similarities[index] for index in chosen]
+        mean_x = float(sum(x)) / len(x)
+        mean_y = float(sum(scores)) / len(scores)
+        variance = sum([(value - mean_x) ** 2 for value in x])
+        if variance > 0:
+            slope = sum([(x[i] - mean_x) * (scores[i] - mean_y)
+                         for i in range(len(x))]) / variance
+        else:
+            slope = 0.0
+        estimates = [mean_y + slope * (similarities[index] - mean_x)
+                     for index in ranking if index not in chosen]
+        return self._aggregate(scores + estimates)
+
+    def agreement(self, sequences):
+        '''
+        Measures the agreement of scores from the index (see score) with
+        exact scores (see exact_score) for a sample of sequences, such as
+        the chromosomes of a sample of organisms.
+
+        @param sequences: list of sequences (strings or lists of bases)
+        @return: dictionary of 'mean_absolute_error',
+        'maximum_absolute_error', 'correlation' (Pearson's correlation
+        coefficient, or None if undefined), and 'rank_agreement'
+        (proportion of pairs of sequences which are ordered the same by
+        both scores)
+        '''
+        (alignments, skipped) = (self.alignments, self.skipped)
+        approximate = [self.score(sequence) for sequence in sequences]
+        exact = [self.exact_score(sequence) for sequence in sequences]
+        (self.alignments, self.skipped) = (alignments, skipped)
+        count = len(sequences)
+        errors = [abs(approximate[i] - exact[i]) for i in range(count)]
+        result = {'mean_absolute_error': float(sum(errors)) / count,
+                  'maximum_absolute_error': max(errors),
+                  'correlation': None,
+                  'rank_agreement': None}
+        mean_a = float(sum(approximate)) / count
+        mean_e = float(sum(exact)) / count
+        covariance = sum([(approximate[i] - mean_a) * (exact[i] - mean_e)
+                          for i in range(count)])
+        variance_a = sum([(value - mean_a) ** 2 for value in approximate])
+        variance_e = sum([(value - mean_e) ** 2 for value in exact])
+        if variance_a > 0 and variance_e > 0:
+            result['correlation'] = covariance / \
+                ((variance_a * variance_e) ** 0.5)
+        pairs = 0
+        concordant = 0
+        for i in range(count):
+            for j in range(i + 1, count):
+                pairs = pairs + 1
+                if (approximate[i] - approximate[j]) * \
+                    (exact[i] - exact[j]) > 0 or \
+                    (approximate[i] == approximate[j] and
+                     exact[i] == exact[j]):
+                    concordant = concordant + 1
+        if pairs > 0:
+            result['rank_agreement'] = float(concordant) / pairs
+        return result
@@ -7,8 +7,328 @@ Ling, MHT. 2010. A genetic algorithm framework grounded in biology.
 The Python Papers Source Codes 2: 6. 
 """
 import random, os, string
+from bisect import bisect_right
 from copy import deepcopy
 
+try:
+    from collections.abc import MutableMapping, MutableSequence
+except ImportError:
+    from collections import MutableMapping, MutableSequence
+
+try:
+    from .population_index import AgentIndex, AgentList, TrackedStatus
+    from .population_index import index_key, notify_watchers
+except ImportError:
+    # genetic imported as a top-level module (see database_calls)
+    from population_index import AgentIndex, AgentList, TrackedStatus
+    from population_index import index_key, notify_watchers
+
+name_characters = ('1', '2', '3', '4', '5', '6', '7',
+                   '8', '9', 'A', 'B', 'C', 'D', 'E',
+                   'F', 'G', 'H', 'I', 'J', 'K', 'L',
+                   'M', 'N', 'O', 'P', 'Q', 'R', 'S',
+                   'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
+                   'a', 'b', 'c', 'd', 'e', 'f', 'g',
+                   'h', 'i', 'j', 'k', 'l', 'm', 'n',
+                   'o', 'p', 'q', 'r', 's', 't', 'u',
+                   'v', 'w', 'x', 'y', 'z', '=', '#',
+                   '$', '%', '&', '@', '<', '>', '?')
+
+# modulus and radix of the rolling polynomial hash of chromosomal sequences 
+# (see Chromosome.fingerprint)
+fingerprint_modulus = (1 << 61) - 1
+fingerprint_radix = 1000003
+_fingerprint_powers = [1]
+_base_codes = {}
+
+def base_code(base):
+    """
+    Gives the code of a base for the rolling hash of chromosomal sequences, 
+    which is derived from the base as a string; hence, it is the same 
+    across processes and simulation runs (unlike the built-in hash 
+    function).
+
+    @param base: a base
+    @return: code of the base (positive integer)
+
+    @since: version 1.1
+    """
+    try:
+        return _base_codes[base]
+    except KeyError:
+        code = 0
+        for byte in bytearray(str(base).encode('utf-8')):
+            code = (code * 257 + byte + 1) % fingerprint_modulus
+        code = code + 1
+        _base_codes[base] = code
+        return code
+    except TypeError:
+        return base_code(str(base))
+
+def fingerprint_power(exponent):
+    """
+    Gives the power of the radix of the rolling hash, from a table which 
+    is extended as needed.
+
+    @param exponent: non-negative integer
+    @return: (radix ** exponent) modulo modulus
+
+    @since: version 1.1
+    """
+    powers = _fingerprint_powers
+    while len(powers) <= exponent:
+        powers.append((powers[-1] * fingerprint_radix) % 
+                      fingerprint_modulus)
+    return powers[exponent]
+
+def sequence_fingerprint(sequence):
+    """
+    Calculates the rolling polynomial hash of a sequence.
+
+    @param sequence: a sequence of bases (list, tuple or string)
+    @return: hash as a non-negative integer less than 2**61 - 1
+
+    @since: version 1.1
+    """
+    value = 0
+    codes = _base_codes
+    radix = fingerprint_radix
+    modulus = fingerprint_modulus
+    for base in sequence:
+        try: code = codes[base]
+        except (KeyError, TypeError): code = base_code(base)
+        value = (value * radix + code) % modulus
+    return value
+
+class SharedSequence(MutableSequence):
+    """
+    Chromosomal sequence which keeps its fingerprint (see 
+    Chromosome.fingerprint) up to date, and may share an immutable 
+    sequence (tuple) with other chromosomes until it is changed 
+    (copy-on-write). All changes go through the sequence; hence, the 
+    fingerprint is updated in constant time for each base which is 
+    replaced (such as Chromosome.sequence[i] = base) or appended, and is 
+    recalculated on the next call after other changes (such as insertions 
+    and deletions). The tuple is copied into a list on the first change 
+    without changing the chromosomes which share the tuple. Slices and 
+    concatenations are given as lists, and a SharedSequence is equal to a 
+    list with the same bases.
+    
+    @since: version 1.1
+    """
+    __slots__ = ('_items', '_fingerprint')
+    
+    def __init__(self, items=(), fingerprint=None):
+        """
+        Sets up the sequence.
+        
+        @param items: tuple to share, or other sequence of bases to copy
+        @param fingerprint: fingerprint of the bases, if known. 
+            Default = None (calculated when needed).
+        
+        @since: version 1.1
+        """
+        if not isinstance(items, tuple): items = list(items)
+        self._items = items
+        self._fingerprint = fingerprint
+    
+    @classmethod
+    def adopt(cls, items):
+        """
+        Gives a SharedSequence of a list or tuple without copying it. 
+        Changes made to the list other than through the SharedSequence 
+        are not detected.
+        
+        @param items: list or tuple of bases
+        @return: SharedSequence object
+        
+        @since: version 1.1
+        """
+        sequence = cls()
+        sequence._items = items
+        return sequence
+    
+    def fingerprint(self):
+        """
+        Gives the rolling polynomial hash of the sequence (see 
+        sequence_fingerprint), which is calculated on the first call after 
+        a change that cannot be applied in constant time.
+        
+        @return: fingerprint as a non-negative integer
+        
+        @since: version 1.1
+        """
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            fingerprint = sequence_fingerprint(self._items)
+            self._fingerprint = fingerprint
+        return fingerprint
+    
+    def shared(self):
+        """
+        Gives the shared tuple, or None if the sequence has been changed 
+        (and no longer shares the tuple).
+        
+        @since: version 1.1
+        """
+        if isinstance(self._items, tuple): return self._items
+        return None
+    
+    def share(self):
+        """
+        Gives a tuple of the sequence to share with other chromosomes (see 
+        share_sequence). A sequence which has been changed is turned into 
+        a tuple again, which is copied into a list on its next change.
+        
+        @return: tuple of bases
+        
+        @since: version 1.1
+        """
+        if not isinstance(self._items, tuple):
+            self._items = tuple(self._items)
+        return self._items
+    
+    def _writable(self):
+        items = self._items
+        if isinstance(items, tuple):
+            items = list(items)
+            self._items = items
+        return items
+    
+    def __reduce__(self):
+        return (self.__class__, (self._items, self._fingerprint))
+    
+    def __copy__(self):
+        return self.__class__(self._items, self._fingerprint)
+    
+    def __deepcopy__(self, memo):
+        return self.__class__(self._items, self._fingerprint)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice): return list(self._items[index])
+        return self._items[index]
+    
+    def __setitem__(self, index, value):
+        items = self._writable()
+        fingerprint = self._fingerprint
+        if fingerprint is None or isinstance(index, slice):
+            items[index] = value
+            self._fingerprint = None
+            return
+        old_base = items[index]
+        items[index] = value
+        if index < 0: index = index + len(items)
+        self._fingerprint = (fingerprint + 
+                             (base_code(value) - base_code(old_base)) * 
+                             fingerprint_power(len(items) - 1 - index)) % \
+                             fingerprint_modulus
+    
+    def __delitem__(self, index):
+        del self._writable()[index]
+        self._fingerprint = None
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __reversed__(self):
+        return reversed(self._items)
+    
+    def __contains__(self, value):
+        return value in self._items
+    
+    def __eq__(self, other):
+        if isinstance(other, SharedSequence): other = list(other._items)
+        elif not isinstance(other, list): return NotImplemented
+        return list(self._items) == other
+    
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented: return result
+        return not result
+    
+    __hash__ = None
+    
+    def __add__(self, other):
+        return list(self._items) + list(other)
+    
+    def __radd__(self, other):
+        return list(other) + list(self._items)
+    
+    def __repr__(self):
+        return repr(list(self._items))
+    
+    def index(self, value, *args):
+        return list(self._items).index(value, *args)
+    
+    def count(self, value):
+        return self._items.count(value)
+    
+    def insert(self, index, value):
+        self._writable().insert(index, value)
+        self._fingerprint = None
+    
+    def append(self, value):
+        self._writable().append(value)
+        fingerprint = self._fingerprint
+        if fingerprint is not None:
+            self._fingerprint = (fingerprint * fingerprint_radix + 
+                                 base_code(value)) % fingerprint_modulus
+    
+    def extend(self, values):
+        self._writable().extend(values)
+        self._fingerprint = None
+    
+    def pop(self, *index):
+        self._fingerprint = None
+        return self._writable().pop(*index)
+    
+    def clear(self):
+        self._items = []
+        self._fingerprint = None
+    
+    def reverse(self):
+        self._writable().reverse()
+        self._fingerprint = None
+    
+    def sort(self, *args, **kwargs):
+        self._writable().sort(*args, **kwargs)
+        self._fingerprint = None
+
+def tracked_sequence(sequence):
+    """
+    Gives a chromosomal sequence which keeps its fingerprint up to date - 
+    a list or tuple is kept in a SharedSequence (see SharedSequence.adopt) 
+    without being copied, and other sequences (such as a SharedSequence, 
+    or strings which cannot be changed) are given as they are.
+    
+    @param sequence: chromosomal sequence
+    @return: SharedSequence object or sequence
+    
+    @since: version 1.1
+    """
+    if isinstance(sequence, (list, tuple)):
+        return SharedSequence.adopt(sequence)
+    return sequence
+
+def share_sequence(sequence):
+    """
+    Gives a sequence for a new chromosome with the same bases (such as an 
+    offspring by asexual reproduction) - a SharedSequence shares its tuple 
+    (see SharedSequence.share) and fingerprint, and other sequences are 
+    kept in a new SharedSequence.
+    
+    @param sequence: chromosomal sequence
+    @return: SharedSequence object
+    
+    @since: version 1.1
+    """
+    if isinstance(sequence, SharedSequence):
+        return SharedSequence(sequence.share(), sequence._fingerprint)
+    return SharedSequence(sequence)
+
 class Chromosome(object):
     """
     Representation of a linear chromosome.
@@ -25,7 +345,11 @@ class Chromosome(object):
         Sets up a chromosome.
         
         @param sequence: a subscriptable object (list or string) representing
-            the sequence of the chromosome.
+            the sequence of the chromosome. A list or tuple is kept (without 
+            being copied) in a SharedSequence, which keeps the fingerprint 
+            up to date when the sequence is changed in place. A tuple is 
+            shared with other chromosomes until its first change 
+            (copy-on-write).
         @param base: a subscriptable object (list or string) representing
             allowable entities in the sequence.
         @param background_mutation: background mutation rate represented as the 
@@ -34,10 +358,35 @@ class Chromosome(object):
             
         @since: version 0.4
         """
-        self.sequence = sequence
+        self.sequence = tracked_sequence(sequence)
         self.base = base
         self.background_mutation = background_mutation
     
+    def fingerprint(self):
+        """
+        Gives the fingerprint of the chromosome - a rolling polynomial hash 
+        of the sequence, which is the same for identical sequences across 
+        processes and simulation runs, and is kept when the chromosome is 
+        pickled or copied. The fingerprint is kept by the sequence (see 
+        SharedSequence) and updated in constant time for each base which 
+        is replaced (by point mutations or by Chromosome.sequence[i] = 
+        base), or recalculated on the next call after other changes. A 
+        list or tuple which replaces the sequence is kept in a 
+        SharedSequence from the first call; other sequences (such as 
+        strings) are hashed on each call.
+        
+        @return: fingerprint as a non-negative integer
+        
+        @since: version 1.1
+        """
+        sequence = self.sequence
+        if not isinstance(sequence, SharedSequence):
+            if not isinstance(sequence, (list, tuple)):
+                return sequence_fingerprint(sequence)
+            sequence = SharedSequence.adopt(sequence)
+            self.sequence = sequence
+        return sequence.fingerprint()
+
     def rmutate(self, type='point', rate=0.01, start=0, end=-1):
         """
         Random Mutation operator - to simulate random point, insertion, 
@@ -257,19 +606,10 @@ class Organism(object):
         self.mutation_type = mutation_type
         self.additional_mutation_rate = additional_mutation_rate
         self.status['gender'] = gender
+        self._fitness_signature = None
         
     def generate_name(self):
-        name = ''.join([random.choice(('1', '2', '3', '4', '5', '6', '7',
-                                       '8', '9', 'A', 'B', 'C', 'D', 'E',
-                                       'F', 'G', 'H', 'I', 'J', 'K', 'L',
-                                       'M', 'N', 'O', 'P', 'Q', 'R', 'S',
-                                       'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
-                                       'a', 'b', 'c', 'd', 'e', 'f', 'g',
-                                       'h', 'i', 'j', 'k', 'l', 'm', 'n',
-                                       'o', 'p', 'q', 'r', 's', 't', 'u',
-                                       'v', 'w', 'x', 'y', 'z', '=', '#',
-                                       '$', '%', '&', '@', '<', '>', '?'
-                                       )) for x in range(32)])
+        name = ''.join([random.choice(name_characters) for x in range(32)])
 
         self.status['identity'] = name
         
@@ -386,7 +726,262 @@ class Organism(object):
         """
         org = deepcopy(self)
         return org
+    
+    def fitness_signature(self, status_keys=()):
+        """
+        Gives the signature of the organism for fitness evaluation - the 
+        fingerprints of the chromosomes (see Chromosome.fingerprint) and 
+        the values of the status which matter to fitness. Mutations and 
+        crossovers change the fingerprints; hence, the signature.
+        
+        @param status_keys: keys of Organism.status which matter to 
+            fitness. Default = () (fitness depends only on the genome).
+        @return: signature as a tuple
+        
+        @since: version 1.1
+        """
+        return (tuple([chromosome.fingerprint() 
+                       for chromosome in self.genome]),
+                tuple([self.status.get(key) for key in status_keys]))
+    
+    def fitness_dirty(self, status_keys=()):
+        """
+        Checks whether the fitness of the organism has to be evaluated - 
+        the organism has not been evaluated, has been marked dirty (see 
+        mark_fitness_dirty), or its genome or the status which matter to 
+        fitness had changed since the last evaluation.
+        
+        @param status_keys: keys of Organism.status which matter to 
+            fitness. Default = ().
+        @return: True if the fitness has to be evaluated
+        
+        @since: version 1.1
+        """
+        signature = getattr(self, '_fitness_signature', None)
+        return signature is None or \
+            signature != self.fitness_signature(status_keys)
+    
+    def mark_fitness_clean(self, status_keys=()):
+        """
+        Records that the fitness of the organism (in Organism.status
+        ['fitness']) has been evaluated for its current genome and status.
+        
+        @param status_keys: keys of Organism.status which matter to 
+            fitness. Default = ().
+        
+        @since: version 1.1
+        """
+        self._fitness_signature = self.fitness_signature(status_keys)
+    
+    def mark_fitness_dirty(self):
+        """
+        Marks the fitness of the organism to be evaluated again, such as 
+        after a change which is not detected by fitness_dirty.
+        
+        @since: version 1.1
+        """
+        self._fitness_signature = None
+    
+    def evaluate_fitness(self, status_keys=()):
+        """
+        Gives the fitness of the organism, calling fitness function and 
+        storing the score in Organism.status['fitness'] only if the 
+        organism is dirty (see fitness_dirty).
+        
+        @param status_keys: keys of Organism.status which matter to 
+            fitness. Default = ().
+        @return: fitness score
         
+        @since: version 1.1
+        """
+        if self.fitness_dirty(status_keys):
+            self.status['fitness'] = self.fitness()
+            self.mark_fitness_clean(status_keys)
+        return self.status['fitness']
+
+status_keys = ('alive', 'vitality', 'parents', 'age', 'gender', 'lifespan',
+               'fitness', 'blood', 'identity', 'deme', 'location',
+               'generation', 'death')
+
+class OrganismStatus(MutableMapping):
+    """
+    Memory-lean status table of an organism for use in LeanOrganism. The
+    13 pre-defined status (see Organism) are held in slots instead of
+    dictionary entries while any other status, such as 'chromosome_error',
+    is kept in a small dictionary which is only created when needed.
+
+    OrganismStatus behaves as a dictionary - Organism.status[key],
+    Organism.status.keys() and Organism.status.items() work as usual and
+    pre-defined status are always listed first, in the same order as in
+    Organism.status. Pre-defined status cannot be deleted. Populations
+    indexing the organism (see Population.index) are notified of status
+    changes.
+
+    @since: version 1.1
+    """
+    __slots__ = status_keys + ('_extra', '_watchers')
+    _predefined = frozenset(status_keys)
+
+    def __init__(self, gender=None):
+        """
+        Sets up a status table with default status (age = 0, vitality = 100,
+        lifespan = 100, fitness = 100, alive = True).
+
+        @param gender: gender of the organism. Default = None.
+
+        @since: version 1.1
+        """
+        self.alive = True
+        self.vitality = 100.0
+        self.parents = None
+        self.age = 0.0
+        self.gender = gender
+        self.lifespan = 100.0
+        self.fitness = 100.0
+        self.blood = None
+        self.identity = None
+        self.deme = None
+        self.location = None
+        self.generation = 0
+        self.death = None
+        self._extra = None
+        self._watchers = None
+
+    def __getstate__(self):
+        # watching populations are not copied or pickled
+        return (None, dict([(key, getattr(self, key)) 
+                            for key in status_keys + ('_extra',)
+                            if hasattr(self, key)]))
+
+    def __getitem__(self, key):
+        if key in self._predefined:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._predefined:
+            setattr(self, key, value)
+        else:
+            if self._extra is None: self._extra = {}
+            self._extra[key] = value
+        if getattr(self, '_watchers', None): notify_watchers(self, [key])
+
+    def __delitem__(self, key):
+        if key in self._predefined:
+            raise KeyError('%s is a pre-defined status and cannot be \
+removed' % str(key))
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        del self._extra[key]
+        if not self._extra: self._extra = None
+        if getattr(self, '_watchers', None): notify_watchers(self, [key])
+
+    def __iter__(self):
+        for key in status_keys:
+            yield key
+        if self._extra is not None:
+            for key in list(self._extra.keys()):
+                yield key
+
+    def __len__(self):
+        if self._extra is None:
+            return len(status_keys)
+        return len(status_keys) + len(self._extra)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def copy(self):
+        """Returns the status table as a dictionary."""
+        return dict(self.items())
+
+class LeanChromosome(object):
+    """
+    Memory-lean (slotted) variant of Chromosome for very large populations.
+    LeanChromosome does not carry a per-instance dictionary; hence, no
+    attribute other than sequence, base and background_mutation can be
+    added. All operators of Chromosome, including the fingerprint, are 
+    available.
+
+    @since: version 1.1
+    """
+    __slots__ = ('sequence', 'base', 'background_mutation')
+
+    def __init__(self, sequence, base,
+                 background_mutation=0.0001):
+        """
+        Sets up a chromosome. See Chromosome.__init__ for parameters.
+
+        @since: version 1.1
+        """
+        self.sequence = tracked_sequence(sequence)
+        self.base = base
+        self.background_mutation = background_mutation
+
+    fingerprint = Chromosome.__dict__['fingerprint']
+    rmutate = Chromosome.__dict__['rmutate']
+    kmutate = Chromosome.__dict__['kmutate']
+    replicate = Chromosome.__dict__['replicate']
+
+class LeanOrganism(object):
+    """
+    Memory-lean (slotted) variant of Organism for populations of 100
+    thousand organisms or more. LeanOrganism does not carry a per-instance
+    dictionary and keeps its status in an OrganismStatus table instead of
+    a dictionary. Organism.status[key], getStatus, setStatus, pickling
+    (freezing), database logging and all other methods of Organism work
+    as usual. However, no attribute other than status, genome,
+    mutation_type and additional_mutation_rate can be added.
+
+    The target is 500 bytes per organism excluding the chromosomal 
+    sequences, which take 8 bytes per base, 56 bytes per list and 48 
+    bytes per SharedSequence. As measured by tracemalloc on 64-bit 
+    CPython 3.11 with one 50-base chromosome (a 456-byte list in a 
+    SharedSequence), a shared list of bases and a 32-character name, an 
+    Organism takes about 1330 bytes whereas a LeanOrganism with 
+    LeanChromosome takes about 935 bytes; that is, about 825 and 430 
+    bytes excluding the sequence.
+
+    LeanOrganism can be selected in population_constructor by setting
+    'organism_type' to 'lean' in the population data.
+
+    @since: version 1.1
+    """
+    __slots__ = ('status', 'genome', 'mutation_type',
+                 'additional_mutation_rate', '_fitness_signature')
+
+    def __init__(self, genome='dummy', mutation_type='point',
+                 additional_mutation_rate=0.01, gender=None):
+        """
+        Sets up a new organism with default status. See Organism.__init__
+        for parameters.
+
+        @since: version 1.1
+        """
+        self.status = OrganismStatus(gender)
+        if genome == 'dummy':
+            self.genome = [LeanChromosome([0], [0])]
+        else:
+            self.genome = genome
+        self.mutation_type = mutation_type
+        self.additional_mutation_rate = additional_mutation_rate
+        self._fitness_signature = None
+
+    generate_name = Organism.__dict__['generate_name']
+    fitness = Organism.__dict__['fitness']
+    mutation_scheme = Organism.__dict__['mutation_scheme']
+    setStatus = Organism.__dict__['setStatus']
+    getStatus = Organism.__dict__['getStatus']
+    __str__ = Organism.__dict__['__str__']
+    clone = Organism.__dict__['clone']
+    fitness_signature = Organism.__dict__['fitness_signature']
+    fitness_dirty = Organism.__dict__['fitness_dirty']
+    mark_fitness_clean = Organism.__dict__['mark_fitness_clean']
+    mark_fitness_dirty = Organism.__dict__['mark_fitness_dirty']
+    evaluate_fitness = Organism.__dict__['evaluate_fitness']
+
 class Population(object):
     """
     Representation of a population as a list of organisms. The entire 
@@ -406,7 +1001,7 @@ class Population(object):
     @since: version 0.4
     """
     
-    def __init__(self, goal, maxgenerations='infinite', agents=[]):
+    def __init__(self, goal, maxgenerations='infinite', agents=None):
         """
         Establishes a population of organisms.
         
@@ -415,14 +1010,273 @@ class Population(object):
         @param maxgenerations: maximum number of generations to evolve.
             Default = 'infinite'.
         @param agents: organisms making up the initial population.
+            Default = None (no organism).
         @type agents: list of Organism objects
         
+        The lineage registry (lineage.Lineage object) of the population, 
+        if any, is kept as Population.lineage. Default = None.
+        
+        If Population.clonal is True (clonal population mode), organisms 
+        with identical genomes are handled as a group of clones (see 
+        genome_groups) - the genome is interpreted, scored by 
+        dose_functions.organism_fitness, and logged into the database 
+        once per group while the status of each organism is kept 
+        individually. Default = False.
+        
+        The number of fitness evaluations made and skipped (for organisms 
+        which had not changed; see Organism.fitness_dirty) in each 
+        generation is kept as Population.fitness_evaluations, a dictionary 
+        of [evaluated, skipped] with generation count as key.
+        
+        Population.agents is kept as a population_index.AgentList, which 
+        keeps the indexes of the population (see index) updated when 
+        organisms are added or removed.
+        
         @since: version 0.4
         """
+        if agents is None: agents = []
+        self._indexes = {}
+        self._entries = {}
+        self._occurrences = {}
+        self._next_entry = 0
+        self._order_stale = False
         self.agents = agents
         self.goal = goal
         self.maxgenerations = maxgenerations
         self.generation = 0
+        self.lineage = None
+        self.clonal = False
+        self.fitness_evaluations = {}
+    
+    def _get_agents(self):
+        return self.__dict__['agents']
+    
+    def _set_agents(self, agents):
+        if not (isinstance(agents, AgentList) and 
+                agents._population is self):
+            agents = AgentList(agents, self)
+        self.__dict__['agents'] = agents
+        if self.__dict__.get('_indexes'): self.reindex()
+    
+    agents = property(_get_agents, _set_agents, 
+                      doc='List of organisms in the population.')
+    
+    def __getstate__(self):
+        # indexes are not copied or pickled
+        state = dict(self.__dict__)
+        for key in ('_indexes', '_entries', '_occurrences', '_next_entry',
+                    '_order_stale', '_fitness_cache'):
+            state.pop(key, None)
+        state['agents'] = list(state['agents'])
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._indexes = {}
+        self._entries = {}
+        self._occurrences = {}
+        self._next_entry = 0
+        self._order_stale = False
+        self.agents = state['agents']
+    
+    def index(self, status_key, key_function=index_key):
+        """Gives the index of the organisms in the population by a status 
+        (such as location, deme or gender), creating the index if needed 
+        (see population_index.AgentIndex). The index is updated as 
+        organisms are added to or removed from Population.agents, and as 
+        the status of the organisms change; hence, organisms with a 
+        specific status can be listed or randomly sampled without scanning 
+        the population. For example, 
+        
+            Population.index('location').sample((0, 0, 0))
+        
+        randomly selects an organism in ecological cell (0, 0, 0).
+        
+        The status of each organism is replaced by a 
+        population_index.TrackedStatus (a dictionary which notifies the 
+        population of changes) when indexed. Organisms with other types of 
+        status cannot be indexed.
+        
+        @param status_key: status key to index
+        @param key_function: function to convert status value into a 
+            hashable key. Default = population_index.index_key.
+        @return: population_index.AgentIndex object, or None if the 
+            population cannot be indexed
+        
+        @since: version 1.1"""
+        name = (status_key, key_function)
+        if name in self._indexes: return self._indexes[name]
+        if not self._indexes and not self._build_entries(): return None
+        self.reorder()
+        index = AgentIndex(status_key, key_function)
+        index.population = self
+        index.entries = self._entries
+        for entry in sorted(self._entries):
+            index.add(entry, self._entries[entry])
+        self._indexes[name] = index
+        return index
+    
+    def reindex(self):
+        """Rebuilds the indexes of the population (see index). This is 
+        needed only if the status table of an organism (Organism.status) 
+        had been replaced; other changes are tracked.
+        
+        @since: version 1.1"""
+        if not self._indexes: return
+        names = list(self._indexes.keys())
+        self._drop_indexes()
+        for (status_key, key_function) in names:
+            if self.index(status_key, key_function) is None: return
+    
+    def _drop_indexes(self):
+        for occurrences in list(self._occurrences.values()):
+            self._unwatch(self._entries[occurrences[0]])
+        self._indexes = {}
+        self._entries = {}
+        self._occurrences = {}
+        self._next_entry = 0
+        self._order_stale = False
+    
+    def _build_entries(self):
+        for organism in self.agents:
+            if not self._add_entry(organism):
+                self._drop_indexes()
+                return False
+        return True
+    
+    def _watch(self, organism):
+        status = organism.status
+        if type(status) is dict:
+            status = TrackedStatus(status)
+            organism.status = status
+        elif not hasattr(status.__class__, '_watchers'):
+            return False
+        if getattr(status, '_watchers', None) is None:
+            status._watchers = []
+        status._watchers.append((self, organism))
+        return True
+    
+    def _unwatch(self, organism):
+        watchers = getattr(organism.status, '_watchers', None)
+        if watchers:
+            watchers[:] = [watcher for watcher in watchers 
+                           if watcher[0] is not self]
+    
+    def _add_entry(self, organism):
+        occurrences = self._occurrences.get(id(organism))
+        if occurrences is None:
+            if not self._watch(organism): return False
+            occurrences = []
+            self._occurrences[id(organism)] = occurrences
+        entry = self._next_entry
+        self._next_entry = entry + 1
+        self._entries[entry] = organism
+        occurrences.append(entry)
+        for index in self._indexes.values():
+            index.add(entry, organism)
+        return True
+    
+    def agents_added(self, organisms):
+        """Updates the indexes for organisms appended to Population.agents. 
+        This is called by population_index.AgentList.
+        
+        @param organisms: list of organisms
+        
+        @since: version 1.1"""
+        if not self._indexes: return
+        for organism in organisms:
+            if not self._add_entry(organism):
+                self._drop_indexes()
+                return
+    
+    def agents_removed(self, organisms, last=False):
+        """Updates the indexes for organisms removed from Population.agents. 
+        This is called by population_index.AgentList.
+        
+        @param organisms: list of organisms
+        @param last: if True, the last occurrence of each organism in 
+            Population.agents was removed; otherwise, the first occurrence. 
+            Default = False.
+        
+        @since: version 1.1"""
+        if not self._indexes: return
+        for organism in organisms:
+            occurrences = self._occurrences[id(organism)]
+            if last: entry = occurrences.pop()
+            else: entry = occurrences.pop(0)
+            del self._entries[entry]
+            for index in self._indexes.values():
+                index.discard(entry)
+            if not occurrences:
+                del self._occurrences[id(organism)]
+                self._unwatch(organism)
+    
+    def agents_replaced(self, removed, added):
+        """Updates the indexes for organisms removed from or added to 
+        Population.agents other than at its end, such as by insertion, 
+        deletion or assignment of items. This is called by 
+        population_index.AgentList. The indexes are updated at once but 
+        the order of the organisms in the indexes is renumbered when an 
+        index is next looked up (see reorder).
+        
+        @param removed: list of removed organisms
+        @param added: list of added organisms
+        
+        @since: version 1.1"""
+        if not self._indexes: return
+        for organism in removed:
+            # any occurrence of an organism is removed
+            if len(self._occurrences[id(organism)]) > 1:
+                self._order_stale = True
+        self.agents_removed(removed, True)
+        if added: self._order_stale = True
+        self.agents_added(added)
+    
+    def agents_reordered(self):
+        """Marks the order of the organisms in the indexes to be renumbered 
+        (see reorder) after Population.agents was sorted or reversed. This 
+        is called by population_index.AgentList.
+        
+        @since: version 1.1"""
+        if self._indexes: self._order_stale = True
+    
+    def reorder(self):
+        """Renumbers the organisms in the indexes in the order of 
+        Population.agents, if Population.agents had been changed other 
+        than at its end since the last renumbering. This is called when an 
+        index is looked up (see population_index.AgentIndex.lookup).
+        
+        @since: version 1.1"""
+        if not self._order_stale: return
+        self._order_stale = False
+        if not self._indexes: return
+        remaining = dict([(key, list(occurrences)) for (key, occurrences) 
+                          in self._occurrences.items()])
+        numbers = {}
+        for (position, organism) in enumerate(self.agents):
+            numbers[remaining[id(organism)].pop()] = position
+        self._entries = dict(enumerate(self.agents))
+        for occurrences in self._occurrences.values():
+            occurrences[:] = sorted([numbers[entry] 
+                                     for entry in occurrences])
+        self._next_entry = len(self._entries)
+        for index in self._indexes.values():
+            index.renumber(numbers, self._entries)
+    
+    def status_changed(self, organism, status_key):
+        """Updates the indexes for a change in the status of an organism. 
+        This is called by the status table of the organism.
+        
+        @param organism: organism
+        @param status_key: changed status key
+        
+        @since: version 1.1"""
+        occurrences = self._occurrences.get(id(organism))
+        if not occurrences: return
+        for index in self._indexes.values():
+            if index.status_key == status_key:
+                for entry in occurrences:
+                    index.move(entry, organism)
     
     def prepopulation_control(self):
         """
@@ -443,7 +1297,7 @@ class Population(object):
         @since: version 0.4
         """
         size = len(self.agents)
-        sfitness = [self.agents[x].fitness() for x in range(size)]
+        sfitness = self.fitness_scores()
         threshold = sum(sfitness) / len(sfitness)
         temp = [self.agents[x]
                 for x in range(size) 
@@ -472,14 +1326,14 @@ class Population(object):
         @since: version 0.4
         """
         size = len(self.agents)
-        temp = []
+        temp = [None] * size
         for x in range(size):
             organism1 = self.agents[random.randint(0, size - 1)]
             organism2 = self.agents[random.randint(0, size - 1)]
             crossover_pt = random.randint(0, len(organism1.genome[0].sequence))
             (g1, g2) = crossover(organism1.genome[0], organism2.genome[0],
                                  crossover_pt)
-            temp = temp + [Organism([g1])]
+            temp[x] = Organism([g1])
         self.add_organism(temp)
             
     def postpopulation_control(self):
@@ -521,8 +1375,7 @@ class Population(object):
         
         @since: version 0.4
         """
-        sfitness = [self.agents[x].fitness() 
-                    for x in range(len(self.agents))]
+        sfitness = self.fitness_scores()
         afitness = sum(sfitness) / float(len(self.agents))
         return {'generation': self.generation,
                 'average fitness': afitness,
@@ -553,13 +1406,112 @@ class Population(object):
         return self.report()
     
     def add_organism(self, organism):
-        """Add a new organism(s) to the population.
+        """Add a new organism(s) to the population. The organisms are 
+        appended to the existing list of agents in place; hence, repeated 
+        additions take linear time.
         
         @param organism: list of new Organism object(s)
         
         @since: version 0.4"""
-        self.agents = self.agents + organism
+        self.agents.extend(organism)
+    
+    def evaluate_fitness(self, status_keys=()):
+        """Gives the fitness of each organism, evaluating only organisms 
+        which had changed since their last evaluation (see 
+        Organism.evaluate_fitness). The number of evaluations made and 
+        skipped is added to Population.fitness_evaluations.
+        
+        @param status_keys: keys of Organism.status which matter to 
+            fitness. Default = ().
+        @return: list of fitness scores in the order of the organisms
+        
+        @since: version 1.1"""
+        scores = [None] * len(self.agents)
+        evaluated = 0
+        for index in range(len(self.agents)):
+            organism = self.agents[index]
+            if organism.fitness_dirty(status_keys):
+                evaluated = evaluated + 1
+            scores[index] = organism.evaluate_fitness(status_keys)
+        self.count_evaluations(evaluated, len(self.agents) - evaluated)
+        return scores
+    
+    def fitness_scores(self, status_keys=()):
+        """Gives the fitness of each organism (Organism.fitness) without 
+        changing the organisms, as used by prepopulation_control and report. 
+        Unlike evaluate_fitness, Organism.status['fitness'] is not written 
+        and the organisms are not marked as evaluated; the scores are kept 
+        in a cache of the population instead, and organisms which had not 
+        changed since the last call (see Organism.fitness_signature) are 
+        not evaluated again. The number of evaluations made and skipped is 
+        added to Population.fitness_evaluations.
+        
+        @param status_keys: keys of Organism.status which matter to 
+            fitness. Default = ().
+        @return: list of fitness scores in the order of the organisms
+        
+        @since: version 1.1"""
+        previous = self.__dict__.get('_fitness_cache', {})
+        cache = {}
+        scores = [None] * len(self.agents)
+        evaluated = 0
+        for index in range(len(self.agents)):
+            organism = self.agents[index]
+            signature = organism.fitness_signature(status_keys)
+            # organisms are kept in the cache; hence, identities are not 
+            # reused by other organisms
+            cached = cache.get(id(organism)) or previous.get(id(organism))
+            if cached is None or cached[1] != signature:
+                cached = (organism, signature, organism.fitness())
+                evaluated = evaluated + 1
+            cache[id(organism)] = cached
+            scores[index] = cached[2]
+        self._fitness_cache = cache
+        self.count_evaluations(evaluated, len(self.agents) - evaluated)
+        return scores
+    
+    def count_evaluations(self, evaluated, skipped):
+        """Adds the number of fitness evaluations made and skipped to 
+        Population.fitness_evaluations for the current generation.
+        
+        @param evaluated: number of fitness evaluations made
+        @param skipped: number of fitness evaluations skipped
+        
+        @since: version 1.1"""
+        if not hasattr(self, 'fitness_evaluations'):
+            self.fitness_evaluations = {}
+        counts = self.fitness_evaluations.setdefault(self.generation, [0, 0])
+        counts[0] = counts[0] + evaluated
+        counts[1] = counts[1] + skipped
+    
+    def genome_groups(self):
+        """Groups the organisms of the population by identical genomes 
+        (see genome_groups function).
+        
+        @return: list of groups of organisms
+        
+        @since: version 1.1"""
+        return genome_groups(self.agents)
+        
+    def subpopulation(self, agents):
+        """Gives a population with the attributes of this population (such 
+        as generation count and lineage) but with only the given organisms. 
+        Organisms and attributes are shared, not copied; hence, a sample of 
+        a large population can be pickled without copying the population.
+        
+        @param agents: list of organisms
+        @return: Population object
         
+        @since: version 1.1"""
+        state = dict(self.__dict__)
+        for key in ('_indexes', '_entries', '_occurrences', '_next_entry',
+                    '_order_stale', '_fitness_cache'):
+            state.pop(key, None)
+        state['agents'] = list(agents)
+        population = self.__class__.__new__(self.__class__)
+        population.__setstate__(state)
+        return population
+    
     def freeze(self, prefix='pop', proportion=0.01):
         """
         Preserves part or the entire population. If the population size or 
@@ -581,13 +1533,10 @@ class Population(object):
         except ImportError:
             import pickle
 
-        if proportion > 1.0: proportion = 1.0
-        if len(self.agents) < 101 or len(self.agents) * proportion < 101:
-            sample = self.agents
-        else:
-            size = len(self.agents)
-            sample = [self.agents[random.randint(0, size - 1)]
-                      for x in range(int(len(self.agents) * proportion))]
+        agents = self.agents
+        # only the sampled organisms are pickled, straight into the file
+        sample = [agents[index] 
+                  for index in fossil_indices(len(agents), proportion)]
         name = ''.join([prefix, str(self.generation), '_', 
                         str(len(sample)), '.gap'])
         f = open(name, 'wb')
@@ -629,35 +1578,329 @@ def crossover(chromosome1, chromosome2, position):
     @type position: integer
     @return: (resulting chromosome1, resulting chromosome2)
 
-    New chromosomes inherit their parent's crossed sequences, bases and
-    background mutation rate.
+    New chromosomes inherit their parent's crossed sequences, bases,
+    background mutation rate and chromosome class (Chromosome or 
+    LeanChromosome).
     
     @since: version 0.4
     """
     seq1 = chromosome1.sequence
     seq2 = chromosome2.sequence 
+    if isinstance(seq1, SharedSequence) or isinstance(seq2, SharedSequence) \
+        or isinstance(seq1, tuple) != isinstance(seq2, tuple):
+        # shared sequences (copy-on-write) are crossed as lists
+        (seq1, seq2) = (list(seq1), list(seq2))
     position = int(position)
     if len(seq1) > position and len(seq2) > position:
-        new1 = Chromosome(seq1[:position] + seq2[position:], 
+        new1 = chromosome1.__class__(seq1[:position] + seq2[position:], 
                           chromosome1.base, chromosome1.background_mutation)
-        new2 = Chromosome(seq2[:position] + seq1[position:],
+        new2 = chromosome2.__class__(seq2[:position] + seq1[position:],
                           chromosome2.base, chromosome2.background_mutation)
         return (new1, new2)
     elif len(seq1) > position:
-        new1 = Chromosome(seq1[:position], chromosome1.base, 
+        new1 = chromosome1.__class__(seq1[:position], chromosome1.base, 
                           chromosome1.background_mutation)
-        new2 = Chromosome(chromosome2.sequence + seq1[position:],
+        new2 = chromosome2.__class__(seq2 + seq1[position:],
                           chromosome2.base, chromosome2.background_mutation)
         return (new1, new2)
     elif len(seq2) > position:
-        new1 = Chromosome(chromosome1.sequence + seq2[position:],
+        new1 = chromosome1.__class__(seq1 + seq2[position:],
                           chromosome1.base, chromosome1.background_mutation)
-        new2= Chromosome(seq2[:position], chromosome2.base, 
+        new2= chromosome2.__class__(seq2[:position], chromosome2.base, 
                          chromosome2.background_mutation)
         return (new1, new2)
     else:
-        return (chromosome1, chromosome2)        
-            
+        return (chromosome1, chromosome2)
+
+def batch_crossover(chromosomes, parents1, parents2, points=None,
+                    scheme='single', cuts=2, rate=0.5):
+    """
+    Batched cross-over operator - crosses many pairs of chromosomes in one
+    pass. The sequences of the chromosome pool are gathered once and each
+    pair of parents is given by a pair of indices into the pool.
+
+    Cross-over schemes:
+        - 'single': single-point cross-over. The data after the given
+        position is swapped, which gives the same result as crossover
+        function for the same position.
+        - 'multi': multi-point cross-over. The data between alternate
+        pairs of positions is swapped.
+        - 'uniform': uniform cross-over. Each base (up to the length of the
+        shorter chromosome) is swapped with a probability of rate, and the
+        bases after the length of the shorter chromosome are not swapped.
+
+    New chromosomes inherit their parent's crossed sequences, bases,
+    background mutation rate and chromosome class.
+
+    @param chromosomes: pool of parent chromosomes (list of Chromosome
+        objects)
+    @param parents1: list of indices of the first parent of each pair
+    @param parents2: list of indices of the second parent of each pair
+    @param points: list of cross-over positions, one for each pair; as an
+        integer for 'single' scheme, or as a list of integers for 'multi'
+        scheme. Not used for 'uniform' scheme. Default = None, which picks
+        random positions; uniformly within the first parent (as in
+        Population.mating) for 'single' scheme, or a random set of cuts
+        positions within the shorter parent for 'multi' scheme.
+    @param scheme: cross-over scheme. Accepts 'single', 'multi' or
+        'uniform'. Default = 'single'.
+    @param cuts: number of cross-over positions to pick when points is
+        None for 'multi' scheme. Default = 2.
+    @param rate: probability of swapping each base for 'uniform' scheme.
+        Default = 0.5.
+    @return: list of (resulting chromosome1, resulting chromosome2), one
+        for each pair
+
+    @since: version 1.1
+    """
+    if scheme not in ('single', 'multi', 'uniform'):
+        raise ValueError('Unknown cross-over scheme: %s' % str(scheme))
+    store = [chromosome.sequence if isinstance(chromosome.sequence, list)
+             else list(chromosome.sequence)
+             for chromosome in chromosomes]
+    size = len(parents1)
+    randint = random.randint
+    uniform = random.random
+    sample = random.sample
+    offspring = [None] * size
+    for x in range(size):
+        index1 = parents1[x]
+        index2 = parents2[x]
+        seq1 = store[index1]
+        seq2 = store[index2]
+        if scheme == 'single':
+            if points is None: position = randint(0, len(seq1))
+            else: position = int(points[x])
+            new1 = seq1[:position] + seq2[position:]
+            new2 = seq2[:position] + seq1[position:]
+        elif scheme == 'multi':
+            if points is None:
+                length = min(len(seq1), len(seq2))
+                positions = sorted(sample(range(length + 1),
+                                          min(cuts, length + 1)))
+            else:
+                positions = sorted([int(p) for p in points[x]])
+            positions = [0] + positions + [max(len(seq1), len(seq2))]
+            new1 = []
+            new2 = []
+            for i in range(len(positions) - 1):
+                (start, end) = (positions[i], positions[i + 1])
+                if i % 2 == 0:
+                    new1.extend(seq1[start:end])
+                    new2.extend(seq2[start:end])
+                else:
+                    new1.extend(seq2[start:end])
+                    new2.extend(seq1[start:end])
+        else:
+            length = min(len(seq1), len(seq2))
+            mask = [uniform() < rate for i in range(length)]
+            new1 = [seq2[i] if mask[i] else seq1[i]
+                    for i in range(length)] + list(seq1[length:])
+            new2 = [seq1[i] if mask[i] else seq2[i]
+                    for i in range(length)] + list(seq2[length:])
+        chromosome1 = chromosomes[index1]
+        chromosome2 = chromosomes[index2]
+        offspring[x] = (chromosome1.__class__(new1, chromosome1.base,
+                                  chromosome1.background_mutation),
+                        chromosome2.__class__(new2, chromosome2.base,
+                                  chromosome2.background_mutation))
+    return offspring
+
+def sample_indices(size, count, weights=None):
+    """
+    Samples indices (with replacement) of a list of a given size, either
+    uniformly or in proportion to weights. All indices are drawn in one
+    pass, taking O(size + count log size) time.
+
+    @param size: size of the list to sample from.
+    @type size: integer
+    @param count: number of indices to sample.
+    @type count: integer
+    @param weights: list of non-negative weights (such as fitness scores),
+        one for each element in the list. Default = None (uniform).
+    @return: list of indices
+
+    @since: version 1.1
+    """
+    randrange = random.randrange
+    if weights is None:
+        return [randrange(size) for x in range(count)]
+    cumulative = [0.0] * size
+    total = 0.0
+    for index in range(size):
+        total = total + float(weights[index])
+        cumulative[index] = total
+    if total <= 0.0:
+        return [randrange(size) for x in range(count)]
+    uniform = random.random
+    last = size - 1
+    return [min(bisect_right(cumulative, uniform() * total), last)
+            for x in range(count)]
+
+def fossil_indices(size, proportion):
+    """
+    Samples the indices of organisms to preserve from a population (see 
+    Population.freeze). If the population size or the preserved proportion 
+    is below 101, all indices are given. Only the indices are sampled; 
+    hence, the sampled organisms can be preserved without copying the 
+    population.
+
+    @param size: population size.
+    @type size: integer
+    @param proportion: proportion of the population to be preserved.
+    @return: list of indices
+
+    @since: version 1.1
+    """
+    if proportion > 1.0: proportion = 1.0
+    if size < 101 or size * proportion < 101: return list(range(size))
+    return sample_indices(size, int(size * proportion))
+
+def bulk_mating(agents, size, scheme='sexual', weights=None,
+                generation=None, lineage=None):
+    """
+    Generates offspring for the next generation in one pass. Parents are
+    sampled (with replacement) from agents, either uniformly or in
+    proportion to weights, and the list of offspring is preallocated;
+    hence, the time taken is linear to the number of offspring.
+
+    Mating schemes:
+        - 'sexual': each offspring has 2 parents and inherits the first
+        product of a random single-point crossover (see crossover) of each
+        pair of chromosomes.
+        - 'asexual': each offspring has 1 parent and inherits a copy of
+        the parent's genome.
+
+    Each offspring is of the same class as its (first) parent, inherits the
+    parent's mutation type, additional mutation rate, deme and location,
+    and stores the identities of its parent(s) in status['parents']. If
+    a lineage registry (lineage.Lineage object) is given, offspring will
+    be registered and named by the registry; otherwise,
+    Organism.generate_name will be used.
+
+    @param agents: list of parent organisms, such as Population.agents.
+    @param size: number of offspring to generate.
+    @type size: integer
+    @param scheme: mating scheme. Accepts 'sexual' or 'asexual'.
+        Default = 'sexual'.
+    @param weights: list of mating weights (such as fitness scores), one
+        for each parent organism. Default = None (uniform).
+    @param generation: generation count to set in the offspring's status.
+        Default = None (generation of first parent).
+    @param lineage: lineage registry (lineage.Lineage object), such as
+        Population.lineage. Default = None.
+    @return: list of offspring organisms
+
+    @since: version 1.1
+    """
+    if scheme not in ('sexual', 'asexual'):
+        raise ValueError('Unknown mating scheme: %s' % str(scheme))
+    size = int(size)
+    first = sample_indices(len(agents), size, weights)
+    if scheme == 'sexual':
+        second = sample_indices(len(agents), size, weights)
+    randint = random.randint
+    offspring = [None] * size
+    for x in range(size):
+        parent1 = agents[first[x]]
+        if scheme == 'sexual':
+            parent2 = agents[second[x]]
+            parents = [parent1, parent2]
+            genome = [None] * len(parent1.genome)
+            for i in range(len(parent1.genome)):
+                chromosome = parent1.genome[i]
+                position = randint(0, len(chromosome.sequence))
+                genome[i] = crossover(chromosome, parent2.genome[i],
+                                      position)[0]
+        else:
+            parents = [parent1]
+            # shared (copy-on-write) sequences need not be copied
+            genome = [chromosome.__class__(
+                          share_sequence(chromosome.sequence),
+                          chromosome.base, chromosome.background_mutation)
+                      for chromosome in parent1.genome]
+        child = parent1.__class__(genome, parent1.mutation_type,
+                                  parent1.additional_mutation_rate)
+        status = child.status
+        status['deme'] = parent1.status['deme']
+        status['location'] = parent1.status['location']
+        if generation is None:
+            status['generation'] = parent1.status['generation']
+        else:
+            status['generation'] = generation
+        if lineage is None:
+            status['parents'] = [parent.status['identity']
+                                 for parent in parents]
+            child.generate_name()
+        else:
+            lineage.register_organism(child, parents)
+        offspring[x] = child
+    return offspring
+
+def assemble_agents(groups):
+    """
+    Assembles a list of agents for the next generation from groups of
+    organisms (such as survivors and offspring) into one preallocated
+    list, taking linear time to the total number of organisms.
+
+    @param groups: list of lists of organisms.
+    @return: list of organisms
+
+    @since: version 1.1
+    """
+    agents = [None] * sum([len(group) for group in groups])
+    start = 0
+    for group in groups:
+        agents[start:start + len(group)] = group
+        start = start + len(group)
+    return agents
+
+def genome_key(organism):
+    """
+    Generates a hashable key of the genome of an organism, which is equal 
+    for organisms with identical genomes - the fingerprint (see 
+    Chromosome.fingerprint) and length of each chromosome. Fingerprints 
+    are kept up to date by the sequences; hence, the key is made without 
+    reading the sequences. Different sequences of the same length have the 
+    same fingerprint with a probability of about 1 in 2**61.
+
+    @param organism: Organism object
+    @return: tuple of (fingerprint, length) of each chromosome
+
+    @since: version 1.1
+    """
+    return tuple([(chromosome.fingerprint(), len(chromosome.sequence)) 
+                  for chromosome in organism.genome])
+
+def genome_groups(agents):
+    """
+    Groups organisms with identical genomes (see genome_key) as multisets 
+    of clones - each group is a list of organisms where the first organism 
+    is the representative of the group, and the number of clones is the 
+    length of the list. The groups are in the order of their 
+    representatives in the list of agents, and each organism keeps its 
+    own status (such as location and age).
+
+    The organisms are not changed. Clones share their sequences from 
+    birth, when they are reproduced asexually (see bulk_mating and 
+    share_sequence), until their sequences are changed.
+
+    @param agents: list of organisms
+    @return: list of groups of organisms
+
+    @since: version 1.1
+    """
+    groups = {}
+    order = []
+    for organism in agents:
+        key = genome_key(organism)
+        if key in groups:
+            groups[key].append(organism)
+        else:
+            groups[key] = [organism]
+            order.append(key)
+    return [groups[key] for key in order]
+
 population_data = \
 {
     'chromosome_bases' : [1, 2, 3, 4],
@@ -677,7 +1920,8 @@ population_data = \
     'mating' : 'default',
     'postpopulation_control' : 'default',
     'generation_events' : 'default',
-    'population_report' : 'default'
+    'population_report' : 'default',
+    'organism_type' : 'default'
 }
 
 def population_constructor(data=population_data):
@@ -689,7 +1933,10 @@ def population_constructor(data=population_data):
         - 'chromosome_bases' = List of allowable bases. 
             Default = [1, 2, 3, 4].
         - 'chromosome_length' = Length of a chromosome. Default = 200.
-        - 'chromosome_type' = Type of chromosome. Default = 'defined'.
+        - 'chromosome_type' = Type of chromosome. Accepts 'defined' (use 
+            'initial_chromosome') or 'random' (random sequences of the same 
+            length as 'initial_chromosome'; only used by 
+            template_population_constructor). Default = 'defined'.
         - 'initial_chromosome' = Initial chromosome. Default = [1] * 200.
         - 'background_mutation' = Background mutation rate. 
             Default = 0.0001 (0.01%).
@@ -720,6 +1967,10 @@ def population_constructor(data=population_data):
             Population. Default = 'default'.
         - 'population_report' = Function to generate the status report of 
             the generation. Please refer to Population. Default = 'default'.
+        - 'organism_type' = Type of organism to construct. Accepts 
+            'default' (Organism and Chromosome) or 'lean' (LeanOrganism and 
+            LeanChromosome, for very large populations). This key is 
+            optional. Default = 'default'.
         
     @param data: population data
     @type data: dictionary
@@ -732,17 +1983,110 @@ def population_constructor(data=population_data):
     
     @since: version 0.4
     """
-    chr = Chromosome(data['initial_chromosome'], 
-                     data['chromosome_bases'],
-                     data['background_mutation'])
-    org = Organism([chr]*data['genome_size'],
-                   data['mutation_type'],
-                   data['additional_mutation'])
+    if 'organism_type' in data and data['organism_type'] == 'lean':
+        (chromosome_class, organism_class) = (LeanChromosome, LeanOrganism)
+    else:
+        (chromosome_class, organism_class) = (Chromosome, Organism)
+    chr = chromosome_class(data['initial_chromosome'], 
+                           data['chromosome_bases'],
+                           data['background_mutation'])
+    org = organism_class([chr]*data['genome_size'],
+                         data['mutation_type'],
+                         data['additional_mutation'])
     org_set = [org.clone() for x in range(data['population_size'])]
     pop = Population(data['goal'], 
                      int(data['maximum_generations']), 
                      org_set)
     return pop
+
+def generate_names(count):
+    """
+    Generates 32-character random names (as Organism.generate_name) for a
+    number of organisms in one pass.
+
+    @param count: number of names to generate.
+    @type count: integer
+    @return: list of names
+
+    @since: version 1.1
+    """
+    characters = ''.join(random.choices(name_characters, k=32 * int(count)))
+    return [characters[x:x + 32] for x in range(0, len(characters), 32)]
+
+def template_population_constructor(data=population_data, deme=None,
+                                    lineage=None):
+    """
+    Function to construct a population based on a dictionary of population
+    data (see population_constructor) without deep-copying a template
+    organism for each organism. This is much faster than
+    population_constructor for large populations or chromosomes.
+
+    All organisms share the initial chromosomal sequence, which is copied 
+    into a list by the first change of each chromosome (copy-on-write; see 
+    SharedSequence). If 'chromosome_type' in population
+    data is 'random', each chromosome will instead be given a random
+    sequence of the same length as 'initial_chromosome', drawn from
+    'chromosome_bases' for all organisms in one pass.
+
+    Organism identities are assigned in bulk - by the lineage registry if
+    given, or as 32-character random names otherwise; and the deme status
+    of every organism is set in the same pass.
+
+    @param data: population data (see population_constructor)
+    @type data: dictionary
+    @param deme: deme (sub-population name) of organisms. Default = None.
+    @param lineage: lineage registry (lineage.Lineage object) to assign
+        organism identities. Default = None.
+    @return: Population object
+
+    @since: version 1.1
+    """
+    if 'organism_type' in data and data['organism_type'] == 'lean':
+        (chromosome_class, organism_class) = (LeanChromosome, LeanOrganism)
+    else:
+        (chromosome_class, organism_class) = (Chromosome, Organism)
+    size = int(data['population_size'])
+    genome_size = int(data['genome_size'])
+    bases = data['chromosome_bases']
+    background_mutation = data['background_mutation']
+    mutation_type = data['mutation_type']
+    additional_mutation = data['additional_mutation']
+    initial = tuple(data['initial_chromosome'])
+    length = len(initial)
+    randomize = 'chromosome_type' in data and \
+        data['chromosome_type'] == 'random'
+    if randomize:
+        pool = random.choices(bases, k=size * genome_size * length)
+    else:
+        # fingerprint of the shared sequence (see Chromosome.fingerprint)
+        initial_fingerprint = sequence_fingerprint(initial)
+    if lineage is None:
+        names = generate_names(size)
+    else:
+        names = [lineage.name(identity)
+                 for identity in lineage.register_bulk(size)]
+    org_set = [None] * size
+    for x in range(size):
+        if randomize:
+            start = x * genome_size * length
+            genome = [chromosome_class(pool[start + (i * length):
+                                            start + ((i + 1) * length)],
+                                       bases, background_mutation)
+                      for i in range(genome_size)]
+        else:
+            genome = [chromosome_class(SharedSequence(initial, 
+                                                      initial_fingerprint), 
+                                       bases, background_mutation)
+                      for i in range(genome_size)]
+        org = organism_class(genome, mutation_type, additional_mutation)
+        org.status['identity'] = names[x]
+        org.status['deme'] = deme
+        org_set[x] = org
+    pop = Population(data['goal'],
+                     int(data['maximum_generations']),
+                     org_set)
+    pop.lineage = lineage
+    return pop
     
 def population_simulate(population, 
                         printfreq=100, 
@@ -0,0 +1,334 @@
+'''
+Lineage registry for DOSE (digital organism simulation environment).
+
+A lineage registry assigns a compact integer identity to every organism
+in a simulation, in order of birth, and records the identities of its
+parents and the generation of its birth in append-only arrays. The
+organism's name (Organism.status['identity']) is derived from the integer
+identity, and the integer identity can be derived from the name; hence,
+no name lookup table is needed. This allows for ancestry and descendant
+queries without scanning the population(s) or the logging database.
+
+Date created: 19th October 2026
+'''
+from array import array
+
+name_characters = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+def decode_name(name, prefix='org_'):
+    '''
+    Derives the integer identity from a name derived by a lineage registry.
+
+    @param name: name of the organism
+    @param prefix: prefix of names derived by the lineage registry.
+    Default = 'org_'.
+    @return: integer identity or -1 if the name is not derived by a
+    lineage registry
+    '''
+    if not name.startswith(prefix) or len(name) == len(prefix):
+        return -1
+    identity = 0
+    for character in name[len(prefix):]:
+        value = name_characters.find(character)
+        if value == -1: return -1
+        identity = (identity * 62) + value
+    return identity
+
+class Lineage(object):
+    '''
+    Per-simulation lineage registry. Each organism can have up to 2
+    parents (asexual or sexual reproduction); an unknown or absent parent
+    is recorded as -1.
+
+    Names derived by the registry are made up of a prefix followed by the
+    integer identity in base 62; for example, org_1A is identity 72.
+    Names which were not derived by the registry (for example, the
+    32-character names generated by Organism.generate_name) can still be
+    registered and will be given the next available identity.
+    '''
+    def __init__(self, prefix='org_'):
+        '''
+        Sets up an empty lineage registry.
+
+        @param prefix: prefix of names derived by the registry. Default =
+        'org_'. The prefix should contain a character which is not used
+        by Organism.generate_name (such as '_') to prevent clashes with
+        randomly generated names.
+        '''
+        self.prefix = prefix
+        self.parent1 = array('q')
+        self.parent2 = array('q')
+        self.birth_generation = array('q')
+        self.foreign_identity = {}
+        self.foreign_name = {}
+        self._children = {}
+        self._indexed = 0
+
+    def __len__(self):
+        return len(self.birth_generation)
+
+    def register(self, parents=(), generation=0):
+        '''
+        Assigns a new integer identity and records its parentage.
+
+        @param parents: integer identities of parent(s), up to 2.
+        Default = no parent.
+        @param generation: generation of birth. Default = 0.
+        @return: integer identity
+        '''
+        parents = list(parents)[:2] + [-1, -1]
+        self.parent1.append(int(parents[0]))
+        self.parent2.append(int(parents[1]))
+        self.birth_generation.append(int(generation))
+        return len(self.birth_generation) - 1
+
+    def register_bulk(self, count, parents=(), generation=0):
+        '''
+        Assigns a block of consecutive integer identities which share the
+        same parentage, such as the founders of a population.
+
+        @param count: number of identities to assign.
+        @param parents: integer identities of parent(s), up to 2.
+        Default = no parent.
+        @param generation: generation of birth. Default = 0.
+        @return: range of integer identities
+        '''
+        start = len(self.birth_generation)
+        parents = list(parents)[:2] + [-1, -1]
+        count = int(count)
+        self.parent1.extend(array('q', [int(parents[0])]) * count)
+        self.parent2.extend(array('q', [int(parents[1])]) * count)
+        self.birth_generation.extend(array('q', [int(generation)]) * count)
+        return range(start, start + count)
+
+    def register_organism(self, organism, parents=None, generation=None):
+        '''
+        Registers an organism - assigns a new identity and sets
+        Organism.status['identity'] to the derived name. If parents are
+        given, Organism.status['parents'] will be set to the list of
+        parents' names.
+
+        @param organism: genetic.Organism object to register.
+        @param parents: list of parent organisms (genetic.Organism objects)
+        or names of parent organisms. Default = None (no parent).
+        @param generation: generation of birth. Default = None, which
+        uses Organism.status['generation'].
+        @return: integer identity
+        '''
+        if generation is None:
+            generation = organism.status['generation']
+        if parents:
+            names = [str(parent) if isinstance(parent, str)
+                     else parent.status['identity']
+                     for parent in parents]
+            identities = [self.identity(name) for name in names]
+            organism.status['parents'] = names
+        else:
+            identities = ()
+        identity = self.register(identities, generation)
+        organism.status['identity'] = self.name(identity)
+        return identity
+
+    def name(self, identity):
+        '''
+        Derives the name of an organism from its integer identity.
+
+        @param identity: integer identity
+        @return: name of the organism
+        '''
+        identity = int(identity)
+        if identity in self.foreign_name:
+            return self.foreign_name[identity]
+        if identity == 0:
+            return self.prefix + name_characters[0]
+        digits = []
+        while identity > 0:
+            (identity, remainder) = divmod(identity, 62)
+            digits.append(name_characters[remainder])
+        digits.reverse()
+        return self.prefix + ''.join(digits)
+
+    def identity(self, name):
+        '''
+        Derives the integer identity of an organism from its name.
+
+        @param name: name of the organism (Organism.status['identity'])
+        @return: integer identity or -1 if the name is not known to this
+        registry
+        '''
+        name = str(name)
+        if name in self.foreign_identity:
+            return self.foreign_identity[name]
+        identity = decode_name(name, self.prefix)
+        if identity >= len(self.birth_generation):
+            return -1
+        return identity
+
+    def register_name(self, name, parents=(), generation=0):
+        '''
+        Registers a name that is not derived by this registry, such as a
+        name generated by Organism.generate_name.
+
+        @param name: name of the organism
+        @param parents: integer identities of parent(s), up to 2.
+        Default = no parent.
+        @param generation: generation of birth. Default = 0.
+        @return: integer identity
+        '''
+        identity = self.register(parents, generation)
+        self.foreign_identity[str(name)] = identity
+        self.foreign_name[identity] = str(name)
+        return identity
+
+    def parents(self, identity):
+        '''
+        Returns the integer identities of the parent(s) of an organism.
+
+        @param identity: integer identity
+        @return: tuple of integer identities of known parents
+        '''
+        return tuple([parent
+                      for parent in (self.parent1[identity],
+                                     self.parent2[identity])
+                      if parent > -1])
+
+    def generation(self, identity):
+        '''
+        Returns the generation of birth of an organism.
+
+        @param identity: integer identity
+        @return: generation of birth
+        '''
+        return self.birth_generation[identity]
+
+    def ancestors(self, identity, generations=None):
+        '''
+        Returns all ancestors of an organism.
+
+        @param identity: integer identity
+        @param generations: number of generations to trace back. Default =
+        None, which traces back to the founders.
+        @return: set of integer identities
+        '''
+        found = set()
+        current = [identity]
+        depth = 0
+        while current and (generations is None or depth < generations):
+            parents = []
+            for member in current:
+                for parent in (self.parent1[member], self.parent2[member]):
+                    if parent > -1 and parent not in found:
+                        found.add(parent)
+                        parents.append(parent)
+            current = parents
+            depth = depth + 1
+        return found
+
+    def _index_children(self):
+        '''
+        Extends the parent-to-children index with organisms registered
+        since the previous descendant query.
+        '''
+        children = self._children
+        for member in range(self._indexed, len(self.birth_generation)):
+            for parent in (self.parent1[member], self.parent2[member]):
+                if parent > -1:
+                    if parent in children:
+                        children[parent].append(member)
+                    else:
+                        children[parent] = [member]
+        self._indexed = len(self.birth_generation)
+
+    def children(self, identity):
+        '''
+        Returns the offspring of an organism.
+
+        @param identity: integer identity
+        @return: list of integer identities
+        '''
+        self._index_children()
+        return list(self._children.get(identity, []))
+
+    def descendants(self, identity, generations=None):
+        '''
+        Returns all descendants of an organism.
+
+        @param identity: integer identity
+        @param generations: number of generations to trace forward.
+        Default = None, which traces forward to the latest registered
+        organisms.
+        @return: set of integer identities
+        '''
+        self._index_children()
+        children = self._children
+        found = set()
+        current = [identity]
+        depth = 0
+        while current and (generations is None or depth < generations):
+            offspring = []
+            for member in current:
+                for child in children.get(member, []):
+                    if child not in found:
+                        found.add(child)
+                        offspring.append(child)
+            current = offspring
+            depth = depth + 1
+        return found
+
+def db_reconstruct_lineage(cur, start_time, population_name=None,
+                           prefix='org_'):
+    '''
+    Function to reconstruct the lineage registry of a simulation (as
+    identified by the starting time of the simulation) from the logging
+    database. Each organism is registered at the first generation it was
+    logged. Names derived by a lineage registry during the simulation
+    keep their integer identities; other names are given new identities.
+    Integer identities which were not logged (such as organisms of other 
+    populations) are recorded with generation of birth of -1.
+
+    @param cur: Database cursor from connect_database() function.
+    @param start_time: Starting time of current simulation in the format
+    of <date>-<seconds since epoch>; for example, 2013-10-11-1381480985.77.
+    @param population_name: Name of the population to reconstruct.
+    Default = None, which reconstructs all populations.
+    @param prefix: prefix of names derived by the lineage registry during
+    the simulation. Default = 'org_'.
+    @return: Lineage object
+    '''
+    if population_name is None:
+        cur.execute("""select org_name, min(cast(generation as integer)),
+                    value from organisms where start_time = ? and
+                    key = 'parents' group by org_name""",
+                    (str(start_time),))
+    else:
+        cur.execute("""select org_name, min(cast(generation as integer)),
+                    value from organisms where start_time = ? and
+                    pop_name = ? and key = 'parents' group by org_name""",
+                    (str(start_time), str(population_name)))
+    records = [(str(r[0]), int(r[1]), str(r[2])) for r in cur.fetchall()]
+    registry = Lineage(prefix)
+    # names derived by a lineage registry during the simulation keep 
+    # their integer identities
+    decoded = {}
+    maximum = -1
+    for (name, generation, parents) in records:
+        identity = decode_name(name, prefix)
+        if identity > -1:
+            decoded[name] = identity
+            if identity > maximum: maximum = identity
+    registry.parent1.extend(array('q', [-1]) * (maximum + 1))
+    registry.parent2.extend(array('q', [-1]) * (maximum + 1))
+    registry.birth_generation.extend(array('q', [-1]) * (maximum + 1))
+    for (name, generation, parents) in records:
+        if name in decoded:
+            registry.birth_generation[decoded[name]] = generation
+        else:
+            registry.register_name(name, (), generation)
+    for (name, generation, parents) in records:
+        if parents in ('', 'None', '[]'): continue
+        identities = [registry.identity(parent)
+                      for parent in parents.split('|')] + [-1, -1]
+        identity = registry.identity(name)
+        registry.parent1[identity] = identities[0]
+        registry.parent2[identity] = identities[1]
+    return registry
@@ -0,0 +1,117 @@
+'''
+File containing support functions for migration of organisms between
+ecological cells, to be used within dose.dose_functions.organism_movement
+and dose.dose_functions.organism_location functions. For example, adjacent
+migration of 10% of the organisms in each populated cell is
+
+    dose.migrate(Populations[pop_name].agents, 0.1, World.topology(), World)
+
+Date created: 19th October 2026
+'''
+import random
+
+from . import population_index
+
+def emigration_rate(rates, location):
+    '''
+    Gets the emigration rate of an ecological cell.
+
+    @param rates: emigration rate(s) - a number for all cells, a dictionary
+    of rates with location (x,y,z) as key (cells which are not in the
+    dictionary have no emigration), or a function which takes a location
+    and returns the rate
+    @param location: location of ecological cell as (x,y,z)
+    @return: emigration rate (float)
+    '''
+    if callable(rates): return float(rates(location))
+    if isinstance(rates, dict): return float(rates.get(location, 0))
+    return float(rates)
+
+def destination_cells(neighbours, location):
+    '''
+    Gets the list of destination cells of emigrants from an ecological cell.
+
+    @param neighbours: topology - a dictionary of lists of destination
+    cells with location (x,y,z) as key, or a function which takes a
+    location and returns the list of destination cells
+    @param location: location of ecological cell as (x,y,z)
+    @return: list of locations of destination cells
+    '''
+    if callable(neighbours): return list(neighbours(location))
+    return list(neighbours.get(location, []))
+
+def location_groups(agents, locations=None):
+    '''
+    Groups organisms by location, in one pass through the organisms or
+    from the index of the population (see genetic.Population.index).
+
+    @param agents: list of organisms, such as Population.agents
+    @param locations: list of locations (x,y,z) to group. Default = None
+    (all locations).
+    @return: dictionary of lists of organisms with location (x,y,z) as key
+    '''
+    index = population_index.agent_index(agents, 'location')
+    if index is not None and locations is not None:
+        groups = {}
+        for location in locations:
+            group = index.lookup(location)
+            if group: groups[location] = group
+        return groups
+    if locations is not None: locations = set(locations)
+    groups = {}
+    for organism in agents:
+        location = organism.status.get('location')
+        if location is None: continue
+        location = (location[0], location[1], location[2])
+        if locations is not None and location not in locations: continue
+        if location in groups: groups[location].append(organism)
+        else: groups[location] = [organism]
+    return groups
+
+def migrate(agents, rates, neighbours, World=None):
+    '''
+    Migrates organisms between ecological cells. In each populated cell,
+    round(number of organisms x emigration rate) organisms are randomly
+    selected without replacement and moved to randomly selected
+    destination cells. All emigrants are selected before any organism is
+    moved; hence, an organism moves at most once per call. The location
+    of each emigrant (Organism.status['location']) is updated and, if
+    World is given, the number of organisms in each ecological cell
+    (World.ecosystem[x][y][z]['organisms']) is updated accordingly.
+    Cells without destination cells have no emigration.
+
+    @param agents: list of organisms, such as Population.agents
+    @param rates: emigration rate(s) - a number for all cells, a dictionary
+    of rates with location (x,y,z) as key (cells which are not in the
+    dictionary have no emigration), or a function which takes a location
+    and returns the rate
+    @param neighbours: topology - a dictionary of lists of destination
+    cells with location (x,y,z) as key, or a function which takes a
+    location and returns the list of destination cells (such as
+    topology.Topology objects)
+    @param World: dose_world.World object. Default = None (number of
+    organisms in ecological cells is not updated).
+    @return: list of migrations as (organism, origin, destination)
+    '''
+    if isinstance(rates, dict): groups = location_groups(agents, rates)
+    else: groups = location_groups(agents)
+    migrations = []
+    for location in groups:
+        group = groups[location]
+        rate = emigration_rate(rates, location)
+        count = min(int(round(len(group) * rate)), len(group))
+        if count <= 0: continue
+        destinations = destination_cells(neighbours, location)
+        if not destinations: continue
+        for organism in random.sample(group, count):
+            destination = random.choice(destinations)
+            destination = (destination[0], destination[1], destination[2])
+            migrations.append((organism, location, destination))
+    for (organism, origin, destination) in migrations:
+        organism.status['location'] = destination
+        if World is not None:
+            (x, y, z) = origin
+            World.ecosystem[x][y][z]['organisms'] -= 1
+            (x, y, z) = destination
+            World.ecosystem[x][y][z]['organisms'] += 1
+    return migrations
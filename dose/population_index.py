@@ -0,0 +1,367 @@
+'''
+Indexes of organisms in a population by status (such as location, deme or
+gender) for DOSE (digital organism simulation environment).
+
+Population.agents of a genetic.Population object is an AgentList, which
+notifies the population of organisms being added or removed; and the status
+of each indexed organism notifies the population of status changes (see
+TrackedStatus and genetic.OrganismStatus). Hence, indexes are updated
+incrementally as the simulation changes the population, and organisms
+with a specific status can be listed or randomly sampled without scanning
+the population. Organisms inserted, replaced or reordered other than at
+the end of Population.agents are added to or removed from the indexes at
+once, but the order of the organisms in the indexes is only renumbered
+when an index is next looked up. The indexes are not kept when organisms
+or populations are copied or pickled.
+
+To track status changes, the status table (dictionary) of each organism in
+an indexed population is replaced by a TrackedStatus - a dictionary which
+is copied or pickled as a dictionary - when the population is first
+indexed. This happens on the first look up of Population.agents by
+dose.filter_deme, dose.filter_gender, dose.filter_location or
+migration.location_groups; status tables are replaced in place, so other
+references to the replaced dictionaries are no longer updated.
+
+Date created: 19th October 2026
+'''
+import random
+
+def index_key(value):
+    '''
+    Converts a status value into a hashable key for indexing. Values which
+    are equal give the same key; lists are converted into keys which are
+    different from tuples as lists are not equal to tuples.
+
+    @param value: status value
+    @return: hashable key
+    '''
+    if isinstance(value, list):
+        return (list, tuple([index_key(item) for item in value]))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return (type(value), repr(value))
+
+def upper_key(value):
+    '''
+    Converts a status value into a case-insensitive key for indexing, such
+    as deme or gender (see dose.filter_deme and dose.filter_gender).
+
+    @param value: status value
+    @return: hashable key
+    '''
+    if isinstance(value, str):
+        return value.upper()
+    return index_key(value)
+
+def notify_watchers(status, keys):
+    '''
+    Notifies the populations watching a status table of changes.
+
+    @param status: status table (TrackedStatus or genetic.OrganismStatus)
+    @param keys: list of changed status keys
+    '''
+    watchers = getattr(status, '_watchers', None)
+    if not watchers: return
+    for (population, organism) in list(watchers):
+        for key in keys:
+            population.status_changed(organism, key)
+
+class TrackedStatus(dict):
+    '''
+    Status table (dictionary) of an organism which notifies the
+    population(s) indexing the organism of status changes. TrackedStatus
+    is copied or pickled as a dictionary.
+    '''
+    __slots__ = ('_watchers',)
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._watchers = []
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        if self._watchers: notify_watchers(self, [key])
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        if self._watchers: notify_watchers(self, [key])
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        changes = dict(*args, **kwargs)
+        dict.update(self, changes)
+        if self._watchers: notify_watchers(self, list(changes.keys()))
+
+    def setdefault(self, key, default=None):
+        if key in self: return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        present = key in self
+        value = dict.pop(self, key, *default)
+        if present and self._watchers: notify_watchers(self, [key])
+        return value
+
+    def popitem(self):
+        (key, value) = dict.popitem(self)
+        if self._watchers: notify_watchers(self, [key])
+        return (key, value)
+
+    def clear(self):
+        keys = list(self.keys())
+        dict.clear(self)
+        if self._watchers: notify_watchers(self, keys)
+
+class AgentList(list):
+    '''
+    List of organisms of a population (Population.agents) which notifies
+    the population of organisms being added or removed. AgentList is
+    copied or pickled as a list.
+    '''
+    __slots__ = ('_population',)
+
+    def __init__(self, agents=(), population=None):
+        list.__init__(self, agents)
+        self._population = population
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def _added(self, organisms):
+        if self._population is not None:
+            self._population.agents_added(organisms)
+
+    def _removed(self, organisms, last=False):
+        if self._population is not None:
+            self._population.agents_removed(organisms, last)
+
+    def _replaced(self, removed, added):
+        if self._population is not None:
+            self._population.agents_replaced(removed, added)
+
+    def _reordered(self):
+        if self._population is not None:
+            self._population.agents_reordered()
+
+    def append(self, organism):
+        list.append(self, organism)
+        self._added([organism])
+
+    def extend(self, organisms):
+        organisms = list(organisms)
+        list.extend(self, organisms)
+        self._added(organisms)
+
+    def __iadd__(self, organisms):
+        self.extend(organisms)
+        return self
+
+    def remove(self, organism):
+        list.remove(self, organism)
+        self._removed([organism])
+
+    def pop(self, *index):
+        organism = list.pop(self, *index)
+        if len(index) == 0 or index[0] == -1 or index[0] == len(self):
+            self._removed([organism], True)
+        else:
+            self._replaced([organism], [])
+        return organism
+
+    def clear(self):
+        organisms = list(self)
+        list.clear(self)
+        self._replaced(organisms, [])
+
+    def insert(self, index, organism):
+        list.insert(self, index, organism)
+        self._replaced([], [organism])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            removed = list.__getitem__(self, index)
+            value = list(value)
+            list.__setitem__(self, index, value)
+            self._replaced(removed, value)
+        else:
+            removed = list.__getitem__(self, index)
+            list.__setitem__(self, index, value)
+            self._replaced([removed], [value])
+
+    def __delitem__(self, index):
+        removed = list.__getitem__(self, index)
+        if not isinstance(index, slice): removed = [removed]
+        list.__delitem__(self, index)
+        self._replaced(removed, [])
+
+    def __imul__(self, count):
+        organisms = list(self)
+        list.__imul__(self, count)
+        if len(self) == 0: self._replaced(organisms, [])
+        else: self._added(organisms * (len(self) // len(organisms) - 1))
+        return self
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._reordered()
+
+    def reverse(self):
+        list.reverse(self)
+        self._reordered()
+
+class AgentIndex(object):
+    '''
+    Index of the organisms of a population by the value of one status,
+    with constant-time random sampling from each group of organisms. An
+    index is created and updated by its population (see
+    genetic.Population.index), and organisms are listed in the order of
+    the population.
+    '''
+    def __init__(self, status_key, key_function=index_key):
+        '''
+        Sets up an empty index.
+
+        @param status_key: status key to index
+        @param key_function: function to convert status value into a
+        hashable key. Default = index_key.
+        '''
+        self.status_key = status_key
+        self.key_function = key_function
+        self.population = None
+        self.entries = None
+        self.buckets = {}
+        self.positions = {}
+        self.keys = {}
+
+    def _key(self, organism):
+        return self.key_function(organism.status.get(self.status_key))
+
+    def add(self, entry, organism):
+        '''
+        Adds an occurrence of an organism into the index.
+
+        @param entry: sequence number of the occurrence, which gives the
+        order of the organisms in the population
+        @param organism: organism to add
+        '''
+        key = self._key(organism)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = []
+            self.buckets[key] = bucket
+        self.positions[entry] = len(bucket)
+        bucket.append(entry)
+        self.keys[entry] = key
+
+    def discard(self, entry):
+        '''
+        Removes an occurrence of an organism from the index.
+
+        @param entry: sequence number of the occurrence
+        '''
+        key = self.keys.pop(entry)
+        bucket = self.buckets[key]
+        position = self.positions.pop(entry)
+        last = bucket.pop()
+        if last != entry:
+            bucket[position] = last
+            self.positions[last] = position
+        if not bucket: del self.buckets[key]
+
+    def move(self, entry, organism):
+        '''
+        Moves an occurrence of an organism to the group of its current
+        status value.
+
+        @param entry: sequence number of the occurrence
+        @param organism: organism of the occurrence
+        '''
+        if self.keys.get(entry) != self._key(organism):
+            self.discard(entry)
+            self.add(entry, organism)
+
+    def renumber(self, numbers, entries):
+        '''
+        Renumbers the occurrences of organisms in the index (see
+        genetic.Population.reorder).
+
+        @param numbers: dictionary of new sequence numbers with the
+        current sequence numbers as key
+        @param entries: dictionary of organisms with the new sequence
+        numbers as key
+        '''
+        self.entries = entries
+        self.buckets = dict([(key, [numbers[entry] for entry in bucket])
+                             for (key, bucket) in self.buckets.items()])
+        self.positions = {}
+        for bucket in self.buckets.values():
+            for (position, entry) in enumerate(bucket):
+                self.positions[entry] = position
+        self.keys = dict([(numbers[entry], key)
+                          for (entry, key) in self.keys.items()])
+
+    def lookup(self, value):
+        '''
+        Lists the organisms with a status value.
+
+        @param value: status value
+        @return: list of organisms, in the order of the population
+        '''
+        if self.population is not None: self.population.reorder()
+        bucket = self.buckets.get(self.key_function(value))
+        if not bucket: return []
+        entries = self.entries
+        return [entries[entry] for entry in sorted(bucket)]
+
+    def count(self, value):
+        '''
+        Counts the organisms with a status value.
+
+        @param value: status value
+        @return: number of organisms
+        '''
+        return len(self.buckets.get(self.key_function(value), ()))
+
+    def sample(self, value):
+        '''
+        Randomly selects an organism with a status value in constant time.
+
+        @param value: status value
+        @return: organism, or None if there is no organism with the value
+        '''
+        bucket = self.buckets.get(self.key_function(value))
+        if not bucket: return None
+        return self.entries[random.choice(bucket)]
+
+    def values(self):
+        '''
+        Lists the keys of the status values of the indexed organisms.
+
+        @return: list of keys (see index_key)
+        '''
+        return list(self.buckets.keys())
+
+def agent_index(agents, status_key, key_function=index_key):
+    '''
+    Gives the index of a list of organisms if the list is Population.agents
+    of a population which can be indexed (see genetic.Population.index).
+
+    @param agents: list of organisms
+    @param status_key: status key to index
+    @param key_function: function to convert status value into a hashable
+    key. Default = index_key.
+    @return: AgentIndex object, or None if the list cannot be indexed
+    '''
+    population = getattr(agents, '_population', None)
+    if population is None or population.agents is not agents:
+        return None
+    return population.index(status_key, key_function)
@@ -0,0 +1,309 @@
+'''
+File containing a concurrent runner of replicate simulations for DOSE
+(digital organism simulation environment). Replicates of a simulation
+(the same simulation parameters and simulation functions) are run with
+different random seeds in a pool of processes. For example,
+
+    results = dose.run_replicates(parameters, simulation_functions, 10)
+
+Each replicate is named <simulation name>_rep<replicate number>; hence,
+each replicate has its own simulation file directory, and its own
+simulation (starting time) in the logging database. As SQLite databases
+are written by one process at a time, each replicate is logged into its
+own database file, which is merged into the logging database of the
+simulation parameters ("database_file") when the replicate is completed
+(see database_calls.db_merge_database). The output of each replicate is
+written into <simulation name>_rep<replicate number>.log in Simulations
+directory.
+
+The state of the replicates (random seed, starting time, simulation file
+directory, and whether the replicate is completed or failed) is kept in a
+manifest file, <simulation name>_replicates.json in Simulations directory.
+When the runner is called again, completed replicates are skipped and
+failed or unfinished replicates are run again with the same seeds. A
+completed replicate is recorded as merging, with its starting time,
+before its database file is merged; hence, a merge which was interrupted
+is repeated without duplicating the replicate in the logging database.
+
+Date created: 19th October 2026
+'''
+import contextlib
+import copy
+import json
+import multiprocessing
+import os
+import random
+import traceback
+from concurrent import futures
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .checkpoint import write_atomic
+from .database_calls import connect_database, db_delete_simulation
+from .database_calls import db_merge_database
+
+def simulations_directory():
+    '''
+    Gives the directory of simulation files and logging databases, which
+    is Simulations directory in the current working directory (see
+    simulation_calls.file_preparation).
+
+    @return: directory path
+    '''
+    return os.path.join(os.getcwd(), 'Simulations')
+
+def read_manifest(filename):
+    '''
+    Reads a manifest file of simulation runs.
+
+    @param filename: file name of manifest
+    @return: dictionary of manifest, or an empty dictionary if the
+    manifest file does not exist
+    '''
+    if not os.path.exists(filename): return {}
+    f = open(filename, 'r')
+    try:
+        return json.load(f)
+    finally:
+        f.close()
+
+def write_manifest(filename, manifest):
+    '''
+    Writes a manifest file of simulation runs atomically (see
+    checkpoint.write_atomic); hence, the manifest is never partly written.
+
+    @param filename: file name of manifest
+    @param manifest: dictionary of manifest
+    '''
+    data = json.dumps(manifest, indent=1, sort_keys=True, default=str)
+    write_atomic(filename, data.encode('utf-8'))
+
+def run_database(database_file, name):
+    '''
+    Gives the database file of a simulation run, in the form of
+    <database file name>_<run name><database file extension>.
+
+    @param database_file: logging database file name (see
+    "database_file" in simulation parameters)
+    @param name: run name, such as <simulation name>_rep1
+    @return: database file name of the simulation run
+    '''
+    (root, extension) = os.path.splitext(database_file)
+    return '%s_%s%s' % (root, name, extension)
+
+def merge_run(database_file, path, starting_time=None):
+    '''
+    Merges the database file of a completed simulation run into the
+    logging database (see database_calls.db_merge_database). If the
+    starting time of the run is given, the data of the run which is
+    already in the logging database, from an interrupted merge, is
+    deleted first (see database_calls.db_delete_simulation); hence, the
+    merge can be repeated.
+
+    @param database_file: logging database file name (see
+    "database_file" in simulation parameters)
+    @param path: path of the database file of the run
+    @param starting_time: starting time of the run to delete from the
+    logging database before merging. Default = None (nothing is deleted).
+    '''
+    (con, cur) = connect_database(None, {"database_file": database_file})
+    try:
+        if starting_time is not None:
+            (con, cur) = db_delete_simulation(con, cur, starting_time)
+        (con, cur) = db_merge_database(con, cur, path)
+    finally:
+        con.close()
+
+def simulation_task(sim_parameters, sim_functions, simulation_name, seed):
+    '''
+    Runs one simulation (see dose.simulate) with a random seed; the output
+    of the simulation is written into <simulation name>.log in Simulations
+    directory. This is executed in the worker processes of run_simulations.
+
+    @param sim_parameters: simulation parameters dictionary of the run,
+    where "database_file" is the database file of the run
+    @param sim_functions: A class inherited from dose.dose_functions
+    class to implement all the needed simulation functions.
+    @param simulation_name: name of the simulation run
+    @param seed: random seed of the run
+    @return: dictionary of the result - status ('completed' or 'failed'),
+    starting_time, directory and error (traceback of failed run)
+    '''
+    from .dose import simulate
+    random.seed(seed)
+    if numpy is not None: numpy.random.seed(seed % (2 ** 32))
+    directory = simulations_directory()
+    if not os.path.exists(directory): os.makedirs(directory)
+    log = open(os.path.join(directory, simulation_name + '.log'), 'w')
+    try:
+        with contextlib.redirect_stdout(log):
+            (_, sim_parameters, _, _) = simulate(sim_parameters, sim_functions)
+        return {'status': 'completed',
+                'starting_time': sim_parameters["starting_time"],
+                'directory': sim_parameters["directory"]}
+    except Exception:
+        return {'status': 'failed', 'error': traceback.format_exc(),
+                'directory': sim_parameters.get("directory")}
+    finally:
+        log.close()
+
+def run_simulations(runs, sim_functions, manifest_file, processes=None,
+                    progress=True):
+    '''
+    Runs simulations concurrently in a pool of processes, and records the
+    state of each run in a manifest file. Runs which are completed in the
+    manifest are skipped; hence, an interrupted or partly failed set of
+    runs can be resumed by calling this function again. Each run is logged
+    into its own database file (see run_database), which is merged into
+    the logging database of the run's simulation parameters when the run
+    is completed, and removed after the run is recorded as completed in
+    the manifest. A completed run is recorded as 'merging' (with its
+    starting time) before the merge; runs which are still merging when
+    this function is called again are merged again after their data is
+    deleted from the logging database (see merge_run). Runs are given to
+    worker processes one at a time in the given order, as worker
+    processes become free.
+
+    @param runs: list of (run name, simulation parameters dictionary,
+    random seed) or (run name, simulation parameters dictionary, random
+    seed, dictionary of details to record in the manifest), where the run
+    name is unique
+    @param sim_functions: A class inherited from dose.dose_functions
+    class to implement all the needed simulation functions.
+    @param manifest_file: file name of manifest
+    @param processes: number of worker processes. Default = None, which
+    uses the number of CPUs.
+    @param progress: if True, print the progress of the runs.
+    Default = True.
+    @return: dictionary of manifest with run name as key
+    '''
+    manifest = read_manifest(manifest_file)
+    pending = []
+    for run in runs:
+        (name, sim_parameters, seed) = run[:3]
+        entry = manifest.get(name, {})
+        if entry.get('status') == 'merging':
+            # the run was completed but its merge may have been interrupted
+            path = os.path.join(simulations_directory(),
+                                run_database(entry['database_file'], name))
+            if os.path.exists(path):
+                merge_run(entry['database_file'], path,
+                          entry['starting_time'])
+                entry['status'] = 'completed'
+                write_manifest(manifest_file, manifest)
+                os.remove(path)
+            else:
+                # the run database is lost; the run is run again
+                (con, cur) = connect_database(None,
+                    {"database_file": entry['database_file']})
+                db_delete_simulation(con, cur, entry['starting_time'])
+                con.close()
+        if entry.get('status') == 'completed': continue
+        parameters = copy.deepcopy(sim_parameters)
+        parameters["simulation_name"] = name
+        parameters["run_seed"] = seed
+        database_file = parameters["database_file"]
+        parameters["database_file"] = run_database(database_file, name)
+        path = os.path.join(simulations_directory(),
+                            parameters["database_file"])
+        # data logged by a failed or unfinished run is discarded
+        if os.path.exists(path): os.remove(path)
+        manifest[name] = {'status': 'pending', 'seed': seed,
+                          'database_file': database_file}
+        if len(run) > 3: manifest[name].update(run[3])
+        pending.append((name, parameters, seed, database_file))
+    write_manifest(manifest_file, manifest)
+    total = len(runs)
+    done = total - len(pending)
+    if progress:
+        print('%i of %i runs completed; running %i runs...' %
+              (done, total, len(pending)))
+    if not pending: return manifest
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    executor = futures.ProcessPoolExecutor(processes, mp_context=context)
+    try:
+        tasks = {}
+        for (name, parameters, seed, database_file) in pending:
+            task = executor.submit(simulation_task, parameters,
+                                   sim_functions, name, seed)
+            tasks[task] = (name, parameters, database_file)
+        for task in futures.as_completed(tasks):
+            (name, parameters, database_file) = tasks[task]
+            try:
+                result = task.result()
+            except Exception:
+                result = {'status': 'failed',
+                          'error': traceback.format_exc()}
+            if result['status'] == 'completed':
+                # the run is recorded as merging before the merge, and the
+                # run database is removed only after the merge is committed
+                # and the run is recorded as completed in the manifest
+                path = os.path.join(simulations_directory(),
+                                    parameters["database_file"])
+                manifest[name].update(result)
+                manifest[name]['status'] = 'merging'
+                write_manifest(manifest_file, manifest)
+                merge_run(database_file, path)
+            manifest[name].update(result)
+            write_manifest(manifest_file, manifest)
+            if result['status'] == 'completed': os.remove(path)
+            done = done + 1
+            if progress:
+                print('Run %s %s (%i of %i)' %
+                      (name, result['status'], done, total))
+    finally:
+        executor.shutdown()
+    if progress:
+        failed = [name for name in manifest
+                  if manifest[name].get('status') != 'completed']
+        if failed: print('Failed runs: ' + ', '.join(sorted(failed)))
+    return manifest
+
+def run_replicates(sim_parameters, sim_functions, replicates, seed=None,
+                   processes=None, progress=True):
+    '''
+    Runs replicates of a simulation concurrently in a pool of processes.
+    Replicate i (from 1 to replicates) is named <simulation name>_rep<i>
+    and is run with random seed (seed + i), which is kept in the manifest.
+    Calling this function again with the same simulation name resumes the
+    replicates - completed replicates are skipped, interrupted merges are
+    repeated, and failed or unfinished replicates are run again with the
+    seeds in the manifest.
+
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param sim_functions: A class inherited from dose.dose_functions
+    class to implement all the needed simulation functions.
+    @param replicates: number of replicates
+    @param seed: base random seed. Default = None (a random seed).
+    Replicates in the manifest keep their seeds.
+    @param processes: number of worker processes. Default = None, which
+    uses the number of CPUs.
+    @param progress: if True, print the progress of the replicates.
+    Default = True.
+    @return: dictionary of manifest with replicate name as key, where
+    each replicate has status ('completed' or 'failed'), seed,
+    starting_time (simulation starting time in the logging database),
+    directory (simulation file directory) and error (traceback of failed
+    replicate)
+    '''
+    directory = simulations_directory()
+    if not os.path.exists(directory): os.makedirs(directory)
+    simulation_name = sim_parameters["simulation_name"]
+    manifest_file = os.path.join(directory,
+                                 simulation_name + '_replicates.json')
+    manifest = read_manifest(manifest_file)
+    if seed is None: seed = random.randrange(2 ** 31)
+    runs = []
+    for replicate in range(1, int(replicates) + 1):
+        name = '%s_rep%i' % (simulation_name, replicate)
+        # replicates are resumed with their original seeds
+        replicate_seed = manifest.get(name, {}).get('seed', seed + replicate)
+        runs.append((name, sim_parameters, replicate_seed))
+    return run_simulations(runs, sim_functions, manifest_file, processes,
+                           progress)
@@ -0,0 +1,230 @@
+'''
+Selection operators for DOSE (digital organism simulation environment),
+to be used within dose.dose_functions.prepopulation_control and
+dose.dose_functions.postpopulation_control functions. Each operator takes
+a list of organisms (such as Population.agents) and returns the selected
+organisms as a new list; for example,
+
+    Populations[pop_name].agents = \\
+        dose.truncation_selection(Populations[pop_name].agents, 100)
+
+None of the operators sort the entire population and none of the
+operators retry random draws.
+
+Date created: 19th October 2026
+'''
+import heapq
+import random
+
+def selection_scores(agents, status_key='fitness'):
+    '''
+    Gets the scores of organisms for selection.
+
+    @param agents: list of organisms
+    @param status_key: status key of the score. Default = 'fitness'.
+    @return: list of scores (float) in the order of the organisms
+    '''
+    return [float(organism.status[status_key]) for organism in agents]
+
+def _selection_weights(agents, status_key):
+    '''
+    Gets the scores of organisms for fitness-proportionate selection,
+    which must not be negative. If all scores are 0, all organisms are
+    given equal weights.
+    '''
+    weights = selection_scores(agents, status_key)
+    if len(weights) > 0 and min(weights) < 0:
+        raise ValueError('Fitness-proportionate selection requires \
+non-negative ' + str(status_key))
+    if len(weights) > 0 and max(weights) == 0:
+        weights = [1.0] * len(weights)
+    return weights
+
+def truncation_selection(agents, count, status_key='fitness',
+                         largest=True):
+    '''
+    Truncation selection - selects the organisms with the highest (or
+    lowest) scores. Only the selected organisms are ranked (partial
+    selection); the order of the organisms in the population is kept.
+
+    @param agents: list of organisms
+    @param count: number of organisms to select
+    @param status_key: status key of the score. Default = 'fitness'.
+    @param largest: if True, select the organisms with the highest scores;
+    otherwise, select the organisms with the lowest scores. Default = True.
+    @return: list of selected organisms
+    '''
+    count = int(count)
+    if count >= len(agents): return list(agents)
+    if count <= 0: return []
+    scores = selection_scores(agents, status_key)
+    if largest:
+        chosen = heapq.nlargest(count, range(len(agents)),
+                                key=scores.__getitem__)
+    else:
+        chosen = heapq.nsmallest(count, range(len(agents)),
+                                 key=scores.__getitem__)
+    chosen.sort()
+    return [agents[index] for index in chosen]
+
+def tournament_selection(agents, count, size=2, status_key='fitness',
+                         replacement=True):
+    '''
+    Tournament selection - each selected organism is the organism with the
+    highest score among a random group (tournament) of organisms.
+
+    @param agents: list of organisms
+    @param count: number of organisms to select
+    @param size: number of organisms in each tournament. Default = 2.
+    @param status_key: status key of the score. Default = 'fitness'.
+    @param replacement: if True, an organism can be selected more than
+    once; otherwise, each organism is selected at most once and count is
+    limited to the size of the population. Default = True.
+    @return: list of selected organisms
+    '''
+    count = int(count)
+    scores = selection_scores(agents, status_key)
+    if replacement:
+        if len(agents) == 0: return []
+        population = len(agents)
+        selected = []
+        for _ in range(count):
+            entrants = [random.randrange(population) for _ in range(size)]
+            selected.append(agents[max(entrants, key=scores.__getitem__)])
+        return selected
+    count = min(count, len(agents))
+    remaining = list(range(len(agents)))
+    selected = []
+    for _ in range(count):
+        entrants = random.sample(range(len(remaining)),
+                                 min(size, len(remaining)))
+        winner = max(entrants, key=lambda i: scores[remaining[i]])
+        selected.append(agents[remaining[winner]])
+        # remove the winner by swapping with the last organism
+        remaining[winner] = remaining[-1]
+        remaining.pop()
+    return selected
+
+class AliasTable(object):
+    '''
+    Alias table (Walker's alias method) for sampling from a discrete
+    distribution in constant time per draw, after a linear-time set up.
+    '''
+    def __init__(self, weights):
+        '''
+        Sets up the alias table.
+
+        @param weights: list of non-negative weights, which need not sum
+        to 1. If all weights are 0, all indices are equally likely.
+        '''
+        size = len(weights)
+        if size == 0:
+            raise ValueError('Alias table requires at least one weight')
+        total = float(sum(weights))
+        if total <= 0:
+            weights = [1.0] * size
+            total = float(size)
+        self.size = size
+        self.probability = [0.0] * size
+        self.alias = list(range(size))
+        scaled = [float(weight) * size / total for weight in weights]
+        small = [i for i in range(size) if scaled[i] < 1.0]
+        large = [i for i in range(size) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0: small.append(more)
+            else: large.append(more)
+        # remaining entries are 1 (up to rounding errors)
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def sample(self):
+        '''
+        Draws one index.
+
+        @return: index to the list of weights
+        '''
+        column = random.randrange(self.size)
+        if random.random() < self.probability[column]: return column
+        return self.alias[column]
+
+    def sample_many(self, count):
+        '''
+        Draws a number of indices (with replacement).
+
+        @param count: number of indices to draw
+        @return: list of indices to the list of weights
+        '''
+        sample = self.sample
+        return [sample() for _ in range(int(count))]
+
+def roulette_selection(agents, count, status_key='fitness',
+                       replacement=True):
+    '''
+    Roulette wheel (fitness-proportionate) selection - each organism is
+    selected with a probability proportionate to its score. Draws with
+    replacement use an alias table (see AliasTable); draws without
+    replacement use weighted random sampling by exponential keys
+    (Efraimidis and Spirakis, 2006) with partial selection.
+
+    @param agents: list of organisms
+    @param count: number of organisms to select
+    @param status_key: status key of the score, which must not be
+    negative; if all scores are 0, organisms are selected with equal
+    probabilities. Default = 'fitness'.
+    @param replacement: if True, an organism can be selected more than
+    once; otherwise, each organism is selected at most once and count is
+    limited to the size of the population. Default = True.
+    @return: list of selected organisms
+    '''
+    count = int(count)
+    if count <= 0 or len(agents) == 0: return []
+    weights = _selection_weights(agents, status_key)
+    if replacement:
+        table = AliasTable(weights)
+        return [agents[index] for index in table.sample_many(count)]
+    # organisms with zero weight are only selected after all organisms
+    # with positive weights
+    keys = [random.expovariate(1.0) / weight if weight > 0
+            else float('inf') for weight in weights]
+    chosen = heapq.nsmallest(count, range(len(agents)),
+                             key=keys.__getitem__)
+    return [agents[index] for index in chosen]
+
+def stochastic_universal_sampling(agents, count, status_key='fitness'):
+    '''
+    Stochastic universal sampling - selects organisms by equally spaced
+    pointers over the cumulative scores with a single random offset,
+    giving fitness-proportionate selection with minimum spread. The
+    selected organisms are in the order of the population.
+
+    @param agents: list of organisms
+    @param count: number of organisms to select
+    @param status_key: status key of the score, which must not be
+    negative; if all scores are 0, all organisms are given equal
+    scores. Default = 'fitness'.
+    @return: list of selected organisms
+    '''
+    count = int(count)
+    if count <= 0 or len(agents) == 0: return []
+    weights = _selection_weights(agents, status_key)
+    total = float(sum(weights))
+    distance = total / count
+    pointer = random.uniform(0, distance)
+    selected = []
+    cumulative = 0.0
+    for index in range(len(agents)):
+        cumulative = cumulative + weights[index]
+        while pointer < cumulative and len(selected) < count:
+            selected.append(agents[index])
+            pointer = pointer + distance
+    # rounding errors may leave the last pointer beyond the total
+    if len(selected) < count:
+        last = max([index for index in range(len(agents))
+                    if weights[index] > 0])
+        selected.extend([agents[last]] * (count - len(selected)))
+    return selected
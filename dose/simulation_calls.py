@@ -5,11 +5,10 @@ functions.
 
 Date created: 10th October 2013
 '''
-import random, inspect, os
+import dis, random, inspect, os
 import os.path
 from datetime import datetime
 from time import time
-from copy import deepcopy
 from shutil import copyfile
 
 # In Python 3, cPickle is no longer needed: Py3 looks for
@@ -20,11 +19,17 @@ try:
 except ImportError:
     import pickle
 
+from . import background_writer
+from . import cell_update
+from . import checkpoint
 from . import dose_world
+from . import fitness
 from . import genetic
+from . import lineage
 from . import ragaraja, register_machine
 
 from .database_calls import connect_database, db_log_simulation_parameters
+from .database_calls import db_delete_generations
 from .database_calls import db_report
 
 def file_preparation(sim_functions, sim_parameters, Populations, World):
@@ -92,7 +97,9 @@ def connect_logging_database(sim_functions, sim_parameters, Populations, World):
     """
     print('Connecting to database file: ' + \
         sim_parameters["database_file"] + '...')
-    (con, cur) = connect_database(None, sim_parameters)
+    # database logging may be done by the background writer thread
+    (con, cur) = connect_database(None, sim_parameters, 
+        not sim_parameters.get("background_writing"))
     print('Logging simulation parameters to database file...')
     (con, cur) = db_log_simulation_parameters(con, cur, sim_parameters)
     return (sim_functions, sim_parameters, Populations, World, 
@@ -149,7 +156,7 @@ def deploy_populations(sim_functions, sim_parameters, Populations, World):
             generation_count, maximum_generations)
 
 def simulate_one_cycle(sim_functions, sim_parameters, Populations, World, 
-                       generation_count):
+                       generation_count, plan=None):
     """
     Step 5a of Sequential ecological cell DOSE simulator - Run one 
     simulation cycle.
@@ -159,24 +166,29 @@ def simulate_one_cycle(sim_functions, sim_parameters, Populations, World,
     @param sim_parameters: simulation parameters dictionary (see Examples)
     @param Populations: dictionary of population objects
     @param World: dose_world.World object
+    @param plan: SimulationPlan object of the simulation functions. 
+    Default = None (plan is given by simulation_plan function).
     """
-    sim_functions.ecoregulate(World)
-    eco_cell_iterator(World, sim_parameters,
-                      sim_functions.update_ecology)
-    eco_cell_iterator(World, sim_parameters,
-                      sim_functions.update_local)
-    eco_cell_iterator(World, sim_parameters, sim_functions.report)
+    if plan is None: plan = simulation_plan(sim_functions, sim_parameters)
+    if plan.ecoregulate is not None: plan.ecoregulate(World)
+    for (function, per_cell, buffered) in plan.world_phases:
+        if buffered:
+            cell_update.update_cells(World, function, plan.cells, 
+                                     plan.eco_cell_processes)
+        elif per_cell:
+            for (x, y, z) in plan.cells: function(World, x, y, z)
+        else:
+            for cell in plan.cells: function(World)
     bury_world(sim_parameters, World, generation_count)
     for pop_name in Populations:
-        if sim_parameters["interpret_chromosome"]:
+        if plan.interpret_chromosome:
             interpret_chromosome(sim_parameters, Populations, 
                                  pop_name, World)
         report_generation(sim_parameters, Populations, pop_name, 
-                          sim_functions, generation_count)
-        sim_functions.generation_events(Populations, pop_name)
-        sim_functions.organism_movement(Populations, pop_name, World)
-        sim_functions.organism_location(Populations, pop_name, World)
-        sim_functions.other_operations(Populations, pop_name, World)
+                          sim_functions, generation_count, plan)
+        for (function, world) in plan.population_phases:
+            if world: function(Populations, pop_name, World)
+            else: function(Populations, pop_name)
     return (sim_functions, sim_parameters, Populations, World)
 
 def database_logging(sim_functions, sim_parameters, Populations, World, 
@@ -195,12 +207,75 @@ def database_logging(sim_functions, sim_parameters, Populations, World,
         "database_logging_frequency" in sim_parameters and \
         generation_count % \
         int(sim_parameters["database_logging_frequency"]) == 0: 
-            (con, cur) = db_report(con, cur, sim_functions,
-                               sim_parameters["starting_time"],
-                               Populations, World, generation_count)
+            writer = background_writer.background_writer()
+            if writer is None:
+                (con, cur) = db_report(con, cur, sim_functions,
+                                   sim_parameters["starting_time"],
+                                   Populations, World, generation_count)
+            else:
+                # logging from a snapshot as the simulation continues
+                snapshot_populations = \
+                    dict([(pop_name, background_writer.snapshot_population(
+                        Populations[pop_name])) for pop_name in Populations])
+                snapshot_world = background_writer.snapshot_world(World)
+                writer.submit(db_report, con, cur, sim_functions,
+                              sim_parameters["starting_time"],
+                              snapshot_populations, snapshot_world, 
+                              generation_count)
     return (sim_functions, sim_parameters, Populations, World, 
             con, cur)
 
+def simulate_generations(sim_functions, sim_parameters, Populations, World, 
+                         con, cur, generation_count, maximum_generations):
+    """
+    Step 5 of Sequential ecological cell DOSE simulator - Run the 
+    simulation and recording the results, from the generation after 
+    generation_count to maximum_generations. Delta checkpoints (see 
+    delta_checkpointer) and simulation checkpoints (see 
+    checkpoint_simulation) are written at the end of generations. The 
+    background writer, if any, is stopped after completing pending writes 
+    when the simulation ends or fails.
+
+    @param sim_functions: implemented simulation functions (see 
+    dose.dose_functions)
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param Populations: dictionary of population objects
+    @param World: dose_world.World object
+    @param con: database connector
+    @param cur: database cursor
+    @param generation_count: last simulated generation count
+    @param maximum_generations: last generation count to simulate
+    """
+    plan = simulation_plan(sim_functions, sim_parameters)
+    if sim_parameters.get("background_writing"):
+        background_writer.start_background_writer(
+            int(sim_parameters["background_writing"]))
+    checkpointer = delta_checkpointer(sim_parameters)
+    try:
+        while generation_count < maximum_generations:
+            generation_count = generation_count + 1
+            (sim_functions, sim_parameters, Populations, World) = \
+                simulate_one_cycle(sim_functions, sim_parameters, Populations, 
+                                   World, generation_count, plan)
+            (sim_functions, sim_parameters, Populations, World, con, cur) = \
+                database_logging(sim_functions, sim_parameters, Populations, 
+                                 World, con, cur, generation_count)
+            if checkpointer is not None and generation_count % \
+                int(sim_parameters["delta_checkpoint_frequency"]) == 0:
+                checkpointer.record(generation_count, World, Populations)
+            checkpoint_simulation(sim_parameters, Populations, World, 
+                                  generation_count)
+            print('Generation ' + str(generation_count) + ' complete...')
+    finally:
+        # pending writes are completed (and worker processes stopped) 
+        # even if the simulation fails
+        if background_writer.background_writer() is not None:
+            print('\nCompleting background writing...')
+            background_writer.stop_background_writer()
+        fitness.close_fitness_pool()
+        cell_update.close_cell_pool()
+    return (sim_functions, sim_parameters, Populations, World, con, cur)
+
 def close_logging_database(sim_functions, sim_parameters, Populations, World, 
                            con, cur):
     """
@@ -213,8 +288,13 @@ def close_logging_database(sim_functions, sim_parameters, Populations, World,
     @param Populations: dictionary of population objects
     @param World: dose_world.World object
     """
+    if background_writer.background_writer() is not None:
+        print('\nCompleting background writing...')
+        background_writer.stop_background_writer()
     print('\nClosing simulation results...')
     for pop_name in Populations: close_results(sim_parameters, pop_name)
+    fitness.close_fitness_pool()
+    cell_update.close_cell_pool()
     print('Committing logged data into database file...') 
     con.commit()
     print('Terminating database connection...') 
@@ -274,15 +354,10 @@ def sequential_simulator(sim_functions, sim_parameters, Populations, World):
     (sim_functions, sim_parameters, Populations, World, generation_count, maximum_generations) = \
         deploy_populations(sim_functions, sim_parameters, Populations, World)
     # Step 5: Run the simulation and recording the results
-    while generation_count < maximum_generations:
-        generation_count = generation_count + 1
-        (sim_functions, sim_parameters, Populations, World) = \
-            simulate_one_cycle(sim_functions, sim_parameters, Populations, World,
-                               generation_count)
-        (sim_functions, sim_parameters, Populations, World, con, cur) = \
-            database_logging(sim_functions, sim_parameters, Populations, World, 
-                             con, cur, generation_count)
-        print('Generation ' + str(generation_count) + ' complete...')
+    (sim_functions, sim_parameters, Populations, World, con, cur) = \
+        simulate_generations(sim_functions, sim_parameters, Populations, 
+                             World, con, cur, generation_count, 
+                             maximum_generations)
     # Step 6: Close logging database (if used)
     (sim_functions, sim_parameters, Populations, World) = \
         close_logging_database(sim_functions, sim_parameters, Populations, World, 
@@ -293,6 +368,232 @@ def sequential_simulator(sim_functions, sim_parameters, Populations, World):
     return (sim_functions, sim_parameters, Populations, World)
     
 
+def resume_simulator(sim_functions, record, maximum_generations=None):
+    '''
+    Sequential ecological cell DOSE simulator resuming a simulation from a 
+    simulation checkpoint (see checkpoint.load_checkpoint), in the same 
+    simulation file directory and logging database, without rebuilding 
+    the World or populations from the logging database.
+    
+    Performs the following operations:
+        1. Restoring simulation parameters, World and populations from the 
+        checkpoint, and truncating results text files to the checkpoint
+        2. Define active interpreter instructions
+        3. Connecting to logging database, and deleting data logged after 
+        the checkpoint
+        4. Restoring random number generators from the checkpoint
+        5. Run the simulation and recording the results
+        6. Close logging database
+    
+    @param sim_functions: implemented simulation functions (see 
+    dose.dose_functions)
+    @param record: dictionary of simulation checkpoint
+    @param maximum_generations: last generation count to simulate. 
+    Default = None ("maximum_generations" in simulation parameters of 
+    the checkpoint).
+    '''
+    # Step 1: Restoring simulation parameters, World and populations
+    sim_parameters = record['parameters']
+    sim_parameters["deployment_scheme"] = sim_functions.deployment_scheme
+    if maximum_generations is not None: 
+        sim_parameters["maximum_generations"] = maximum_generations
+    maximum_generations = sim_parameters["maximum_generations"]
+    generation_count = record['generation']
+    (Populations, World) = (record['populations'], record['world'])
+    if not os.path.exists(sim_parameters["directory"]): 
+        os.makedirs(sim_parameters["directory"])
+    # reports written after the checkpoint are removed from results text 
+    # files, as the generations after the checkpoint are simulated again
+    checkpoint.truncate_files(record.get('files', {}))
+    sim_functions = sim_functions()
+    # Step 2: Define active Ragaraja instructions
+    (sim_functions, sim_parameters, Populations, World) = \
+        ragaraja_activation(sim_functions, sim_parameters, Populations, World)
+    # Step 3: Connecting to logging database
+    print('Connecting to database file: ' + \
+        sim_parameters["database_file"] + '...')
+    (con, cur) = connect_database(None, sim_parameters, 
+        not sim_parameters.get("background_writing"))
+    print('Deleting data logged after generation ' + \
+        str(generation_count) + '...')
+    (con, cur) = db_delete_generations(con, cur, 
+                                       sim_parameters["starting_time"], 
+                                       generation_count)
+    # Step 4: Restoring random number generators
+    checkpoint.set_random_state(record['random_state'])
+    # Step 5: Run the simulation and recording the results
+    print('\nResuming simulation from generation ' + \
+        str(generation_count) + '...')
+    (sim_functions, sim_parameters, Populations, World, con, cur) = \
+        simulate_generations(sim_functions, sim_parameters, Populations, 
+                             World, con, cur, generation_count, 
+                             maximum_generations)
+    # Step 6: Close logging database
+    (sim_functions, sim_parameters, Populations, World) = \
+        close_logging_database(sim_functions, sim_parameters, Populations, World, 
+                           con, cur)
+    return (sim_functions, sim_parameters, Populations, World)
+
+def _noop_hook(): pass
+
+# compiled simulation plans (see simulation_plan)
+_plans = {}
+
+def hook_arguments(function):
+    '''
+    Function to get the number of positional arguments of a simulation 
+    function, excluding self of bound methods.
+    
+    @param function: function or bound method
+    @return: number of positional arguments, or None if the signature 
+    cannot be resolved
+    '''
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    return len([parameter for parameter in parameters
+                if parameter.kind in (parameter.POSITIONAL_ONLY, 
+                                      parameter.POSITIONAL_OR_KEYWORD)])
+
+def noop_hook(function):
+    '''
+    Function to check whether a simulation function does nothing - its 
+    body is only pass, a docstring, or return None.
+    
+    @param function: function or bound method
+    @return: True if the function does nothing
+    '''
+    code = getattr(getattr(function, '__func__', function), '__code__', None)
+    if code is None: return False
+    for instruction in dis.get_instructions(code):
+        if instruction.opname in ('RESUME', 'NOP', 'RETURN_VALUE'): 
+            continue
+        if instruction.opname in ('LOAD_CONST', 'RETURN_CONST') and \
+            instruction.argval is None: 
+            continue
+        return False
+    return True
+
+class SimulationPlan(object):
+    '''
+    Plan of one simulation cycle (see simulate_one_cycle) and one 
+    generational step (see step), compiled once from the implemented 
+    simulation functions. Signatures of the ecological cell functions are 
+    resolved once (see hook_arguments), simulation functions which do 
+    nothing (see noop_hook) are left out of the plan, and ecological cells 
+    are listed once. Simulation functions which are not implemented are 
+    kept in the plan, and raise NotImplementedError when called. If 
+    eco_cell_buffering of the simulation functions is True, 
+    update_ecology and update_local functions are double-buffered (see 
+    cell_update.update_cells).
+    '''
+    def __init__(self, sim_functions, sim_parameters=None):
+        '''
+        Compiles the plan.
+        
+        @param sim_functions: implemented simulation functions (see 
+        dose.dose_functions)
+        @param sim_parameters: simulation parameters dictionary (see 
+        Examples). Default = None (plan of generational step only).
+        '''
+        self.ecoregulate = self.hook(sim_functions, 'ecoregulate')
+        buffering = getattr(sim_functions, 'eco_cell_buffering', False)
+        self.eco_cell_processes = getattr(sim_functions, 
+                                          'eco_cell_processes', 1)
+        self.world_phases = []
+        for name in ('update_ecology', 'update_local', 'report'):
+            function = self.hook(sim_functions, name)
+            if function is not None:
+                per_cell = hook_arguments(function) == 4
+                buffered = bool(buffering) and per_cell and \
+                    name != 'report'
+                self.world_phases.append((function, per_cell, buffered))
+        self.population_phases = []
+        for (name, world) in (('generation_events', False), 
+                              ('organism_movement', True), 
+                              ('organism_location', True), 
+                              ('other_operations', True)):
+            function = self.hook(sim_functions, name)
+            if function is not None:
+                self.population_phases.append((function, world))
+        self.prepopulation_control = self.hook(sim_functions, 
+                                               'prepopulation_control')
+        self.mutation_scheme = self.hook(sim_functions, 'mutation_scheme')
+        self.mating = self.hook(sim_functions, 'mating')
+        self.postpopulation_control = self.hook(sim_functions, 
+                                                'postpopulation_control')
+        self.generation_events = self.hook(sim_functions, 
+                                           'generation_events')
+        self.population_report = sim_functions.population_report
+        self.fitness = organism_fitness_implemented(sim_functions) or \
+            self.hook(sim_functions, 'fitness') is not None
+        if sim_parameters is None:
+            self.cells = []
+            self.interpret_chromosome = False
+        else:
+            self.cells = [(x, y, z) 
+                          for x in range(sim_parameters["world_x"])
+                          for y in range(sim_parameters["world_y"])
+                          for z in range(sim_parameters["world_z"])]
+            self.interpret_chromosome = \
+                sim_parameters["interpret_chromosome"]
+
+    def hook(self, sim_functions, name):
+        '''
+        Gets a simulation function for the plan.
+        
+        @param sim_functions: implemented simulation functions
+        @param name: name of simulation function
+        @return: simulation function, or None if it does nothing
+        '''
+        function = getattr(sim_functions, name)
+        if noop_hook(function): return None
+        return function
+
+def plan_settings(sim_functions, sim_parameters):
+    '''
+    Helper function to list the settings which a SimulationPlan is 
+    compiled from, other than the simulation functions themselves.
+    
+    @param sim_functions: implemented simulation functions
+    @param sim_parameters: simulation parameters dictionary, or None
+    @return: tuple of settings
+    '''
+    settings = (getattr(sim_functions, 'eco_cell_buffering', False),
+                getattr(sim_functions, 'eco_cell_processes', 1))
+    if sim_parameters is None: return settings
+    return settings + tuple([sim_parameters[key] 
+                             for key in ("world_x", "world_y", "world_z", 
+                                         "interpret_chromosome")])
+
+def simulation_plan(sim_functions, sim_parameters=None):
+    '''
+    Function to get the SimulationPlan of simulation functions and 
+    simulation parameters. The plan is compiled once and kept for the 
+    following calls with the same simulation functions and simulation 
+    parameters, unless the settings of the plan (see plan_settings) had 
+    changed.
+    
+    @param sim_functions: implemented simulation functions (see 
+    dose.dose_functions)
+    @param sim_parameters: simulation parameters dictionary (see 
+    Examples). Default = None (plan of generational step only).
+    @return: SimulationPlan object
+    '''
+    key = (id(sim_functions), id(sim_parameters))
+    settings = plan_settings(sim_functions, sim_parameters)
+    if key in _plans:
+        (functions, parameters, plan_set, plan) = _plans[key]
+        if functions is sim_functions and parameters is sim_parameters \
+            and plan_set == settings:
+            return plan
+    plan = SimulationPlan(sim_functions, sim_parameters)
+    # plans of earlier simulations are dropped from time to time
+    if len(_plans) >= 16: _plans.clear()
+    _plans[key] = (sim_functions, sim_parameters, settings, plan)
+    return plan
+
 def coordinates(location):
     '''
     Helper function to transpose ecological cell into a tuple.
@@ -306,63 +607,68 @@ def coordinates(location):
     z = location[2]
     return (x,y,z)
 
+# offsets (dx, dy) of the adjacent cells, in the order of adjacent_cells
+adjacent_offsets = ((1, 1), (-1, -1), (1, 0), (-1, 1), 
+                    (1, -1), (-1, 0), (0, -1), (0, 1))
+
 def adjacent_cells(sim_parameters, location):
     '''
     Function to get a list of adjacent ecological cells from a given 
     location.
     
+    Adjacent cells are the bounded Moore neighbourhood on the x-y plane 
+    (as topology.world_topology), listed in the order of their offsets 
+    from the location: (+1,+1), (-1,-1), (+1,0), (-1,+1), (+1,-1), 
+    (-1,0), (0,-1), then (0,+1), leaving out cells outside the world. 
+    Deployment schemes (see deploy_4) depend on this order.
+    
     @param sim_parameters: simulation parameters dictionary (see Examples)
     @param location: location of ecological cell as (x,y,z)
     @return: list of locations of adjacent cells.
     '''
-    trashbin = []
-    temp_cells = []
-    world_size = [sim_parameters["world_x"],
-                  sim_parameters["world_y"],
-                  sim_parameters["world_z"]]
-    for i in range(3):
-        new_location = [spot for spot in location]
-        new_location[0] += 1
-        temp_cells.append(new_location)
-        new_location = [spot for spot in location]
-        new_location[0] -= 1
-        temp_cells.append(new_location)    
-    for i in range(2):
-        new_location = [spot for spot in location]
-        new_location[1] -= 1
-        temp_cells.append(new_location) 
-    for i in range(0,4,3):
-        temp_cells[i][1] += 1
-        temp_cells[i+1][1] -= 1
-    temp_cells[-1][1] += 2
-    for i in range(8):
-        for x in range(2):
-            if temp_cells[i][x] >= world_size[x] or temp_cells[i][x] < 0:
-                if temp_cells[i] not in trashbin:
-                    trashbin.append(temp_cells[i])
-    for location in trashbin:
-        temp_cells.remove(location)
-    return [tuple(location) for location in temp_cells]
+    world_x = sim_parameters["world_x"]
+    world_y = sim_parameters["world_y"]
+    (x, y, z) = location
+    return [(x + dx, y + dy, z) for (dx, dy) in adjacent_offsets
+            if 0 <= x + dx < world_x and 0 <= y + dy < world_y]
 
 def spawn_populations(sim_parameters):
     '''
     Initializing starting population(s) for a simulation. Each organism 
     in each population at this stage will be genetic clones of each 
-    other.
+    other, sharing the initial chromosomal sequence until mutated (see 
+    genetic.template_population_constructor); unless "chromosome_type" 
+    in simulation parameters is 'random', where each organism will be 
+    given random chromosomal sequences.
+    
+    If "lineage_tracking" in simulation parameters is True, one lineage 
+    registry (lineage.Lineage object) is created for the simulation and 
+    shared by all populations as Population.lineage; organisms will then 
+    be named by the lineage registry instead of Organism.generate_name.
+    
+    If "clonal_population" in simulation parameters is True, each 
+    population will be in clonal population mode (see 
+    genetic.Population.clonal).
     
     @param sim_parameters: simulation parameters dictionary (see Examples)
     @return: dictionary of population objects with population name as key
     '''
     temp_Populations = {}
+    registry = None
+    if "lineage_tracking" in sim_parameters and \
+        sim_parameters["lineage_tracking"]:
+        print(' - Creating lineage registry...')
+        registry = lineage.Lineage()
     print(' - Accessing population names...')
     for pop_name in sim_parameters["population_names"]:
-        print(' - Constructing population: ' + pop_name + '...')
+        print(' - Constructing population with organism identity and \
+deme status: ' + pop_name + '...')
         temp_Populations[pop_name] = \
-            genetic.population_constructor(sim_parameters)
-        print(' - Updating organism identity and deme status...')
-        for individual in temp_Populations[pop_name].agents:
-            individual.generate_name()
-            individual.status['deme'] = pop_name
+            genetic.template_population_constructor(sim_parameters, 
+                                                    pop_name, registry)
+        if "clonal_population" in sim_parameters and \
+            sim_parameters["clonal_population"]:
+            temp_Populations[pop_name].clonal = True
     return temp_Populations
 
 def eco_cell_iterator(World, sim_parameters, function):
@@ -375,10 +681,11 @@ def eco_cell_iterator(World, sim_parameters, function):
     @param function: function to be executed
     @return: none
     '''
+    per_cell = hook_arguments(function) == 4
     for x in range(sim_parameters["world_x"]):
         for y in range(sim_parameters["world_y"]):
             for z in range(sim_parameters["world_z"]):
-                if len(inspect.getargspec(function)[0]) == 5:
+                if per_cell:
                     function(World, x, y, z)
                 else:
                     function(World)
@@ -529,66 +836,217 @@ def interpret_chromosome(sim_parameters, Populations, pop_name, World):
     resources and replenishing of environmental resources or dumping of 
     wastes respectively.
     
+    In clonal population mode (see genetic.Population.clonal), the genome 
+    of each group of clones is interpreted once for each combination of 
+    blood and ecological cell conditions; hence, clones will not differ 
+    by random instructions in the genome.
+    
     @param sim_parameters: simulation parameters dictionary (see Examples)
     @param Populations: dictionary of population objects
     @param pop_name: population name
     @param World: dose_world.World object
     @return: none
     '''
-    array = [0] * sim_parameters["max_tape_length"]
-    for i in range(len(Populations[pop_name].agents)):
-        individual = Populations[pop_name].agents[i]
-        location = individual.status['location']
-        (x,y,z) = coordinates(location)
-        if sim_parameters["clean_cell"]:
+    agents = Populations[pop_name].agents
+    if not getattr(Populations[pop_name], 'clonal', False):
+        for individual in agents:
+            interpret_organism(sim_parameters, individual, World)
+        return
+    # clonal population mode - organisms of the same group of clones 
+    # (see genetic.genome_groups) with the same blood, in the same 
+    # ecological cell with the same local conditions, are interpreted 
+    # once and the results replayed for the other clones
+    clone_of = {}
+    groups = Populations[pop_name].genome_groups()
+    for index in range(len(groups)):
+        for organism in groups[index]:
+            clone_of[id(organism)] = index
+    results = {}
+    for individual in agents:
+        (x,y,z) = coordinates(individual.status['location'])
+        cell = World.ecosystem[x][y][z]
+        key = (clone_of[id(individual)], (x,y,z), 
+               snapshot(individual.status['blood']),
+               tuple(cell['local_input']), tuple(cell['local_output']))
+        if key in results:
+            (blood, local_input, local_output, temporary_input, 
+             temporary_output, error_msg) = results[key]
+            if blood is None: individual.status['blood'] = None
+            else: individual.status['blood'] = list(blood)
+            cell['local_input'][:] = local_input
+            cell['local_output'][:] = local_output
+            cell['temporary_input'] = list(temporary_input)
+            cell['temporary_output'] = list(temporary_output)
+            if error_msg is not None:
+                individual.status['chromosome_error'] = error_msg
+        else:
+            error_msg = interpret_organism(sim_parameters, individual, 
+                                           World)
+            results[key] = (snapshot(individual.status['blood']),
+                            tuple(cell['local_input']),
+                            tuple(cell['local_output']),
+                            tuple(cell['temporary_input']),
+                            tuple(cell['temporary_output']), error_msg)
+
+def snapshot(data):
+    '''
+    Helper function to make an immutable copy of a list (such as blood or 
+    local_input of an ecological cell) for comparison.
+    
+    @param data: list or None
+    @return: tuple or None
+    '''
+    if data is None: return None
+    return tuple(data)
+
+def interpret_organism(sim_parameters, individual, World):
+    '''
+    Function to call Ragaraja interpreter to express / execute the genome 
+    of one organism (see interpret_chromosome).
+    
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param individual: genetic.Organism object
+    @param World: dose_world.World object
+    @return: error message of the last chromosome which failed 
+    interpretation, or None if there is no error
+    '''
+    error_msg = None
+    location = individual.status['location']
+    (x,y,z) = coordinates(location)
+    if sim_parameters["clean_cell"]:
+        array = [0] * sim_parameters["max_tape_length"]
+    else:
+        array = individual.status['blood']
+        if array == None: 
             array = [0] * sim_parameters["max_tape_length"]
+    for chromosome_count in range(len(individual.genome)):
+        # get world environment conditions
+        inputdata = World.ecosystem[x][y][z]['local_input']
+        output = World.ecosystem[x][y][z]['local_output']
+        # get chromosomal sequence
+        source = ''.join(individual.genome[chromosome_count].sequence)
+        # process chromosome sequence if needed
+        if sim_parameters["ragaraja_version"] == 0.2:
+            source = ragaraja.nBF_to_Ragaraja(source)
+        elif sim_parameters["ragaraja_version"] == 66:
+            source = sim_parameters["base_converter"](source) 
+        # print(source)
+        # change interpreter if needed
+        if sim_parameters["ragaraja_version"] == 'user-defined':
+            interpreter = sim_parameters["interpreter"]
+            instruction_size = sim_parameters["instruction_size"]
+        elif sim_parameters["interpreter"] == 'ragaraja':
+            interpreter = ragaraja.ragaraja
+            instruction_size = 3
         else:
-            array = Populations[pop_name].agents[i].status['blood']
-            if array == None: 
-                array = [0] * sim_parameters["max_tape_length"]
-        for chromosome_count in range(len(individual.genome)):
-            # get world environment conditions
-            inputdata = World.ecosystem[x][y][z]['local_input']
-            output = World.ecosystem[x][y][z]['local_output']
-            # get chromosomal sequence
-            source = ''.join(individual.genome[chromosome_count].sequence)
-            # process chromosome sequence if needed
-            if sim_parameters["ragaraja_version"] == 0.2:
-                source = ragaraja.nBF_to_Ragaraja(source)
-            elif sim_parameters["ragaraja_version"] == 66:
-                source = sim_parameters["base_converter"](source) 
-            # print(source)
-            # change interpreter if needed
-            if sim_parameters["ragaraja_version"] == 'user-defined':
-                interpreter = sim_parameters["interpreter"]
-                instruction_size = sim_parameters["instruction_size"]
-            elif sim_parameters["interpreter"] == 'ragaraja':
-                interpreter = ragaraja.ragaraja
-                instruction_size = 3
-            else:
-                interpreter = ragaraja.ragaraja
-                instruction_size = 3
-            # get cytoplasm / blood
-            array = Populations[pop_name].agents[i].status['blood']
-            # interpret chromosme
-            try: (array, apointer, inputdata, output, source, spointer) = \
-                register_machine.interpret(source, interpreter, 
-                                           instruction_size,
-                                           inputdata, array, 
-                                           sim_parameters["max_tape_length"],
-                                           sim_parameters["max_codon"])
-            except Exception as e: 
-                error_msg = '|'.join(['Error at Chromosome_' + \
-                    str(chromosome_count), str(e)])
-                Populations[pop_name].agents[i]. \
-                    status['chromosome_error'] = error_msg
-                Populations[pop_name].agents[i].status['blood'] = array
-            # update world environment conditions and cytoplasm / blood
-            Populations[pop_name].agents[i].status['blood'] = array
-            World.ecosystem[x][y][z]['temporary_input'] = inputdata
-            World.ecosystem[x][y][z]['temporary_output'] = output
-
-def step(Populations, pop_name, sim_functions):
+            interpreter = ragaraja.ragaraja
+            instruction_size = 3
+        # get cytoplasm / blood
+        array = individual.status['blood']
+        # interpret chromosme
+        try: (array, apointer, inputdata, output, source, spointer) = \
+            register_machine.interpret(source, interpreter, 
+                                       instruction_size,
+                                       inputdata, array, 
+                                       sim_parameters["max_tape_length"],
+                                       sim_parameters["max_codon"])
+        except Exception as e: 
+            error_msg = '|'.join(['Error at Chromosome_' + \
+                str(chromosome_count), str(e)])
+            individual.status['chromosome_error'] = error_msg
+            individual.status['blood'] = array
+        # update world environment conditions and cytoplasm / blood
+        individual.status['blood'] = array
+        World.ecosystem[x][y][z]['temporary_input'] = inputdata
+        World.ecosystem[x][y][z]['temporary_output'] = output
+    return error_msg
+
+def organism_fitness_implemented(sim_functions):
+    '''
+    Checks whether the per-organism fitness function (organism_fitness) 
+    is over-ridden in the implemented simulation functions.
+    
+    @param sim_functions: implemented simulation functions 
+    (see dose.dose_functions)
+    @return: True if organism_fitness is over-ridden
+    '''
+    from .dose import dose_functions
+    function = getattr(type(sim_functions), 'organism_fitness', None)
+    return function is not None and \
+        function is not dose_functions.organism_fitness
+
+def fitness_evaluation(Populations, pop_name, sim_functions):
+    '''
+    Measures the fitness of the organisms in a population - by evaluating 
+    organism_fitness function of each organism if it is over-ridden 
+    (sequentially, or in a process pool of fitness_processes worker 
+    processes of the simulation functions), or by calling fitness 
+    function otherwise. 
+    
+    Only organisms which had changed since their last evaluation (see 
+    genetic.Organism.fitness_dirty; the status keys which matter to 
+    fitness are given by fitness_status_keys of the simulation functions) 
+    are evaluated by organism_fitness function, and the number of 
+    evaluations made and skipped are added to 
+    Population.fitness_evaluations. In clonal population mode, 
+    organism_fitness function is evaluated once for each group of clones 
+    (see genetic.genome_groups) with the same status in 
+    fitness_status_keys, using the status of the first organism in the 
+    group.
+    
+    The population-level fitness function is not given which organisms 
+    had changed; hence, it is called in full each time (twice per 
+    generational step; see step).
+    
+    @param Populations: dictionary of population objects
+    @param pop_name: population name
+    @param sim_functions: implemented simulation functions 
+    (see dose.dose_functions)
+    @return: none
+    '''
+    if not organism_fitness_implemented(sim_functions):
+        sim_functions.fitness(Populations, pop_name)
+        return
+    population = Populations[pop_name]
+    agents = population.agents
+    status_keys = tuple(getattr(sim_functions, 'fitness_status_keys', ()))
+    processes = getattr(sim_functions, 'fitness_processes', 1)
+    if getattr(population, 'clonal', False):
+        groups = []
+        for group in population.genome_groups():
+            # clones which differ in the status that matter to fitness 
+            # are evaluated separately
+            subgroups = []
+            for organism in group:
+                values = [organism.status.get(key) for key in status_keys]
+                for subgroup in subgroups:
+                    if subgroup[0] == values:
+                        subgroup[1].append(organism)
+                        break
+                else:
+                    subgroups.append((values, [organism]))
+            groups.extend([subgroup[1] for subgroup in subgroups])
+        evaluate = [group[0] for group in groups 
+                    if group[0].fitness_dirty(status_keys)]
+        fitness.parallel_fitness(sim_functions.organism_fitness, evaluate, 
+                                 processes)
+        for organism in evaluate:
+            organism.mark_fitness_clean(status_keys)
+        for group in groups:
+            for organism in group[1:]:
+                if organism.fitness_dirty(status_keys):
+                    organism.status['fitness'] = group[0].status['fitness']
+                    organism.mark_fitness_clean(status_keys)
+    else:
+        evaluate = [organism for organism in agents 
+                    if organism.fitness_dirty(status_keys)]
+        fitness.parallel_fitness(sim_functions.organism_fitness, evaluate, 
+                                 processes)
+        for organism in evaluate:
+            organism.mark_fitness_clean(status_keys)
+    population.count_evaluations(len(evaluate), len(agents) - len(evaluate))
+
+def step(Populations, pop_name, sim_functions, plan=None):
     '''
     Performs a generational step for a population
         - Prepopulation control
@@ -604,22 +1062,34 @@ def step(Populations, pop_name, sim_functions):
     @param pop_name: population name
     @param sim_functions: implemented simulation functions 
     (see dose.dose_functions)
+    @param plan: SimulationPlan object of the simulation functions; 
+    simulation functions which do nothing are skipped. Default = None 
+    (plan is given by simulation_plan function).
     @return: report as a string
     '''
-    if Populations[pop_name].generation > 0:
-        sim_functions.prepopulation_control(Populations, pop_name)
-    for organism in Populations[pop_name].agents:
-        sim_functions.mutation_scheme(organism)
-    sim_functions.fitness(Populations, pop_name)
-    sim_functions.mating(Populations, pop_name)
-    sim_functions.postpopulation_control(Populations, pop_name)
-    sim_functions.generation_events(Populations, pop_name)
+    if plan is None: plan = simulation_plan(sim_functions)
+    if Populations[pop_name].generation > 0 and \
+        plan.prepopulation_control is not None:
+        plan.prepopulation_control(Populations, pop_name)
+    if plan.mutation_scheme is not None:
+        mutation_scheme = plan.mutation_scheme
+        for organism in Populations[pop_name].agents:
+            mutation_scheme(organism)
+    if plan.fitness:
+        fitness_evaluation(Populations, pop_name, sim_functions)
+    if plan.mating is not None: 
+        plan.mating(Populations, pop_name)
+    if plan.postpopulation_control is not None:
+        plan.postpopulation_control(Populations, pop_name)
+    if plan.generation_events is not None:
+        plan.generation_events(Populations, pop_name)
     Populations[pop_name].generation = Populations[pop_name].generation + 1
-    sim_functions.fitness(Populations, pop_name)
-    return sim_functions.population_report(Populations, pop_name)
+    if plan.fitness:
+        fitness_evaluation(Populations, pop_name, sim_functions)
+    return plan.population_report(Populations, pop_name)
 
 def report_generation(sim_parameters, Populations, pop_name, 
-                      sim_functions, generation_count):
+                      sim_functions, generation_count, plan=None):
     '''
     Performs a generational step (using step function) for a population 
     and writes out the resulting report into results text file.
@@ -630,26 +1100,31 @@ def report_generation(sim_parameters, Populations, pop_name,
     @param sim_functions: implemented simulation functions (see 
     dose.dose_functions)
     @param generation_count: current generation count for reporting
+    @param plan: SimulationPlan object of the simulation functions. 
+    Default = None (plan is given by simulation_plan function).
     @return: none
     '''
     for index in range(len(Populations[pop_name].agents)):
         Populations[pop_name].agents[index].status['generation'] = \
         generation_count
-    report = step(Populations, pop_name, sim_functions)
+    report = step(Populations, pop_name, sim_functions, plan)
     if generation_count % int(sim_parameters["fossilized_frequency"]) == 0:
         file = '%s%s_%s_' % (sim_parameters["directory"],
                              sim_parameters["simulation_name"], pop_name)
         freeze_population(file, sim_parameters["fossilized_ratio"], 
                           Populations, pop_name)
     if generation_count % int(sim_parameters["print_frequency"]) == 0:
-        f = open(('%s%s_%s.result.txt' % (sim_parameters["directory"],
-                                          sim_parameters["simulation_name"], 
-                                          pop_name)), 'a')
+        filename = '%s%s_%s.result.txt' % (sim_parameters["directory"],
+                                           sim_parameters["simulation_name"], 
+                                           pop_name)
         dtstamp = str(datetime.utcnow())
-        f.write('\n'.join(['\n' + dtstamp, 'GENERATION: ' + \
-                           str(generation_count), str(report)]))
-        f.write('\n')
-        f.close
+        text = '\n'.join(['\n' + dtstamp, 'GENERATION: ' + \
+                          str(generation_count), str(report)]) + '\n'
+        writer = background_writer.background_writer()
+        if writer is None:
+            background_writer.write_file(filename, text, 'a')
+        else:
+            writer.submit(background_writer.write_file, filename, text, 'a')
 
 def bury_world(sim_parameters, World, generation_count):
     '''
@@ -663,9 +1138,73 @@ def bury_world(sim_parameters, World, generation_count):
        filename = '%s%s_gen%s.eco' % (sim_parameters["directory"], 
                                       sim_parameters["simulation_name"], 
                                       str(generation_count))
-       f = open(filename, 'wb')
-       pickle.dump(World, f)
-       f.close()
+       writer = background_writer.background_writer()
+       if writer is None:
+           f = open(filename, 'wb')
+           pickle.dump(World, f)
+           f.close()
+       else:
+           writer.submit(background_writer.pickle_file, filename, 
+                         background_writer.snapshot_world(World))
+
+def checkpoint_file(sim_parameters):
+    '''
+    Gives the file name of the simulation checkpoint, which is 
+    <simulation name>.checkpoint in the simulation file directory.
+    
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @return: file name of simulation checkpoint
+    '''
+    return '%s%s.checkpoint' % (sim_parameters["directory"], 
+                                sim_parameters["simulation_name"])
+
+def checkpoint_simulation(sim_parameters, Populations, World, 
+                          generation_count):
+    '''
+    Function to write the simulation checkpoint (see 
+    checkpoint.save_checkpoint), which is used to resume the simulation 
+    (see dose.resume), every "checkpoint_frequency" generations if 
+    "checkpoint_frequency" in simulation parameters is more than 0. Each 
+    checkpoint replaces the previous checkpoint atomically, and records 
+    the sizes of the results text files of the populations.
+    
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param Populations: dictionary of population objects
+    @param World: dose_world.World object
+    @param generation_count: current generation count
+    '''
+    if sim_parameters.get("checkpoint_frequency") and generation_count % \
+        int(sim_parameters["checkpoint_frequency"]) == 0:
+        files = ['%s%s_%s.result.txt' % (sim_parameters["directory"],
+                                         sim_parameters["simulation_name"], 
+                                         pop_name)
+                 for pop_name in Populations]
+        checkpoint.save_checkpoint(checkpoint_file(sim_parameters), 
+                                   generation_count, sim_parameters, 
+                                   Populations, World, 
+                                   background_writer.background_writer(), 
+                                   files)
+
+def delta_checkpointer(sim_parameters):
+    '''
+    Function to set up delta checkpoints of the simulation (see 
+    checkpoint.DeltaCheckpoint) if "delta_checkpoint_frequency" in 
+    simulation parameters is more than 0. A base snapshot is written after 
+    every "delta_checkpoint_rebase" deltas (default = 10). Checkpoint 
+    files are named <simulation name>_gen<generation>.base.ckpt or 
+    <simulation name>_gen<generation>.delta.ckpt in the simulation file 
+    directory, and can be restored by checkpoint.restore_delta_checkpoint.
+    
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @return: checkpoint.DeltaCheckpoint object, or None if delta 
+    checkpoints are not used
+    '''
+    if not sim_parameters.get("delta_checkpoint_frequency"): return None
+    prefix = '%s%s' % (sim_parameters["directory"], 
+                       sim_parameters["simulation_name"])
+    return checkpoint.DeltaCheckpoint(prefix, 
+        int(sim_parameters.get("delta_checkpoint_rebase", 10)),
+        background_writer.background_writer())
 
 def excavate_world(eco_file):
     '''
@@ -681,27 +1220,33 @@ def freeze_population(file, proportion, Populations, pop_name):
     '''
     Function to freeze part or whole of the population into a file. If 
     the number of organisms is less than 101, the entire population will 
-    be frozen.
+    be frozen. The lineage registry of the population (which grows with 
+    the length of the simulation) is not frozen; the lineage can be 
+    reconstructed from the logging database (see 
+    lineage.db_reconstruct_lineage).
     
     @param file: file name prefix
     @param proportion: proportion of the population to freeze
     @param Populations: dictionary of population objects
     @param pop_name: population name to freeze
     '''
-    if proportion > 1.0: proportion = 1.0
-    agents = Populations[pop_name].agents
-    if len(agents) < 101 or len(agents) * proportion < 101:
-        sample = deepcopy(Populations[pop_name])
-    else:
-        new_agents = [agents[random.randint(0, len(agents) - 1)]
-                      for x in range(int(len(agents) * proportion))]
-        sample = deepcopy(Populations[pop_name])
-        sample.agents = new_agents
-    name = ''.join([file, 'pop', str(Populations[pop_name].generation), 
+    population = Populations[pop_name]
+    agents = population.agents
+    # sample indices first, then pickle only the sampled organisms
+    sample = population.subpopulation([agents[index] for index in 
+        genetic.fossil_indices(len(agents), proportion)])
+    # the frozen file scales with the sample, not with the lineage history
+    sample.lineage = None
+    name = ''.join([file, 'pop', str(population.generation), 
                     '_', str(len(sample.agents)), '.gap'])
-    f = open(name, 'wb')
-    pickle.dump(sample, f)
-    f.close()
+    writer = background_writer.background_writer()
+    if writer is None:
+        f = open(name, 'wb')
+        pickle.dump(sample, f)
+        f.close()
+    else:
+        writer.submit(background_writer.pickle_file, name, 
+                      background_writer.snapshot_population(sample))
 
 def revive_population(gap_file):
     '''
@@ -0,0 +1,116 @@
+'''
+File containing a parameter sweep scheduler for DOSE (digital organism
+simulation environment). A parameter grid - lists of values of simulation
+parameters - is expanded into one simulation run for each combination of
+values, using the simulation parameters dictionary for all other
+parameters. For example,
+
+    grid = {'background_mutation': [0.001, 0.01, 0.1],
+            'population_size': [100, 500]}
+    results = dose.run_sweep(parameters, simulation_functions, grid)
+
+Runs are executed concurrently on local processes (see
+replicates.run_simulations), and are logged into the logging database of
+the simulation parameters ("database_file"). The most costly runs (see
+run_cost) are started first, and each worker process takes the next run as
+soon as it is free; hence, short runs fill in the time left by long runs.
+Completed runs are recorded in a manifest file, <simulation name>_sweep.json
+in Simulations directory; when the sweep is run again, completed runs are
+skipped.
+
+Date created: 19th October 2026
+'''
+import hashlib
+import itertools
+import os
+import random
+
+from .replicates import read_manifest, run_simulations
+from .replicates import simulations_directory
+
+def parameter_grid(sim_parameters, grid):
+    '''
+    Expands a parameter grid into the simulation parameters of each
+    combination of values. Each run is named <simulation name>_<digest>,
+    where digest is derived from the combination of values; hence, the
+    name of a run does not change when values are added to the grid.
+
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param grid: dictionary of lists of values with parameter name as key,
+    such as {'population_size': [100, 500]}
+    @return: list of (run name, simulation parameters dictionary,
+    dictionary of the values of the run)
+    '''
+    keys = sorted(grid.keys())
+    runs = []
+    for combination in itertools.product(*[grid[key] for key in keys]):
+        values = dict(zip(keys, combination))
+        digest = hashlib.md5(repr(sorted(values.items())).encode('utf-8'))
+        name = '%s_%s' % (sim_parameters["simulation_name"],
+                          digest.hexdigest()[:10])
+        parameters = dict(sim_parameters)
+        parameters.update(values)
+        runs.append((name, parameters, values))
+    return runs
+
+def run_cost(sim_parameters):
+    '''
+    Estimates the relative cost of a simulation run from its simulation
+    parameters, as the number of organism-generations times the
+    chromosome size.
+
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @return: estimated cost
+    '''
+    populations = len(sim_parameters.get("population_names", [None]))
+    return float(sim_parameters.get("population_size", 1)) * \
+        populations * \
+        float(sim_parameters.get("maximum_generations", 1)) * \
+        max(1.0, float(sim_parameters.get("chromosome_size", 1)))
+
+def run_sweep(sim_parameters, sim_functions, grid, seed=None,
+              processes=None, cost=run_cost, progress=True):
+    '''
+    Runs a parameter sweep - one simulation for each combination of values
+    in the parameter grid (see parameter_grid) - on a pool of processes.
+    Runs are scheduled from the most costly to the least costly, and
+    completed runs are recorded in a manifest; hence, calling this function
+    again with the same simulation name skips completed runs and runs the
+    remaining runs, with their seeds in the manifest.
+
+    @param sim_parameters: simulation parameters dictionary (see Examples)
+    @param sim_functions: A class inherited from dose.dose_functions
+    class to implement all the needed simulation functions.
+    @param grid: dictionary of lists of values with parameter name as key
+    @param seed: base random seed; each run is seeded with the base seed
+    plus a number derived from its name. Default = None (a random seed).
+    @param processes: number of worker processes. Default = None, which
+    uses the number of CPUs.
+    @param cost: function which estimates the cost of a run from its
+    simulation parameters. Default = run_cost.
+    @param progress: if True, print the progress of the runs.
+    Default = True.
+    @return: dictionary of manifest with run name as key, where each run
+    has status ('completed' or 'failed'), seed, values (the values of the
+    grid), starting_time (simulation starting time in the logging
+    database), directory (simulation file directory) and error (traceback
+    of failed run)
+    '''
+    directory = simulations_directory()
+    if not os.path.exists(directory): os.makedirs(directory)
+    manifest_file = os.path.join(directory,
+        sim_parameters["simulation_name"] + '_sweep.json')
+    manifest = read_manifest(manifest_file)
+    if seed is None: seed = random.randrange(2 ** 31)
+    runs = []
+    for (name, parameters, values) in parameter_grid(sim_parameters, grid):
+        run_seed = (seed + int(name.rsplit('_', 1)[1], 16)) % (2 ** 31)
+        # runs are resumed with their original seeds
+        run_seed = manifest.get(name, {}).get('seed', run_seed)
+        runs.append((cost(parameters), name, parameters, run_seed, values))
+    # longest runs first
+    runs.sort(key=lambda run: (-run[0], run[1]))
+    runs = [(name, parameters, run_seed, {'values': values})
+            for (_, name, parameters, run_seed, values) in runs]
+    return run_simulations(runs, sim_functions, manifest_file, processes,
+                           progress)
@@ -0,0 +1,198 @@
+'''
+Neighbourhood topology of the ecological cells of a World for DOSE (digital
+organism simulation environment). The neighbours of every ecological cell
+are computed once when the topology is built; hence, neighbours can be
+looked up in constant time by deployment, migration (see migration.migrate)
+and ecological diffusion schemes.
+
+Date created: 19th October 2026
+'''
+import itertools
+import random
+
+neighbourhoods = ('moore', 'von neumann')
+boundaries = ('bounded', 'toroidal')
+
+def neighbourhood_offsets(neighbourhood='moore', dimensions=2):
+    '''
+    Generates the offsets from an ecological cell to its neighbours.
+
+    @param neighbourhood: type of neighbourhood - 'moore' (cells which
+    share a face, edge or corner) or 'von neumann' (cells which share a
+    face). Default = 'moore'.
+    @param dimensions: 2 (neighbours on the x-y plane) or 3 (neighbours on
+    all axes). Default = 2.
+    @return: list of offsets as (dx, dy, dz)
+    '''
+    neighbourhood = str(neighbourhood).lower()
+    if neighbourhood not in neighbourhoods:
+        raise ValueError('Unknown neighbourhood: ' + str(neighbourhood))
+    if dimensions not in (2, 3):
+        raise ValueError('Dimensions must be 2 or 3: ' + str(dimensions))
+    if dimensions == 2: axes = [(-1, 0, 1), (-1, 0, 1), (0,)]
+    else: axes = [(-1, 0, 1)] * 3
+    offsets = []
+    for offset in itertools.product(*axes):
+        distance = sum([abs(d) for d in offset])
+        if distance == 0: continue
+        if neighbourhood == 'von neumann' and distance > 1: continue
+        offsets.append(offset)
+    return offsets
+
+class Topology(object):
+    '''
+    Precomputed neighbourhood topology of a 3-dimensional world of
+    ecological cells. Ecological cells are numbered in the order of x, y,
+    then z (see Topology.cell_index), and the neighbours of each cell are
+    kept both as locations (Topology.neighbour_cells) and as cell numbers
+    (Topology.neighbour_indices). A Topology object can be used as a
+    function which takes a location and returns the list of neighbours;
+    for example, as the topology in migration.migrate.
+    '''
+    def __init__(self, world_x, world_y, world_z, neighbourhood='moore',
+                 boundary='bounded', dimensions=2):
+        '''
+        Builds the topology.
+
+        @param world_x: number of ecological cells on the x-axis
+        @type world_x: integer
+        @param world_y: number of ecological cells on the y-axis
+        @type world_y: integer
+        @param world_z: number of ecological cells on the z-axis
+        @type world_z: integer
+        @param neighbourhood: type of neighbourhood - 'moore' or
+        'von neumann' (see neighbourhood_offsets). Default = 'moore'.
+        @param boundary: 'bounded' (cells at the edge of the world have
+        fewer neighbours) or 'toroidal' (edges of the world wrap around).
+        Default = 'bounded'.
+        @param dimensions: 2 (neighbours on the x-y plane) or 3 (neighbours
+        on all axes). Default = 2, which is the neighbourhood of
+        simulation_calls.adjacent_cells.
+        '''
+        boundary = str(boundary).lower()
+        if boundary not in boundaries:
+            raise ValueError('Unknown boundary: ' + str(boundary))
+        self.world_x = int(world_x)
+        self.world_y = int(world_y)
+        self.world_z = int(world_z)
+        self.neighbourhood = str(neighbourhood).lower()
+        self.boundary = boundary
+        self.dimensions = dimensions
+        self.offsets = neighbourhood_offsets(neighbourhood, dimensions)
+        self.cells = [(x, y, z) for x in range(self.world_x)
+                      for y in range(self.world_y)
+                      for z in range(self.world_z)]
+        self.indices = dict([(cell, i) for (i, cell) in enumerate(self.cells)])
+        self.neighbour_cells = {}
+        self.neighbour_indices = []
+        self._edges = None
+        for cell in self.cells:
+            neighbours = self._neighbours(cell)
+            self.neighbour_cells[cell] = neighbours
+            self.neighbour_indices.append(tuple([self.indices[neighbour]
+                                                 for neighbour in neighbours]))
+
+    def _neighbours(self, cell):
+        size = (self.world_x, self.world_y, self.world_z)
+        neighbours = []
+        for offset in self.offsets:
+            neighbour = [cell[axis] + offset[axis] for axis in range(3)]
+            if self.boundary == 'toroidal':
+                neighbour = [neighbour[axis] % size[axis]
+                             for axis in range(3)]
+            elif [axis for axis in range(3)
+                  if neighbour[axis] < 0 or neighbour[axis] >= size[axis]]:
+                continue
+            neighbour = tuple(neighbour)
+            # small toroidal worlds wrap onto the cell itself or onto the
+            # same neighbour more than once
+            if neighbour != cell and neighbour not in neighbours:
+                neighbours.append(neighbour)
+        return tuple(neighbours)
+
+    def edges(self):
+        '''
+        Gives the neighbourhood as lists of cell numbers of edges from
+        each cell to each of its neighbours, for processing fields of a
+        world as a whole (see diffusion.diffuse).
+
+        @return: (list of source cell numbers, list of neighbour cell
+        numbers)
+        '''
+        if self._edges is None:
+            sources = []
+            targets = []
+            for (source, neighbours) in enumerate(self.neighbour_indices):
+                sources.extend([source] * len(neighbours))
+                targets.extend(neighbours)
+            self._edges = (sources, targets)
+        return self._edges
+
+    def __call__(self, location):
+        return list(self.neighbours(location))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def cell_index(self, location):
+        '''
+        Gives the number of an ecological cell.
+
+        @param location: location of ecological cell as (x,y,z)
+        @return: cell number, from 0 to (number of cells - 1)
+        '''
+        return self.indices[(location[0], location[1], location[2])]
+
+    def cell_location(self, index):
+        '''
+        Gives the location of an ecological cell from its number.
+
+        @param index: cell number
+        @return: location of ecological cell as (x,y,z)
+        '''
+        return self.cells[index]
+
+    def neighbours(self, location):
+        '''
+        Gives the neighbours of an ecological cell.
+
+        @param location: location of ecological cell as (x,y,z)
+        @return: tuple of locations of neighbouring cells
+        '''
+        return self.neighbour_cells[(location[0], location[1], location[2])]
+
+    def random_neighbour(self, location):
+        '''
+        Randomly selects a neighbour of an ecological cell.
+
+        @param location: location of ecological cell as (x,y,z)
+        @return: location of neighbouring cell, or None if the cell has no
+        neighbours
+        '''
+        neighbours = self.neighbours(location)
+        if not neighbours: return None
+        return random.choice(neighbours)
+
+_topologies = {}
+
+def world_topology(world_x, world_y, world_z, neighbourhood='moore',
+                   boundary='bounded', dimensions=2):
+    '''
+    Gives the topology of a world of a given size, building it only once
+    for each size and type of topology.
+
+    @param world_x: number of ecological cells on the x-axis
+    @param world_y: number of ecological cells on the y-axis
+    @param world_z: number of ecological cells on the z-axis
+    @param neighbourhood: type of neighbourhood (see Topology).
+    Default = 'moore'.
+    @param boundary: type of boundary (see Topology). Default = 'bounded'.
+    @param dimensions: 2 or 3 (see Topology). Default = 2.
+    @return: Topology object
+    '''
+    key = (int(world_x), int(world_y), int(world_z),
+           str(neighbourhood).lower(), str(boundary).lower(), dimensions)
+    if key not in _topologies:
+        _topologies[key] = Topology(world_x, world_y, world_z,
+                                    neighbourhood, boundary, dimensions)
+    return _topologies[key]
@@ -15,10 +15,9 @@ In this simulation,
     - 20% background point mutation on chromosome of 50 bases
     - 10% organism movement per eco-cell per generation throughout the 
     simulation
-    - the same organism may move twice due to sequential evaluation of the 
-    eco-cells but the probability of such event will be 10% x 10% = 1%; 
-    similarly, 3 or more movement by the same organism may happen with 
-    reducing probabilities
+    - each organism moves at most once per generation as the emigrants of 
+    all eco-cells are selected before any organism is moved (see 
+    dose.migrate)
     - the destination eco-cell for movement is random; thus, from 25 
     possible eco-cells, there is a probability of 4% chance of relocating 
     back to the same (original) eco-cell, 16% chance of relocating to one 
@@ -77,20 +76,12 @@ class simulation_functions(dose.dose_functions):
     def organism_movement(self, Populations, pop_name, World): pass
 
     def organism_location(self, Populations, pop_name, World): 
-        for location in parameters["population_locations"][0]:
-            group = dose.filter_location(location, Populations[pop_name].agents)
-            for i in range(int(round((len(group) * 0.1)))):
-                (x,y,z) = dose.simulation_calls.coordinates(location)
-                World.ecosystem[x][y][z]['organisms'] -= 1
-                immigrant = random.choice(Populations[pop_name].agents)
-                while immigrant not in group:
-                    immigrant = random.choice(Populations[pop_name].agents)
-                new_location = random.choice(parameters["population_locations"][0])
-                while new_location == location:
-                    new_location = random.choice(parameters["population_locations"][0])
-                immigrant.status['location'] = new_location
-                (x,y,z) = dose.simulation_calls.coordinates(new_location)
-                World.ecosystem[x][y][z]['organisms'] += 1
+        locations = parameters["population_locations"][0]
+        rates = dict([(location, 0.1) for location in locations])
+        dose.migrate(Populations[pop_name].agents, rates,
+                     lambda location: [cell for cell in locations 
+                                       if cell != location],
+                     World)
 
     def ecoregulate(self, World): pass
 
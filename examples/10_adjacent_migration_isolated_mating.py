@@ -14,10 +14,9 @@ In this simulation,
     - 0.2% background point mutation on chromosome of 50 bases
     - 10% organism movement per eco-cell per generation throughout the 
     simulation
-    - the same organism may move twice due to sequential evaluation of the 
-    eco-cells but the probability of such event will be 10% x 10% = 1%; 
-    similarly, 3 or more movement by the same organism may happen with 
-    reducing probabilities
+    - each organism moves at most once per generation as the emigrants of 
+    all eco-cells are selected before any organism is moved (see 
+    dose.migrate)
     - no Ragaraja interpretation of genome
     - 1000 generations to be simulated
 '''
@@ -66,19 +65,10 @@ parameters = {
 class simulation_functions(dose.dose_functions):
 
     def organism_movement(self, Populations, pop_name, World):
-        for location in parameters["population_locations"][0]:
-            group = dose.filter_location(location, Populations[pop_name].agents)
-            adj_cells = dose.simulation_calls.adjacent_cells(parameters, location)
-            for i in range(int(round((len(group) * 0.1)))):
-                (x,y,z) = dose.simulation_calls.coordinates(location)
-                World.ecosystem[x][y][z]['organisms'] -= 1
-                immigrant = random.choice(Populations[pop_name].agents)
-                while immigrant not in group:
-                    immigrant = random.choice(Populations[pop_name].agents)
-                new_location = random.choice(adj_cells)
-                immigrant.status['location'] = new_location
-                (x,y,z) = dose.simulation_calls.coordinates(new_location)
-                World.ecosystem[x][y][z]['organisms'] += 1
+        rates = dict([(location, 0.1) 
+                      for location in parameters["population_locations"][0]])
+        dose.migrate(Populations[pop_name].agents, rates, World.topology(),
+                     World)
 
     def organism_location(self, Populations, pop_name, World): pass
 
@@ -21,8 +21,7 @@ try:
 except ImportError: pass
 
 # Example codes starts from here
-import dose, random
-from collections import Counter
+import dose
 from copy import deepcopy
 
 parameters = {
@@ -106,17 +105,9 @@ class simulation_functions(dose.dose_functions):
             Populations[pop_name].agents.append(organism)
 
     def postpopulation_control(self, Populations, pop_name):
-        group = deepcopy(Populations[pop_name].agents)
-        fitness_dict = {}
-        for organism in group:
-            fitness_dict[organism.status['identity']] = int(organism.status['fitness'])
-        sorted_fitness = sorted(list(fitness_dict.items()), key=lambda x: x[1])
-        for index_pair in sorted_fitness:
-            if len(Populations[pop_name].agents) == len(group)/2: break
-            for organism in Populations[pop_name].agents:
-                if organism.status['identity'] == index_pair[0]:
-                    Populations[pop_name].agents.remove(organism)
-                    break;
+        agents = Populations[pop_name].agents
+        Populations[pop_name].agents = \
+            dose.truncation_selection(agents, len(agents) // 2)
 
     def generation_events(self, Populations, pop_name): pass
 
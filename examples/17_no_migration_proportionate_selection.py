@@ -21,8 +21,7 @@ try:
 except ImportError: pass
 
 # Example codes starts from here
-import dose, random
-from collections import Counter
+import dose
 from copy import deepcopy
 
 parameters = {
@@ -106,27 +105,9 @@ class simulation_functions(dose.dose_functions):
             Populations[pop_name].agents.append(organism)
 
     def postpopulation_control(self, Populations, pop_name):
-        group = deepcopy(Populations[pop_name].agents)
-        fitness_dict = {}
-        for organism in group:
-            fitness_dict[organism.status['identity']] = float(organism.status['fitness'])
-        sorted_fitness = sorted(list(fitness_dict.items()), key=lambda x: x[1])
-        sorted_fitness = [list(item) for item in sorted_fitness]
-        total_fitness = sum(fitness_dict.values())
-        cumulated_fitness = 0
-        for i in range(len(sorted_fitness)):
-            sorted_fitness[i][1] = cumulated_fitness + (sorted_fitness[i][1] / total_fitness)
-            cumulated_fitness = cumulated_fitness + (sorted_fitness[i][1] / total_fitness)
-        filter_list = []
-        while len(filter_list) != 100:
-            random_val = random.uniform(min([fitness[1] for fitness in sorted_fitness]), 
-                                        sum([fitness[1] for fitness in sorted_fitness]))
-            for fitness_list in sorted_fitness:
-                if fitness_list[1] > random_val and fitness_list[0] not in filter_list:
-                    filter_list.append(fitness_list[0])
-                    break
-        new_population = [organism for organism in Populations[pop_name].agents if organism.status['identity'] in filter_list]
-        Populations[pop_name].agents = new_population
+        Populations[pop_name].agents = \
+            dose.roulette_selection(Populations[pop_name].agents, 100,
+                                    replacement=False)
 
     def generation_events(self, Populations, pop_name): pass
 
@@ -340,6 +340,14 @@ parameters = {# Part 1: Simulation metadata
               "database_logging_frequency": 1
              }
 
+def alignment_fitness(organism):
+    chromosome = ''.join(organism.genome[0].sequence)
+    score = [aligner.score(chromosome, seq) 
+             for seq in known_sequences]
+    return sum(score) / len(score)
+
+fitness_cache = dose.FitnessCache(alignment_fitness)
+
 class simulation_functions(dose.dose_functions):
 
     def organism_movement(self, Populations, pop_name, World): pass
@@ -355,14 +363,7 @@ class simulation_functions(dose.dose_functions):
     def report(self, World): pass
 
     def fitness(self, Populations, pop_name):
-        agents = Populations[pop_name].agents
-        for index in range(len(agents)):
-            organism = agents[index]
-            chromosome = ''.join(organism.genome[0].sequence)
-            score = [aligner.score(chromosome, seq) 
-                     for seq in known_sequences]
-            score = sum(score) / len(score)
-            agents[index].status['fitness'] = score
+        fitness_cache.evaluate_population(Populations[pop_name].agents)
 
     def mutation_scheme(self, organism): 
         organism.genome[0].rmutate(parameters["mutation_type"],
@@ -0,0 +1,149 @@
+import copy
+import pickle
+
+import pytest
+
+from dose import background_writer, checkpoint, genetic, simulation_calls
+from dose.array_world import ArrayWorld
+from dose.checkpoint import DeltaCheckpoint, restore_delta_checkpoint
+
+
+def make_world():
+    World = ArrayWorld(2, 2, 1, vector_fields={'local_input': 3},
+                       use_numpy=False)
+    cell = World.ecosystem[0][1][0]
+    cell['organisms'] = 5
+    cell['local_input'] = [1, 2, 3]
+    # a vector view kept in an ecological cell and in a status table
+    cell['previous_input'] = cell['local_input']
+    return World
+
+
+def make_populations(World):
+    organism = genetic.Organism([genetic.Chromosome(list('ACGT' * 5),
+                                                    'ACGT', 0)])
+    organism.status['input'] = World.ecosystem[0][1][0]['local_input']
+    return {'a': genetic.Population(0, 10, [organism])}
+
+
+def cell_state(World):
+    return [dict([(key, list(value) if key.endswith('input') else value)
+                  for (key, value) in World.ecosystem[x][y][0].items()])
+            for x in range(2) for y in range(2)]
+
+
+def test_vector_views_are_pickled_and_copied_as_arrays():
+    World = make_world()
+    view = World.ecosystem[0][1][0]['local_input']
+    view[1] = 7
+    assert World.ecosystem[0][1][0]['local_input'] == [1, 7, 3]
+    for values in (pickle.loads(pickle.dumps(view)), copy.copy(view),
+                   copy.deepcopy(view)):
+        assert list(values) == [1, 7, 3]
+        values[0] = 9
+        assert view[0] == 1
+    with pytest.raises(IndexError):
+        view[3] = 1
+
+
+def test_world_round_trips():
+    World = make_world()
+    for restored in (pickle.loads(pickle.dumps(World)), copy.deepcopy(World),
+                     background_writer.snapshot_world(World)):
+        assert cell_state(restored) == cell_state(World)
+        restored.ecosystem[0][1][0]['local_input'][0] = 9
+        assert World.ecosystem[0][1][0]['local_input'][0] == 1
+
+
+def test_burial_and_checkpoints_round_trip(tmp_path):
+    World = make_world()
+    Populations = make_populations(World)
+    sim_parameters = {'directory': str(tmp_path) + '/',
+                      'simulation_name': 'sim',
+                      'eco_buried_frequency': 1}
+    simulation_calls.bury_world(sim_parameters, World, 1)
+    background_writer.start_background_writer()
+    try:
+        simulation_calls.bury_world(sim_parameters, World, 2)
+        checkpoint.save_checkpoint(str(tmp_path / 'sim.checkpoint'), 2,
+                                   sim_parameters, Populations, World,
+                                   background_writer.background_writer())
+    finally:
+        background_writer.stop_background_writer()
+    for generation in (1, 2):
+        f = open(str(tmp_path / ('sim_gen%i.eco' % generation)), 'rb')
+        buried = pickle.load(f)
+        f.close()
+        assert cell_state(buried) == cell_state(World)
+    record = checkpoint.load_checkpoint(str(tmp_path / 'sim.checkpoint'))
+    assert cell_state(record['world']) == cell_state(World)
+    assert list(record['populations']['a'].agents[0].status['input']) == \
+        [1, 2, 3]
+
+    writer = DeltaCheckpoint(str(tmp_path / 'run'), rebase_frequency=5)
+    writer.record(1, World, Populations)
+    World.ecosystem[1][0][0]['local_input'] = [4, 5, 6]
+    writer.record(2, World, Populations)
+    (_, restored, populations) = \
+        restore_delta_checkpoint(str(tmp_path / 'run'))
+    assert cell_state(restored) == cell_state(World)
+    assert list(populations['a'].agents[0].status['input']) == [1, 2, 3]
+
+
+def test_simulation_with_array_backed_local_fields(tmp_path, monkeypatch):
+    from dose import dose
+
+    class Functions(dose.dose_functions):
+        def organism_movement(self, Populations, pop_name, World): pass
+        def organism_location(self, Populations, pop_name, World): pass
+        def ecoregulate(self, World): pass
+        def update_ecology(self, World, x, y, z): pass
+
+        def update_local(self, World, x, y, z):
+            cell = World.ecosystem[x][y][z]
+            cell['local_input'][0] = cell['local_input'][0] + 1
+            cell['local_output'][1] = 0.5
+
+        def report(self, World): pass
+        def fitness(self, Populations, pop_name): pass
+        def mutation_scheme(self, organism): pass
+        def prepopulation_control(self, Populations, pop_name): pass
+        def mating(self, Populations, pop_name): pass
+        def postpopulation_control(self, Populations, pop_name): pass
+        def generation_events(self, Populations, pop_name): pass
+
+        def population_report(self, Populations, pop_name):
+            return ''
+
+        def database_report(self, con, cur, start_time, Populations,
+                            World, generation_count): pass
+        def deployment_scheme(self, Populations, pop_name, World): pass
+
+    parameters = {'simulation_name': 'array_backend',
+                  'population_names': ['pop_01'],
+                  'population_locations': [[(0, 0, 0)]],
+                  'deployment_code': 1, 'chromosome_bases': ['0', '1'],
+                  'background_mutation': 0.0, 'additional_mutation': 0,
+                  'mutation_type': 'point', 'chromosome_size': 10,
+                  'genome_size': 1, 'max_tape_length': 10,
+                  'clean_cell': True, 'interpret_chromosome': False,
+                  'max_codon': 100, 'population_size': 5,
+                  'eco_cell_capacity': 10, 'world_x': 2, 'world_y': 2,
+                  'world_z': 1, 'goal': 0, 'maximum_generations': 3,
+                  'fossilized_ratio': 0.01, 'fossilized_frequency': 100,
+                  'print_frequency': 100, 'ragaraja_version': 0,
+                  'ragaraja_instructions': [], 'eco_buried_frequency': 100,
+                  'database_file': 'array_backend.db',
+                  'database_logging_frequency': 100,
+                  'world_backend': 'array',
+                  'world_vector_fields': {'local_input': 3,
+                                          'local_output': 2}}
+    monkeypatch.chdir(tmp_path)
+    (_, _, _, World) = dose.simulate(parameters, Functions)
+    assert isinstance(World, ArrayWorld)
+    assert sorted(World.vector_fields) == ['local_input', 'local_output']
+    for x in range(2):
+        for y in range(2):
+            cell = World.ecosystem[x][y][0]
+            assert list(cell['local_input']) == [3.0, 0.0, 0.0]
+            assert list(cell['local_output']) == [0.0, 0.5]
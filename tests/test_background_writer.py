@@ -0,0 +1,91 @@
+import pickle
+import threading
+import time
+
+import pytest
+
+from dose import background_writer, dose_world, genetic, simulation_calls
+
+
+def make_population():
+    agents = []
+    for i in range(5):
+        organism = genetic.Organism([genetic.Chromosome(list('ACGT' * 5),
+                                                        'ACGT', 0)])
+        organism.status['blood'] = [i]
+        agents.append(organism)
+    return genetic.Population(0, 10, agents)
+
+
+def test_snapshots_are_not_changed_by_simulation():
+    World = dose_world.World(2, 2, 1)
+    World.ecosystem[0][0][0]['local_input'] = [1, 2]
+    population = make_population()
+    world = background_writer.snapshot_world(World)
+    sample = background_writer.snapshot_population(population)
+    World.ecosystem[0][0][0]['local_input'].append(3)
+    World.ecosystem[1][1][0]['organisms'] = 99
+    population.agents[0].genome[0].rmutate('point', 1)
+    population.agents[1].status['blood'].append(5)
+    population.agents.pop()
+    world = pickle.loads(pickle.dumps(world))
+    sample = pickle.loads(pickle.dumps(sample))
+    assert world.ecosystem[0][0][0]['local_input'] == [1, 2]
+    assert world.ecosystem[1][1][0]['organisms'] == 0
+    assert len(sample.agents) == 5
+    assert sample.agents[0].genome[0].sequence == list('ACGT' * 5)
+    assert sample.agents[0].genome[0].fingerprint() == \
+        genetic.sequence_fingerprint(list('ACGT' * 5))
+    assert sample.agents[1].status['blood'] == [1]
+
+
+def test_burial_is_pickled_by_writer(tmp_path, monkeypatch):
+    threads = []
+    dump = pickle.dump
+
+    def recording_dump(value, f, *args):
+        threads.append(threading.current_thread().name)
+        return dump(value, f, *args)
+    monkeypatch.setattr(background_writer.pickle, 'dump', recording_dump)
+    monkeypatch.setattr(simulation_calls.pickle, 'dumps', None)
+    World = dose_world.World(2, 2, 1)
+    sim_parameters = {'directory': str(tmp_path) + '/',
+                      'simulation_name': 'sim',
+                      'eco_buried_frequency': 1}
+    background_writer.start_background_writer()
+    try:
+        simulation_calls.bury_world(sim_parameters, World, 1)
+        World.ecosystem[0][0][0]['organisms'] = 99
+    finally:
+        background_writer.stop_background_writer()
+    assert threads == ['dose-background-writer']
+    f = open(str(tmp_path / 'sim_gen1.eco'), 'rb')
+    buried = pickle.load(f)
+    f.close()
+    assert buried.ecosystem[0][0][0]['organisms'] == 0
+
+
+def test_pending_writes_complete_when_simulation_fails(tmp_path,
+                                                       monkeypatch):
+    filename = str(tmp_path / 'written.txt')
+
+    def slow_write(filename, data):
+        time.sleep(0.2)
+        background_writer.write_file(filename, data, 'w')
+
+    def failing_cycle(sim_functions, sim_parameters, Populations, World,
+                      generation_count, plan):
+        background_writer.background_writer().submit(slow_write, filename,
+                                                     'done')
+        raise RuntimeError('simulation failed')
+    monkeypatch.setattr(simulation_calls, 'simulation_plan',
+                        lambda *args: None)
+    monkeypatch.setattr(simulation_calls, 'simulate_one_cycle',
+                        failing_cycle)
+    with pytest.raises(RuntimeError):
+        simulation_calls.simulate_generations(
+            None, {'background_writing': 2}, {}, None, None, None, 0, 5)
+    assert background_writer.background_writer() is None
+    f = open(filename)
+    assert f.read() == 'done'
+    f.close()
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+
+from dose import background_writer, cell_update, dose_world
+
+
+def spread(World, x, y, z):
+    # next temperature is the sum of the previous temperatures of the row
+    World.ecosystem[x][y][z]['temperature'] = \
+        sum([World.ecosystem[x][j][z]['temperature']
+             for j in range(World.world_y)])
+
+
+def make_world():
+    World = dose_world.World(4, 4, 1)
+    for x in range(4):
+        for y in range(4):
+            World.ecosystem[x][y][0]['temperature'] = x * 4 + y
+    return World
+
+
+def temperatures(World):
+    return [[World.ecosystem[x][y][0]['temperature'] for y in range(4)]
+            for x in range(4)]
+
+
+def test_pool_updates_match_sequential_updates_and_pool_is_kept():
+    cells = [(x, y, 0) for x in range(4) for y in range(4)]
+    sequential = make_world()
+    parallel = make_world()
+    try:
+        for _ in range(3):
+            cell_update.update_cells(sequential, spread, cells, 1)
+            cell_update.update_cells(parallel, spread, cells, 2)
+            assert temperatures(parallel) == temperatures(sequential)
+            pool = cell_update._pool
+            assert pool is not None
+            assert cell_update.cell_pool(spread, 2) is pool
+    finally:
+        cell_update.close_cell_pool()
+    assert cell_update._pool is None
+
+
+def test_workers_are_not_forked_with_background_writer():
+    background_writer.start_background_writer()
+    try:
+        assert cell_update.start_method() != 'fork'
+    finally:
+        background_writer.stop_background_writer()
+    if 'fork' in multiprocessing.get_all_start_methods():
+        assert cell_update.start_method() == 'fork'
+
+
+class RecordingPool(object):
+    # runs the workers in this process and records the items sent
+    def __init__(self, function):
+        cell_update._cell_initializer(function)
+        self.items = []
+
+    def imap(self, worker, items):
+        self.items.extend(items)
+        return [worker(item) for item in items]
+
+
+def test_world_is_handed_over_once_per_update(monkeypatch):
+    cells = [(x, y, 0) for x in range(4) for y in range(4)]
+    pools = []
+
+    def recording_pool(function, processes=None):
+        pools.append(RecordingPool(function))
+        return pools[-1]
+
+    monkeypatch.setattr(cell_update, 'cell_pool', recording_pool)
+    sequential = make_world()
+    parallel = make_world()
+    for _ in range(2):
+        cell_update.update_cells(sequential, spread, cells, 1)
+        cell_update.update_cells(parallel, spread, cells, 4, chunksize=2)
+        assert temperatures(parallel) == temperatures(sequential)
+    for pool in pools:
+        assert len(pool.items) == 8
+        # each chunk carries the locations of its cells, not the World
+        assert len(set([(version, filename)
+                        for (version, filename, _) in pool.items])) == 1
+        assert all([isinstance(filename, str) and not os.path.exists(filename)
+                    for (_, filename, _) in pool.items])
+        assert [location for item in pool.items for location in item[2]] \
+            == cells
@@ -0,0 +1,118 @@
+import copy
+import pickle
+import random
+
+from dose import checkpoint, dose_world, genetic
+from dose.checkpoint import DeltaCheckpoint, restore_delta_checkpoint
+
+
+def make_population(size=10, lean=False):
+    chromosome = genetic.LeanChromosome if lean else genetic.Chromosome
+    organism = genetic.LeanOrganism if lean else genetic.Organism
+    agents = []
+    for _ in range(size):
+        sequence = [random.choice('ACGT') for _ in range(40)]
+        agents.append(organism([chromosome(sequence, 'ACGT', 0.1),
+                                chromosome(list(sequence), 'ACGT', 0.1)]))
+    return genetic.Population(0, 10, agents)
+
+
+def record_dumps(monkeypatch):
+    dumped = []
+    dumps = pickle.dumps
+
+    def recording_dumps(value, *args):
+        dumped.append(value)
+        return dumps(value, *args)
+    monkeypatch.setattr(checkpoint.pickle, 'dumps', recording_dumps)
+    return dumped
+
+
+def state(World, Populations):
+    return (World.ecosystem,
+            dict([(name, [([list(c.sequence) for c in o.genome],
+                           dict(o.status))
+                          for o in population.agents])
+                  for (name, population) in Populations.items()]))
+
+
+def test_unchanged_parts_are_not_serialized(tmp_path, monkeypatch):
+    random.seed(1)
+    World = dose_world.World(3, 3, 1)
+    Populations = {'a': make_population(), 'b': make_population(lean=True)}
+    writer = DeltaCheckpoint(str(tmp_path / 'run'), rebase_frequency=5)
+    writer.record(1, World, Populations)
+
+    mutated = Populations['a'].agents[3].genome[1]
+    mutated.rmutate('point', 1)
+    Populations['b'].agents[0].genome[0].kmutate('point', 1)
+    World.ecosystem[1][2][0]['temperature'] = 42
+    dumped = record_dumps(monkeypatch)
+    writer.record(2, World, Populations)
+
+    chromosomes = [value for value in dumped
+                   if isinstance(value, (genetic.Chromosome,
+                                         genetic.LeanChromosome))]
+    assert len(chromosomes) == 2
+    assert chromosomes[0] is mutated
+    cells = [value for value in dumped
+             if isinstance(value, dict) and 'temperature' in value]
+    assert cells == [World.ecosystem[1][2][0]]
+
+    (generation, restored, populations) = \
+        restore_delta_checkpoint(str(tmp_path / 'run'))
+    assert generation == 2
+    assert state(restored, populations) == state(World, Populations)
+
+
+def test_unchanged_generation_gives_empty_delta(tmp_path, monkeypatch):
+    random.seed(2)
+    World = dose_world.World(2, 2, 1)
+    Populations = {'a': make_population()}
+    writer = DeltaCheckpoint(str(tmp_path / 'run'))
+    writer.record(1, World, Populations)
+    dumped = record_dumps(monkeypatch)
+    writer.record(2, World, Populations)
+    assert len(dumped) == 1
+    record = dumped[0]
+    assert record['cells'] == {}
+    assert record['populations']['a']['new'] == {}
+    assert record['populations']['a']['changed'] == {}
+    assert record['populations']['a']['shell'] is None
+
+
+def test_new_organisms_and_status(tmp_path):
+    random.seed(3)
+    World = dose_world.World(2, 2, 1)
+    Populations = {'a': make_population()}
+    writer = DeltaCheckpoint(str(tmp_path / 'run'), rebase_frequency=3)
+    for generation in range(1, 8):
+        population = Populations['a']
+        population.agents[0].status['age'] = generation
+        population.agents.append(copy.deepcopy(population.agents[1]))
+        population.agents.pop(2)
+        population.generation = generation
+        writer.record(generation, World, Populations)
+    (_, restored, populations) = \
+        restore_delta_checkpoint(str(tmp_path / 'run'))
+    assert state(restored, populations) == state(World, Populations)
+    assert populations['a'].generation == 7
+
+
+def test_result_files_are_truncated_to_checkpoint(tmp_path):
+    World = dose_world.World(2, 2, 1)
+    Populations = {'a': make_population()}
+    results = str(tmp_path / 'sim_a.result.txt')
+    missing = str(tmp_path / 'sim_b.result.txt')
+    with open(results, 'w') as f:
+        f.write('SIMULATION: sim\n\nGENERATION: 1\n')
+    filename = str(tmp_path / 'sim.checkpoint')
+    checkpoint.save_checkpoint(filename, 1, {}, Populations, World,
+                               files=[results, missing])
+    with open(results, 'a') as f:
+        f.write('\nGENERATION: 2\n\nSIMULATION ENDED: now')
+    record = checkpoint.load_checkpoint(filename)
+    assert record['files'] == {results: 31}
+    checkpoint.truncate_files(record['files'])
+    with open(results) as f:
+        assert f.read() == 'SIMULATION: sim\n\nGENERATION: 1\n'
@@ -0,0 +1,136 @@
+import random
+
+from dose import genetic
+
+SAMPLES = 20000
+TOLERANCE = 0.02
+
+
+def histogram(values, bins):
+    counts = [0] * bins
+    for value in values:
+        counts[value] = counts[value] + 1
+    return [count / float(len(values)) for count in counts]
+
+
+def distance(histogram1, histogram2):
+    # total variation distance between 2 distributions
+    return sum([abs(p - q) for (p, q) in zip(histogram1, histogram2)]) / 2
+
+
+def crossover_point(chromosome):
+    sequence = list(chromosome.sequence)
+    return len(sequence) - sequence.count('T')
+
+
+def test_batch_crossover_points_match_per_pair_crossover():
+    length = 12
+    chromosomes = [genetic.Chromosome(['A'] * length, 'AT', 0),
+                   genetic.Chromosome(['T'] * length, 'AT', 0)]
+    random.seed(11)
+    baseline = []
+    for _ in range(SAMPLES):
+        position = random.randint(0, len(chromosomes[0].sequence))
+        (new1, _) = genetic.crossover(chromosomes[0], chromosomes[1],
+                                      position)
+        baseline.append(crossover_point(new1))
+    random.seed(12)
+    offspring = genetic.batch_crossover(chromosomes, [0] * SAMPLES,
+                                        [1] * SAMPLES)
+    batched = [crossover_point(new1) for (new1, _) in offspring]
+    assert distance(histogram(baseline, length + 1),
+                    histogram(batched, length + 1)) < TOLERANCE
+    for (new1, new2) in offspring[:100]:
+        assert crossover_point(new1) == length - crossover_point(new2)
+
+
+def test_uniform_crossover_swaps_at_rate():
+    length = 50
+    chromosomes = [genetic.Chromosome(['A'] * length, 'AT', 0),
+                   genetic.Chromosome(['T'] * length, 'AT', 0)]
+    random.seed(13)
+    offspring = genetic.batch_crossover(chromosomes, [0] * 2000, [1] * 2000,
+                                        scheme='uniform', rate=0.3)
+    swapped = sum([list(new1.sequence).count('T')
+                   for (new1, _) in offspring])
+    assert abs(swapped / float(length * 2000) - 0.3) < TOLERANCE
+
+
+def make_agents(size=20, length=8):
+    random.seed(14)
+    agents = []
+    for _ in range(size):
+        organism = genetic.Organism([genetic.Chromosome(
+            [random.choice('AT') for _ in range(length)], 'AT', 0)])
+        organism.generate_name()
+        agents.append(organism)
+    return agents
+
+
+def allele_frequencies(organisms, length):
+    counts = [0] * length
+    for organism in organisms:
+        sequence = organism.genome[0].sequence
+        for i in range(length):
+            if sequence[i] == 'A': counts[i] = counts[i] + 1
+    return [count / float(len(organisms)) for count in counts]
+
+
+def per_pair_mating(agents, size, weights=None):
+    offspring = []
+    for _ in range(size):
+        if weights is None:
+            (parent1, parent2) = (random.choice(agents),
+                                  random.choice(agents))
+        else:
+            (parent1, parent2) = random.choices(agents, weights, k=2)
+        chromosome = parent1.genome[0]
+        position = random.randint(0, len(chromosome.sequence))
+        (new, _) = genetic.crossover(chromosome, parent2.genome[0],
+                                     position)
+        offspring.append(genetic.Organism([new]))
+    return offspring
+
+
+def check_bulk_mating(weights):
+    length = 8
+    agents = make_agents(length=length)
+    random.seed(15)
+    baseline = allele_frequencies(
+        per_pair_mating(agents, SAMPLES, weights), length)
+    random.seed(16)
+    bulk = allele_frequencies(
+        genetic.bulk_mating(agents, SAMPLES, weights=weights), length)
+    for (p, q) in zip(baseline, bulk):
+        assert abs(p - q) < TOLERANCE
+
+
+def test_bulk_mating_allele_frequencies_match_per_pair_mating():
+    check_bulk_mating(None)
+
+
+def test_weighted_bulk_mating_matches_per_pair_mating():
+    check_bulk_mating([float(i % 5) for i in range(20)])
+
+
+def test_bulk_mating_crossover_points_match_per_pair_mating():
+    length = 10
+    agents = [genetic.Organism([genetic.Chromosome([base] * length,
+                                                   'AT', 0)])
+              for base in 'AT']
+    for organism in agents: organism.generate_name()
+    identities = [organism.status['identity'] for organism in agents]
+    random.seed(17)
+    baseline = [crossover_point(organism.genome[0])
+                for organism in per_pair_mating(agents, SAMPLES)]
+    random.seed(18)
+    bulk = [crossover_point(organism.genome[0])
+            for organism in genetic.bulk_mating(agents, SAMPLES)]
+    assert distance(histogram(baseline, length + 1),
+                    histogram(bulk, length + 1)) < TOLERANCE
+    random.seed(19)
+    crossed = [crossover_point(organism.genome[0])
+               for organism in genetic.bulk_mating(agents, SAMPLES)
+               if organism.status['parents'] == identities]
+    assert distance(histogram(crossed, length + 1),
+                    [1.0 / (length + 1)] * (length + 1)) < 2 * TOLERANCE
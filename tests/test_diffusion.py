@@ -0,0 +1,75 @@
+import pytest
+
+from dose import array_world, diffusion, dose_world
+from dose.array_world import ArrayWorld
+
+
+def make_dict_world(values):
+    World = dose_world.World(len(values), 1, 1)
+    for (x, value) in enumerate(values):
+        World.ecosystem[x][0][0]['food'] = value
+    return World
+
+
+def make_array_world(values, use_numpy=False, default=0.0):
+    if use_numpy and array_world.numpy is None:
+        pytest.skip('NumPy is not installed')
+    World = ArrayWorld(len(values), 1, 1, use_numpy=use_numpy)
+    World.add_field('food', default)
+    for (x, value) in enumerate(values):
+        World.ecosystem[x][0][0]['food'] = value
+    return World
+
+
+def food(World):
+    return [World.ecosystem[x][0][0]['food'] for x in range(World.world_x)]
+
+
+worlds = [make_dict_world,
+          lambda values: make_array_world(values),
+          lambda values: make_array_world(values, use_numpy=True)]
+
+
+@pytest.mark.parametrize('make_world', worlds)
+def test_kernels(make_world):
+    World = make_world([4.0, 0.0, 0.0])
+    diffusion.diffuse(World, 'food', 0.5)
+    assert food(World) == [2.0, 2.0, 0.0]
+    diffusion.diffuse(World, 'food', 0.5)
+    assert food(World) == [1.5, 2.0, 0.5]
+    diffusion.decay(World, 'food', 0.5)
+    assert food(World) == [0.75, 1.0, 0.25]
+    diffusion.source_sink(World, 'food', {(2, 0, 0): 1.75})
+    assert food(World) == [0.75, 1.0, 2.0]
+    diffusion.source_sink(World, 'food', [-1.0, 0.0, 0.0], minimum=0.0)
+    assert food(World) == [0.0, 1.0, 2.0]
+    diffusion.source_sink(World, 'food', 1)
+    assert food(World) == [1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_integer_array_fields(use_numpy):
+    World = make_array_world([4, 0, 0], use_numpy, default=0)
+    with pytest.raises(ValueError):
+        diffusion.diffuse(World, 'food', 0.5)
+    with pytest.raises(ValueError):
+        diffusion.decay(World, 'food', 0.5)
+    with pytest.raises(ValueError):
+        diffusion.source_sink(World, 'food', 0.5)
+    assert food(World) == [4, 0, 0]
+    diffusion.source_sink(World, 'food', {(1, 0, 0): 2})
+    diffusion.source_sink(World, 'food', -3, minimum=0)
+    assert food(World) == [1, 0, 0]
+
+
+def test_numpy_amounts():
+    numpy = pytest.importorskip('numpy')
+    for World in (make_dict_world([1.0, 2.0]),
+                  make_array_world([1.0, 2.0]),
+                  make_array_world([1.0, 2.0], use_numpy=True)):
+        diffusion.source_sink(World, 'food', numpy.int64(2))
+        diffusion.source_sink(World, 'food', numpy.float64(0.5))
+        assert food(World) == [3.5, 4.5]
+    World = make_array_world([1, 2], default=0)
+    diffusion.source_sink(World, 'food', numpy.int64(2))
+    assert food(World) == [3, 4]
@@ -0,0 +1,128 @@
+import random
+
+from dose import fitness, genetic
+
+
+def make_agents(count=10, generation=1):
+    agents = []
+    for _ in range(count):
+        organism = genetic.Organism([genetic.Chromosome(list('ACGT' * 5),
+                                                        'ACGT', 0)])
+        organism.status['generation'] = generation
+        agents.append(organism)
+    return agents
+
+
+def count_gc(organism):
+    count_gc.calls = count_gc.calls + 1
+    return len([base for base in organism.genome[0].sequence
+                if base in 'GC'])
+
+
+def test_fitness_cache_hits_misses_and_invalidation():
+    count_gc.calls = 0
+    cache = fitness.FitnessCache(count_gc)
+    agents = make_agents()
+    cache.evaluate_population(agents, 1)
+    # identical genomes are evaluated once
+    assert count_gc.calls == 1
+    assert [o.status['fitness'] for o in agents] == [10] * 10
+    assert cache.hit_rate() == 0.9
+
+    agents[0].genome[0].kmutate('point', 0, sequence='G')
+    agents[1].genome[0].sequence[1] = 'A'
+    agents[2].genome[0].sequence.append('G')
+    for organism in agents[3:]:
+        organism.status['generation'] = 2
+    cache.evaluate_population(agents, 2)
+    assert count_gc.calls == 4
+    assert [o.status['fitness'] for o in agents[:3]] == [11, 9, 11]
+    assert [o.status['fitness'] for o in agents[3:]] == [10] * 7
+    assert cache.hit_rate() == 0.7
+    assert cache.hit_rate(1) == 0.9
+    assert cache.report() == [(1, 10, 9, 0.9), (2, 10, 7, 0.7)]
+
+    # scores of genomes not seen for max_age generations are removed
+    cache.evaluate_population(agents[:1], 4)
+    assert len(cache) == 1
+    assert cache.report()[-1] == (4, 1, 0, 0.0)
+
+
+def weighted_score(genome, status):
+    # depends on the genome and on the status of the organism
+    score = 0
+    for (position, base) in enumerate(genome[0].sequence):
+        score = score + (position + 1) * 'ACGT'.index(base)
+    return score * status['age'] + len(status['identity'])
+
+
+def test_parallel_fitness_matches_serial_fitness():
+    random.seed(13)
+    serial = []
+    for age in range(40):
+        organism = genetic.Organism([genetic.Chromosome(
+            [random.choice('ACGT') for _ in range(30)], 'ACGT', 0)])
+        organism.status['age'] = age
+        organism.generate_name()
+        serial.append(organism)
+    parallel = [organism.clone() for organism in serial]
+    fitness.parallel_fitness(weighted_score, serial, 1)
+    try:
+        fitness.parallel_fitness(weighted_score, parallel, 2, chunksize=3)
+        pool = fitness._pool
+        assert pool is not None
+        # the pool is kept for the same function
+        fitness.parallel_fitness(weighted_score, parallel[:5], 2)
+        assert fitness._pool is pool
+    finally:
+        fitness.close_fitness_pool()
+    assert fitness._pool is None
+    scores = [organism.status['fitness'] for organism in serial]
+    assert [organism.status['fitness'] for organism in parallel] == scores
+    assert scores == [weighted_score(organism.genome, organism.status)
+                      for organism in serial]
+    assert len(set(scores)) == 40
+
+
+def common_subsequence_score(sequence, reference):
+    # global alignment score with match = 1 and no mismatch or gap
+    # penalties (the scores of Bio.Align.PairwiseAligner by default)
+    previous = [0] * (len(reference) + 1)
+    for base in sequence:
+        current = [0]
+        for (position, other) in enumerate(reference):
+            if base == other: current.append(previous[position] + 1)
+            else: current.append(max(previous[position + 1],
+                                     current[position]))
+        previous = current
+    return previous[-1]
+
+
+def mutate(sequence, count):
+    sequence = list(sequence)
+    for _ in range(count):
+        sequence[random.randrange(len(sequence))] = random.choice('ACGT')
+    return ''.join(sequence)
+
+
+def test_reference_index_max_prefilter_recall():
+    random.seed(21)
+    references = [''.join([random.choice('ACGT') for _ in range(40)])
+                  for _ in range(30)]
+    index = fitness.ReferenceIndex(references, common_subsequence_score,
+                                   k=4, candidates=5, aggregate='max')
+    recalled = 0
+    queries = 60
+    for _ in range(queries):
+        query = mutate(random.choice(references), 8)
+        exact = index.exact_score(query)
+        approximate = index.score(query)
+        # the candidates are a subset of the references
+        assert approximate <= exact
+        if approximate == exact: recalled = recalled + 1
+    assert float(recalled) / queries >= 0.9
+    assert index.skipped == queries * 25
+    # aligning every reference is exact
+    index.candidates = len(references)
+    query = mutate(references[0], 8)
+    assert index.score(query) == index.exact_score(query)
@@ -0,0 +1,231 @@
+import copy
+import pickle
+import random
+import sys
+import tracemalloc
+
+from dose import genetic
+
+
+class CountingOrganism(genetic.Organism):
+    evaluations = 0
+
+    def fitness(self):
+        CountingOrganism.evaluations = CountingOrganism.evaluations + 1
+        return float(self.genome[0].sequence.count('A'))
+
+
+def make_population(size=40):
+    agents = [CountingOrganism([genetic.Chromosome(
+        [random.choice('AC') for _ in range(20)], 'AC', 0.1)])
+        for _ in range(size)]
+    return genetic.Population(5, 10, agents)
+
+
+def test_report_does_not_change_status():
+    random.seed(5)
+    population = make_population()
+    statuses = [copy.deepcopy(organism.status)
+                for organism in population.agents]
+    report = population.report()
+    assert [organism.status for organism in population.agents] == statuses
+    assert all(organism.fitness_dirty() for organism in population.agents)
+    scores = [organism.fitness() for organism in population.agents]
+    assert report['average fitness'] == sum(scores) / len(scores)
+
+
+def test_prepopulation_control_does_not_change_status():
+    random.seed(6)
+    population = make_population()
+    statuses = dict([(id(organism), copy.deepcopy(organism.status))
+                     for organism in population.agents])
+    population.prepopulation_control()
+    for organism in population.agents:
+        assert organism.status == statuses[id(organism)]
+        assert organism.fitness_dirty()
+
+
+def test_fitness_scores_skip_unchanged_organisms():
+    random.seed(7)
+    population = make_population()
+    population.report()
+    CountingOrganism.evaluations = 0
+    population.agents[0].genome[0].rmutate('point', 1)
+    population.report()
+    assert CountingOrganism.evaluations == 1
+    assert population.fitness_evaluations[0] == [41, 39]
+
+
+def test_shared_sequence_can_be_changed_in_place():
+    shared = tuple('ACGTACGT')
+    chromosomes = [genetic.Chromosome(shared, 'ACGT', 0) for _ in range(3)]
+    assert chromosomes[0].sequence.shared() is shared
+    fingerprint = chromosomes[0].fingerprint()
+    chromosomes[0].sequence[0] = 'T'
+    chromosomes[1].sequence.append('A')
+    del chromosomes[2].sequence[-1]
+    assert chromosomes[0].sequence == list('TCGTACGT')
+    assert chromosomes[1].sequence == list('ACGTACGTA')
+    assert chromosomes[2].sequence == list('ACGTACG')
+    assert chromosomes[0].sequence.shared() is None
+    assert chromosomes[1].fingerprint() == \
+        genetic.sequence_fingerprint('ACGTACGTA')
+    assert ''.join(chromosomes[0].sequence) == 'TCGTACGT'
+    # in-place writes are detected by the fingerprint
+    assert fingerprint == genetic.sequence_fingerprint('ACGTACGT')
+    assert chromosomes[0].fingerprint() == \
+        genetic.sequence_fingerprint('TCGTACGT')
+    assert chromosomes[2].fingerprint() == \
+        genetic.sequence_fingerprint('ACGTACG')
+
+
+def test_fingerprint_follows_in_place_writes():
+    random.seed(9)
+    for chromosome_class in (genetic.Chromosome, genetic.LeanChromosome):
+        chromosome = chromosome_class(list('ACGT' * 10), 'ACGT', 0)
+        chromosome.fingerprint()
+        for _ in range(50):
+            position = random.randrange(-40, 40)
+            chromosome.sequence[position] = random.choice('ACGT')
+            assert chromosome.fingerprint() == \
+                genetic.sequence_fingerprint(list(chromosome.sequence))
+        chromosome.sequence.append('T')
+        chromosome.sequence[2:4] = ['G', 'G', 'G']
+        chromosome.sequence.insert(0, 'C')
+        assert chromosome.fingerprint() == \
+            genetic.sequence_fingerprint(list(chromosome.sequence))
+        # a list which replaces the sequence is tracked from the next call
+        chromosome.sequence = list('AAAA')
+        assert chromosome.fingerprint() == \
+            genetic.sequence_fingerprint('AAAA')
+        chromosome.sequence[1] = 'C'
+        assert chromosome.fingerprint() == \
+            genetic.sequence_fingerprint('ACAA')
+        copied = pickle.loads(pickle.dumps(chromosome))
+        assert copied.sequence._fingerprint == chromosome.fingerprint()
+
+
+def test_shared_sequence_mutation_and_crossover():
+    random.seed(8)
+    shared = tuple('A' * 30)
+    (chromosome1, chromosome2) = [genetic.Chromosome(shared, 'ACGT', 0)
+                                  for _ in range(2)]
+    chromosome1.rmutate('point', 1)
+    assert chromosome2.sequence == list(shared)
+    assert chromosome1.fingerprint() == \
+        genetic.sequence_fingerprint(chromosome1.sequence)
+    (new1, new2) = genetic.crossover(chromosome1, chromosome2, 10)
+    assert new1.sequence == list(chromosome1.sequence[:10]) + list('A' * 20)
+    assert new2.sequence == list('A' * 10) + list(chromosome1.sequence[10:])
+
+
+def test_shared_sequence_copies_and_pickles_keep_sharing():
+    shared = tuple('ACGT')
+    organism = genetic.Organism([genetic.Chromosome(shared, 'ACGT', 0),
+                                 genetic.Chromosome(shared, 'ACGT', 0)])
+    for copied in (copy.deepcopy(organism),
+                   pickle.loads(pickle.dumps(organism))):
+        (sequence1, sequence2) = [chromosome.sequence
+                                  for chromosome in copied.genome]
+        assert sequence1 is not sequence2
+        assert sequence1.shared() is sequence2.shared()
+        sequence1[0] = 'G'
+        assert sequence2 == list('ACGT')
+    assert organism.genome[0].sequence == list('ACGT')
+
+
+def test_genome_groups_do_not_change_organisms():
+    random.seed(9)
+    parent = genetic.Organism([genetic.Chromosome(list('ACGTACGT'),
+                                                  'ACGT', 0)])
+    other = genetic.Organism([genetic.Chromosome(list('ACGTACGA'),
+                                                 'ACGT', 0)])
+    clones = genetic.bulk_mating([parent], 3, 'asexual')
+    # a copy with the same bases but its own sequence is still a clone
+    copied = genetic.Organism([genetic.Chromosome(list('ACGTACGT'),
+                                                  'ACGT', 0)])
+    agents = [parent, other] + clones + [copied]
+    sequences = [organism.genome[0].sequence for organism in agents]
+    groups = genetic.genome_groups(agents)
+    assert [len(group) for group in groups] == [5, 1]
+    assert groups[0][0] is parent and groups[1] == [other]
+    assert [organism.genome[0].sequence for organism in agents] == sequences
+    assert all(organism.genome[0].sequence is sequence
+               for (organism, sequence) in zip(agents, sequences))
+    assert copied.genome[0].sequence.shared() is None
+    # an in-place write takes the organism out of its group of clones
+    clones[1].genome[0].sequence[7] = 'A'
+    groups = genetic.genome_groups(agents)
+    assert [len(group) for group in groups] == [4, 2]
+    assert clones[1] in groups[1]
+    assert parent.genome[0].sequence == list('ACGTACGT')
+
+
+def organism_bytes(organism_class, chromosome_class, size=2000):
+    # bytes per organism excluding the sequence, as in LeanOrganism
+    bases = ['0', '1']
+    agents = []
+    tracemalloc.start()
+    try:
+        for _ in range(size):
+            organism = organism_class([chromosome_class(['0'] * 50, bases,
+                                                        0.1)])
+            organism.generate_name()
+            agents.append(organism)
+        used = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    sequence = agents[0].genome[0].sequence
+    sequence_bytes = sys.getsizeof(sequence) + sys.getsizeof(sequence[:])
+    return float(used) / size - sequence_bytes
+
+
+def test_lean_organism_size():
+    lean = organism_bytes(genetic.LeanOrganism, genetic.LeanChromosome)
+    assert lean < 500
+    assert lean < 0.6 * organism_bytes(genetic.Organism, genetic.Chromosome)
+
+
+def test_sample_indices_follow_weights():
+    random.seed(11)
+    counts = [0, 0, 0, 0]
+    for index in genetic.sample_indices(4, 8000, [0, 1, 3, 0]):
+        counts[index] = counts[index] + 1
+    assert counts[0] == 0 and counts[3] == 0
+    assert abs(counts[2] - 3 * counts[1]) < 600
+    # zero weights are sampled uniformly
+    assert set(genetic.sample_indices(4, 200, [0, 0, 0, 0])) == \
+        set(range(4))
+
+
+def test_bulk_mating_and_assembly():
+    random.seed(12)
+    parents = [genetic.Organism([genetic.Chromosome(list(base * 10),
+                                                    'AC', 0)])
+               for base in 'AC']
+    for (index, parent) in enumerate(parents):
+        parent.status['identity'] = 'p%i' % index
+        parent.status['location'] = (index, 0, 0)
+        parent.status['deme'] = 'pop'
+    offspring = genetic.bulk_mating(parents, 50, 'sexual', weights=[1, 1],
+                                    generation=3)
+    assert len(offspring) == 50
+    for child in offspring:
+        (first, second) = [parents[int(name[1])]
+                           for name in child.status['parents']]
+        # the first product of a crossover of the parents' chromosomes
+        (head, tail) = (list(first.genome[0].sequence),
+                        list(second.genome[0].sequence))
+        assert list(child.genome[0].sequence) in \
+            [head[:position] + tail[position:] for position in range(11)]
+        assert child.status['generation'] == 3
+        assert child.status['deme'] == 'pop'
+        assert child.status['location'] == first.status['location']
+    clones = genetic.bulk_mating(parents, 20, 'asexual', weights=[0, 1])
+    assert all([child.status['parents'] == ['p1'] for child in clones])
+    assert all([child.genome[0].sequence == list('C' * 10)
+                for child in clones])
+    agents = genetic.assemble_agents([parents, offspring, clones])
+    assert len(agents) == 72
+    assert agents[:2] == parents and agents[2:52] == offspring and \
+        agents[52:] == clones
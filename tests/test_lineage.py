@@ -0,0 +1,66 @@
+from dose import database_calls, dose, genetic, lineage
+
+
+def test_names_and_identities():
+    registry = lineage.Lineage()
+    founders = registry.register_bulk(100)
+    assert list(founders) == list(range(100))
+    assert registry.name(72) == 'org_1A'
+    assert registry.identity('org_1A') == 72
+    assert registry.identity(registry.name(0)) == 0
+    # names which were not derived by the registry, or not registered
+    assert registry.identity('org_1a2') == -1
+    assert lineage.decode_name('2R$Z@vE=2NKloTbB') == -1
+    foreign = registry.register_name('2R$Z@vE=2NKloTbB', (3,), 1)
+    assert foreign == 100
+    assert registry.name(foreign) == '2R$Z@vE=2NKloTbB'
+    assert registry.identity('2R$Z@vE=2NKloTbB') == foreign
+    assert registry.parents(foreign) == (3,)
+    assert len(registry) == 101
+
+
+def test_ancestors_and_descendants():
+    registry = lineage.Lineage()
+    (a, b) = registry.register_bulk(2)
+    c = registry.register((a, b), 1)
+    d = registry.register((c,), 2)
+    assert registry.parents(c) == (a, b)
+    assert registry.generation(d) == 2
+    assert registry.ancestors(d) == set([a, b, c])
+    assert registry.ancestors(d, 1) == set([c])
+    assert registry.children(a) == [c]
+    assert registry.descendants(a) == set([c, d])
+    # organisms registered after a query are indexed on the next query
+    e = registry.register((d, b), 3)
+    assert registry.children(b) == [c, e]
+    assert registry.descendants(a, 2) == set([c, d])
+    assert registry.descendants(a) == set([c, d, e])
+
+
+def test_lineage_is_reconstructed_from_database():
+    registry = lineage.Lineage()
+    data = dict(genetic.population_data)
+    data.update({'chromosome_bases': ['0', '1'], 'population_size': 4,
+                 'chromosome_length': 8, 'initial_chromosome': ['0'] * 8,
+                 'maximum_generations': 10})
+    population = genetic.template_population_constructor(data,
+                                                         lineage=registry)
+    founders = population.agents
+    offspring = genetic.bulk_mating(founders, 3, 'sexual', generation=1,
+                                    lineage=registry)
+    (con, cur) = database_calls.connect_database(':memory:')
+    dose.database_report_populations(con, cur, 'start', {'pop': population},
+                                     0)
+    population.agents = offspring
+    dose.database_report_populations(con, cur, 'start', {'pop': population},
+                                     1)
+    reconstructed = lineage.db_reconstruct_lineage(cur, 'start')
+    con.close()
+    for organism in offspring:
+        identity = registry.identity(organism.status['identity'])
+        assert reconstructed.identity(organism.status['identity']) == \
+            identity
+        assert reconstructed.parents(identity) == registry.parents(identity)
+        assert reconstructed.generation(identity) == 1
+    assert [reconstructed.generation(registry.identity(o.status['identity']))
+            for o in founders] == [0] * 4
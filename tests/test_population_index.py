@@ -0,0 +1,80 @@
+import random
+
+from dose import dose, genetic
+from dose.population_index import TrackedStatus
+
+
+def make_population(size=30):
+    agents = []
+    for i in range(size):
+        organism = genetic.Organism([genetic.Chromosome(['A'], 'A', 0)])
+        organism.status['location'] = (i % 3, 0, 0)
+        agents.append(organism)
+    return genetic.Population(0, 10, agents)
+
+
+def scanned(population, location):
+    return [organism for organism in population.agents
+            if organism.status['location'] == location]
+
+
+def check(population):
+    for x in range(4):
+        location = (x, 0, 0)
+        assert dose.filter_location(location, population.agents) == \
+            scanned(population, location)
+        assert population.index('location').count(location) == \
+            len(scanned(population, location))
+
+
+def test_agent_list_changes_do_not_rebuild_indexes(monkeypatch):
+    random.seed(4)
+    population = make_population()
+    check(population)
+
+    def reindex():
+        raise AssertionError('indexes rebuilt')
+    monkeypatch.setattr(population, 'reindex', reindex)
+    agents = population.agents
+    for _ in range(300):
+        organism = random.choice(agents)
+        operation = random.randrange(9)
+        if operation == 0:
+            agents.insert(random.randrange(len(agents)), organism)
+        elif operation == 1:
+            agents[random.randrange(len(agents))] = \
+                random.choice(make_population(4).agents)
+        elif operation == 2:
+            del agents[random.randrange(len(agents))]
+        elif operation == 3:
+            agents.pop(random.randrange(len(agents)))
+        elif operation == 4:
+            start = random.randrange(len(agents))
+            agents[start:start + 3] = [organism, organism]
+        elif operation == 5:
+            del agents[::7]
+        elif operation == 6:
+            agents.reverse()
+        elif operation == 7:
+            organism.status['location'] = (random.randrange(4), 0, 0)
+        else:
+            agents.append(organism)
+        if len(agents) < 10: agents.extend(make_population(20).agents)
+        if random.random() < 0.3: check(population)
+    check(population)
+    agents *= 2
+    check(population)
+    agents.clear()
+    check(population)
+
+
+def test_first_lookup_tracks_status():
+    population = make_population(5)
+    status = population.agents[0].status
+    assert type(status) is dict
+    dose.filter_location((0, 0, 0), population.agents)
+    assert isinstance(population.agents[0].status, TrackedStatus)
+    assert population.agents[0].status == status
+    population.agents[0].status['location'] = (2, 0, 0)
+    assert population.agents[0] in \
+        dose.filter_location((2, 0, 0), population.agents)
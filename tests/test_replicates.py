@@ -0,0 +1,114 @@
+import json
+import os
+from concurrent import futures
+
+import pytest
+
+from dose import database_calls, replicates
+
+
+class SerialExecutor(object):
+    def __init__(self, processes=None, mp_context=None):
+        pass
+
+    def submit(self, function, *args):
+        future = futures.Future()
+        future.set_result(function(*args))
+        return future
+
+    def shutdown(self):
+        pass
+
+
+def test_run_database_is_removed_after_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    directory = replicates.simulations_directory()
+    os.makedirs(directory)
+    events = []
+
+    def simulation_task(sim_parameters, sim_functions, name, seed):
+        path = os.path.join(directory, sim_parameters["database_file"])
+        open(path, 'w').close()
+        return {'status': 'completed', 'starting_time': 'now',
+                'directory': directory}
+
+    def merge(con, cur, path):
+        assert os.path.exists(path)
+        events.append('merge')
+        return (con, cur)
+
+    def write_atomic(filename, data):
+        manifest = json.loads(data.decode('utf-8'))
+        events.append(('manifest', manifest['sim_rep1']['status']))
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+    remove = os.remove
+
+    def recording_remove(path):
+        if path.endswith('_sim_rep1.db'): events.append('remove')
+        remove(path)
+    monkeypatch.setattr(replicates.futures, 'ProcessPoolExecutor',
+                        SerialExecutor)
+    monkeypatch.setattr(replicates, 'simulation_task', simulation_task)
+    monkeypatch.setattr(replicates, 'db_merge_database', merge)
+    monkeypatch.setattr(replicates, 'write_atomic', write_atomic)
+    monkeypatch.setattr(replicates.os, 'remove', recording_remove)
+    manifest = replicates.run_simulations(
+        [('sim_rep1', {'database_file': 'sim.db'}, 1)], None,
+        os.path.join(directory, 'sim_replicates.json'), progress=False)
+    assert events == [('manifest', 'pending'), ('manifest', 'merging'),
+                      'merge', ('manifest', 'completed'), 'remove']
+    assert manifest['sim_rep1']['status'] == 'completed'
+    assert not os.path.exists(os.path.join(directory, 'sim_sim_rep1.db'))
+    assert replicates.read_manifest(
+        os.path.join(directory, 'sim_replicates.json')) == manifest
+
+
+def log_run(path, start_time):
+    (con, cur) = database_calls.connect_database(path)
+    cur.execute('insert into parameters values (?,?,?,?)',
+                (start_time, 'sim_rep1', 'seed', '1'))
+    cur.execute('insert into organisms values (?,?,?,?,?,?)',
+                (start_time, 'pop', 'org', '1', 'fitness', '1'))
+    con.commit()
+    con.close()
+
+
+def logged_rows(path):
+    (con, cur) = database_calls.connect_database(path)
+    rows = [cur.execute('select * from %s' % table).fetchall()
+            for table in ('parameters', 'organisms')]
+    con.close()
+    return rows
+
+
+@pytest.mark.parametrize('merged', [False, True])
+def test_interrupted_merge_is_not_duplicated(tmp_path, monkeypatch, merged):
+    # the manifest records the run as merging, and the process stopped
+    # before (or after) the merge was committed
+    monkeypatch.chdir(tmp_path)
+    directory = replicates.simulations_directory()
+    os.makedirs(directory)
+    run_path = os.path.join(directory, 'sim_sim_rep1.db')
+    main_path = os.path.join(directory, 'sim.db')
+    log_run(run_path, 'T1')
+    log_run(main_path, 'T0')
+    if merged: log_run(main_path, 'T1')
+    manifest_file = os.path.join(directory, 'sim_replicates.json')
+    replicates.write_manifest(manifest_file, {'sim_rep1': {
+        'status': 'merging', 'seed': 1, 'database_file': 'sim.db',
+        'starting_time': 'T1', 'directory': directory}})
+
+    def simulation_task(*args):
+        raise AssertionError('completed run is run again')
+    monkeypatch.setattr(replicates, 'simulation_task', simulation_task)
+    manifest = replicates.run_simulations(
+        [('sim_rep1', {'database_file': 'sim.db'}, 1)], None,
+        manifest_file, progress=False)
+    assert manifest['sim_rep1']['status'] == 'completed'
+    assert replicates.read_manifest(manifest_file) == manifest
+    assert not os.path.exists(run_path)
+    (parameters, organisms) = logged_rows(main_path)
+    assert sorted([row[0] for row in parameters]) == ['T0', 'T1']
+    assert sorted([row[0] for row in organisms]) == ['T0', 'T1']
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from dose import genetic, selection
+from dose.selection import AliasTable
+
+
+def make_agents(fitness):
+    agents = []
+    for score in fitness:
+        organism = genetic.Organism([genetic.Chromosome(list('ACGT'),
+                                                        'ACGT', 0)])
+        organism.status['fitness'] = score
+        agents.append(organism)
+    return agents
+
+
+def test_alias_table_with_zero_weights_is_uniform():
+    random.seed(5)
+    table = AliasTable([0, 0, 0, 0])
+    counts = [0] * 4
+    for index in table.sample_many(8000):
+        counts[index] = counts[index] + 1
+    assert all(abs(count - 2000) < 200 for count in counts)
+    with pytest.raises(ValueError):
+        AliasTable([])
+
+
+def test_selection_with_zero_fitness_is_uniform():
+    random.seed(6)
+    agents = make_agents([0] * 5)
+    for selected in (selection.roulette_selection(agents, 5000),
+                     selection.stochastic_universal_sampling(agents, 5000)):
+        counts = [len([o for o in selected if o is organism])
+                  for organism in agents]
+        assert all(abs(count - 1000) < 150 for count in counts)
+    chosen = set()
+    for _ in range(50):
+        chosen.update([id(o) for o in
+                       selection.roulette_selection(agents, 2,
+                                                    replacement=False)])
+    assert chosen == set([id(o) for o in agents])
+    with pytest.raises(ValueError):
+        selection.roulette_selection(make_agents([1, -1]), 1)
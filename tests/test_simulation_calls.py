@@ -0,0 +1,192 @@
+import glob
+import os
+import pickle
+
+from dose import background_writer, database_calls, dose, fitness, genetic
+from dose import lineage, simulation_calls, topology
+
+
+def make_populations(size, history=0):
+    registry = lineage.Lineage()
+    registry.register_bulk(history)
+    data = dict(genetic.population_data)
+    data.update({'population_size': size, 'chromosome_length': 50,
+                 'initial_chromosome': [1] * 50, 'maximum_generations': 10})
+    population = genetic.template_population_constructor(data,
+                                                         lineage=registry)
+    return {'pop': population}
+
+
+def frozen_size(tmp_path, Populations, proportion, name):
+    prefix = str(tmp_path / name) + '_'
+    simulation_calls.freeze_population(prefix, proportion, Populations,
+                                       'pop')
+    background_writer.stop_background_writer()
+    (filename,) = glob.glob(prefix + '*.gap')
+    f = open(filename, 'rb')
+    sample = pickle.load(f)
+    f.close()
+    return (os.path.getsize(filename), sample)
+
+
+def test_frozen_sample_scales_with_sample_size(tmp_path):
+    (small, sample) = frozen_size(tmp_path, make_populations(2000), 0.1,
+                                  'short')
+    assert len(sample.agents) == 200
+    assert sample.lineage is None
+    Populations = make_populations(2000, history=200000)
+    (long_run, _) = frozen_size(tmp_path, Populations, 0.1, 'long')
+    assert Populations['pop'].lineage is not None
+    background_writer.start_background_writer()
+    (background, _) = frozen_size(tmp_path, Populations, 0.1, 'background')
+    (large, _) = frozen_size(tmp_path, Populations, 0.5, 'large')
+    # the lineage history of 200 thousand organisms is not frozen
+    assert long_run < small * 1.1
+    assert background < small * 1.1
+    assert 4 * small < large < 6 * small
+
+
+class ClonalFunctions(dose.dose_functions):
+    fitness_processes = 1
+    evaluations = 0
+
+    def organism_fitness(self, genome, status):
+        ClonalFunctions.evaluations = ClonalFunctions.evaluations + 1
+        return float(genome[0].sequence.count('1'))
+
+
+def make_clonal_population():
+    data = dict(genetic.population_data)
+    data.update({'chromosome_bases': ['1', '2', '3', '4'],
+                 'population_size': 30, 'chromosome_length': 50,
+                 'initial_chromosome': ['1'] * 50, 'maximum_generations': 10})
+    population = genetic.template_population_constructor(data)
+    population.clonal = True
+    for organism in population.agents[10:20]:
+        organism.genome[0].sequence[0] = '2'
+    population.agents[20].genome[0].sequence[1] = '3'
+    return {'pop': population}
+
+
+def test_clonal_fitness_is_evaluated_once_per_group():
+    Populations = make_clonal_population()
+    population = Populations['pop']
+    ClonalFunctions.evaluations = 0
+    simulation_calls.fitness_evaluation(Populations, 'pop',
+                                        ClonalFunctions())
+    assert ClonalFunctions.evaluations == 3
+    scores = [organism.status['fitness'] for organism in population.agents]
+    assert scores == [50.0] * 10 + [49.0] * 10 + [49.0] + [50.0] * 9
+
+
+def test_clonal_database_logs_each_genome_once():
+    Populations = make_clonal_population()
+    agents = Populations['pop'].agents
+    sequences = [organism.genome[0].sequence for organism in agents]
+    (con, cur) = database_calls.connect_database(':memory:')
+    dose.database_report_populations(con, cur, 'start', Populations, 1)
+    logged = cur.execute("select org_name, value from organisms where "
+                         "key = 'chromosome_0'").fetchall()
+    clones = dict(cur.execute("select org_name, value from organisms "
+                              "where key = 'clone_of'").fetchall())
+    con.close()
+    names = [str(organism.status['identity']) for organism in agents]
+    assert sorted([name for (name, _) in logged]) == \
+        sorted([names[0], names[10], names[20]])
+    assert clones[names[5]] == names[0]
+    assert clones[names[15]] == names[10]
+    assert len(clones) == 27
+    assert all(organism.genome[0].sequence is sequence
+               for (organism, sequence) in zip(agents, sequences))
+
+
+def test_fitness_is_evaluated_without_a_pool_by_default(monkeypatch):
+    class Functions(dose.dose_functions):
+        def organism_fitness(self, genome, status):
+            return float(genome[0].sequence.count('2'))
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError('process pool started')
+
+    monkeypatch.setattr(fitness, 'fitness_pool', no_pool)
+    Populations = make_clonal_population()
+    Populations['pop'].clonal = False
+    simulation_calls.fitness_evaluation(Populations, 'pop', Functions())
+    scores = [organism.status['fitness']
+              for organism in Populations['pop'].agents]
+    assert scores == [0.0] * 10 + [1.0] * 10 + [0.0] * 10
+    assert Populations['pop'].fitness_evaluations[0] == [30, 0]
+
+
+class HookFunctions(dose.dose_functions):
+    mutations = 0
+
+    def mutation_scheme(self, organism):
+        HookFunctions.mutations = HookFunctions.mutations + 1
+
+    def prepopulation_control(self, Populations, pop_name): pass
+
+    def mating(self, Populations, pop_name):
+        '''Does nothing.'''
+
+    def postpopulation_control(self, Populations, pop_name):
+        return None
+
+    def generation_events(self, Populations, pop_name): pass
+    def fitness(self, Populations, pop_name): pass
+
+    def population_report(self, Populations, pop_name):
+        return 'report'
+
+
+def test_plan_skips_noop_hooks():
+    functions = HookFunctions()
+    plan = simulation_calls.simulation_plan(functions)
+    assert plan.mutation_scheme is not None
+    assert plan.prepopulation_control is None
+    assert plan.mating is None
+    assert plan.postpopulation_control is None
+    assert plan.generation_events is None
+    assert plan.fitness is False
+    # functions which are not implemented are kept and raise when called
+    assert plan.ecoregulate is not None
+    Populations = make_clonal_population()
+    HookFunctions.mutations = 0
+    assert simulation_calls.step(Populations, 'pop', functions) == 'report'
+    assert HookFunctions.mutations == 30
+    assert Populations['pop'].generation == 1
+    assert simulation_calls.simulation_plan(functions) is plan
+
+
+def test_plans_are_kept_per_functions_and_parameters():
+    functions = HookFunctions()
+    parameters = {'world_x': 2, 'world_y': 1, 'world_z': 1,
+                  'interpret_chromosome': False}
+    plan = simulation_calls.simulation_plan(functions, parameters)
+    assert simulation_calls.simulation_plan(functions, parameters) is plan
+    assert simulation_calls.simulation_plan(functions) is not plan
+    assert simulation_calls.simulation_plan(HookFunctions(),
+                                            parameters) is not plan
+    parameters['world_y'] = 2
+    changed = simulation_calls.simulation_plan(functions, parameters)
+    assert changed is not plan
+    assert changed.cells == [(0, 0, 0), (0, 1, 0), (1, 0, 0), (1, 1, 0)]
+
+
+def test_adjacent_cells_order():
+    parameters = {'world_x': 4, 'world_y': 3, 'world_z': 2}
+    assert simulation_calls.adjacent_cells(parameters, (1, 1, 1)) == \
+        [(2, 2, 1), (0, 0, 1), (2, 1, 1), (0, 2, 1), (2, 0, 1), (0, 1, 1),
+         (1, 0, 1), (1, 2, 1)]
+    assert simulation_calls.adjacent_cells(parameters, (0, 0, 0)) == \
+        [(1, 1, 0), (1, 0, 0), (0, 1, 0)]
+    assert simulation_calls.adjacent_cells(parameters, (3, 2, 0)) == \
+        [(2, 1, 0), (2, 2, 0), (3, 1, 0)]
+    # locations outside the world give their neighbours within the world
+    assert simulation_calls.adjacent_cells(parameters, (4, 1, 0)) == \
+        [(3, 0, 0), (3, 2, 0), (3, 1, 0)]
+    # the same cells as the Moore neighbourhood of the world topology
+    grid = topology.world_topology(4, 3, 2)
+    for cell in grid.cells:
+        assert sorted(simulation_calls.adjacent_cells(parameters, cell)) == \
+            sorted(grid.neighbours(cell))
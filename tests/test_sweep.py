@@ -0,0 +1,101 @@
+import os
+from concurrent import futures
+
+from dose import replicates, sweep
+
+
+class SerialExecutor(object):
+    def __init__(self, processes=None, mp_context=None):
+        pass
+
+    def submit(self, function, *args):
+        future = futures.Future()
+        future.set_result(function(*args))
+        return future
+
+    def shutdown(self):
+        pass
+
+
+parameters = {'simulation_name': 'sim', 'database_file': 'sim.db',
+              'population_size': 100, 'maximum_generations': 10,
+              'chromosome_size': 50, 'population_names': ['pop']}
+
+
+def test_parameter_grid():
+    grid = {'population_size': [100, 500], 'background_mutation': [0.1]}
+    runs = sweep.parameter_grid(parameters, grid)
+    assert [values for (_, _, values) in runs] == \
+        [{'background_mutation': 0.1, 'population_size': 100},
+         {'background_mutation': 0.1, 'population_size': 500}]
+    for (name, run_parameters, values) in runs:
+        assert name.startswith('sim_')
+        assert run_parameters['population_size'] == \
+            values['population_size']
+        assert run_parameters['chromosome_size'] == 50
+    assert parameters['population_size'] == 100
+    assert len(set([name for (name, _, _) in runs])) == 2
+    # names of runs are kept when values are added to the grid
+    grid['population_size'].append(1000)
+    names = [name for (name, _, _) in sweep.parameter_grid(parameters, grid)]
+    assert names[:2] == [name for (name, _, _) in runs]
+
+
+def test_runs_are_scheduled_longest_first(monkeypatch):
+    scheduled = []
+
+    def run_simulations(runs, sim_functions, manifest_file, processes,
+                        progress):
+        scheduled.extend(runs)
+        return {}
+    monkeypatch.setattr(sweep, 'run_simulations', run_simulations)
+    monkeypatch.setattr(sweep, 'simulations_directory',
+                        lambda: os.getcwd())
+    grid = {'population_size': [200, 100, 400],
+            'maximum_generations': [10, 30]}
+    sweep.run_sweep(parameters, None, grid, seed=1, progress=False)
+    costs = [sweep.run_cost(run[1]) for run in scheduled]
+    assert costs == sorted(costs, reverse=True)
+    assert [run[3]['values'] for run in scheduled[:2]] == \
+        [{'maximum_generations': 30, 'population_size': 400},
+         {'maximum_generations': 30, 'population_size': 200}]
+    assert sweep.run_cost(dict(parameters, population_size=200)) == \
+        2 * sweep.run_cost(parameters)
+
+
+def test_sweep_resumes_from_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    def simulation_task(sim_parameters, sim_functions, name, seed):
+        calls.append((name, seed))
+        path = os.path.join(replicates.simulations_directory(),
+                            sim_parameters['database_file'])
+        open(path, 'w').close()
+        if sim_parameters['population_size'] == 500 and len(calls) < 3:
+            return {'status': 'failed', 'error': 'interrupted'}
+        return {'status': 'completed', 'starting_time': name,
+                'directory': '.'}
+    monkeypatch.setattr(replicates.futures, 'ProcessPoolExecutor',
+                        SerialExecutor)
+    monkeypatch.setattr(replicates, 'simulation_task', simulation_task)
+    monkeypatch.setattr(replicates, 'db_merge_database',
+                        lambda con, cur, path: (con, cur))
+    grid = {'population_size': [100, 500]}
+    manifest = sweep.run_sweep(parameters, None, grid, seed=3,
+                               progress=False)
+    statuses = dict([(manifest[name]['values']['population_size'],
+                      manifest[name]['status']) for name in manifest])
+    assert statuses == {100: 'completed', 500: 'failed'}
+    first = list(calls)
+    assert len(first) == 2
+    # the completed run is skipped and the failed run keeps its seed
+    manifest = sweep.run_sweep(parameters, None, grid, progress=False)
+    assert calls[2:] == [first[0]]
+    assert all([manifest[name]['status'] == 'completed'
+                for name in manifest])
+    assert os.path.exists(os.path.join(replicates.simulations_directory(),
+                                       'sim_sweep.json'))
+    calls[:] = []
+    sweep.run_sweep(parameters, None, grid, progress=False)
+    assert calls == []